@@ -2,6 +2,8 @@
 ASGI config for Shedulify project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Long-lived streams such as /notifications/stream/ (Server-Sent Events) need
+to be served through this entry point, e.g. ``uvicorn Schedulify.asgi:application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
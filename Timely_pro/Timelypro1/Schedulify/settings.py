@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,15 +46,32 @@ CLASS_DURATION_THEORY = 1  # in hours
 CLASS_DURATION_PRACTICAL = 2  # in hours
 MAX_HOURS_PER_WEEK_PER_SUBJECT = 6  # or any value appropriate
 
+# Term used to bound the weekly recurrences of the iCalendar feeds ('YYYY-MM-DD')
+TERM_START_DATE = None  # defaults to the current week
+TERM_END_DATE = None
+TERM_EXCEPTION_DATES = []  # holidays, skipped in the feeds
+
 AUTH_USER_MODEL = 'users.CustomUser'
 
+AUTH_TOKEN_EXPIRY_DAYS = 30  # None for tokens that never expire
+AUTH_TOKEN_CACHE_TIMEOUT = 300  # seconds a resolved token stays in the cache
+USER_ROLES_CACHE_TIMEOUT = 60 * 60  # role sets are also invalidated by signals
+
+# Cache alias holding resolved tokens and role sets. Revocations only reach every worker when
+# it is shared (Redis, Memcached, database); with a process-local alias such as the default
+# LocMemCache, entries are kept at most LOCAL_CACHE_MAX_TIMEOUT seconds instead.
+AUTH_CACHE_ALIAS = os.environ.get('SCHEDULIFY_AUTH_CACHE', 'default')
+LOCAL_CACHE_MAX_TIMEOUT = 5
+
 
 MIDDLEWARE = [
+    'django.middleware.gzip.GZipMiddleware',  # Compresses large JSON bodies, must stay first
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.PrimaryPinningMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -111,13 +129,92 @@ WSGI_APPLICATION = 'Schedulify.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+def sqlite_database(name):
+    # Journaling stays SQLite's default rollback mode unless DATABASE_SQLITE_WAL is set (see below),
+    # in which case core.routers.configure_sqlite switches each new connection to WAL
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': 20,  # seconds to wait for a lock before "database is locked"
+            'transaction_mode': 'IMMEDIATE',
+        },
+    }
+
+
 DATABASES = {
+    'default': sqlite_database(BASE_DIR / 'db.sqlite3'),
+}
+
+# Read replicas as a comma separated list of SQLite files kept in sync with the primary,
+# e.g. SCHEDULIFY_DB_REPLICAS=/srv/schedulify/replica1.sqlite3,/srv/schedulify/replica2.sqlite3
+for index, replica in enumerate(filter(None, os.environ.get('SCHEDULIFY_DB_REPLICAS', '').split(',')), start=1):
+    DATABASES[f'replica{index}'] = dict(sqlite_database(replica.strip()), TEST={'MIRROR': 'default'})
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+DATABASE_STICKY_SECONDS = 5  # reads stay on the primary this long after a client writes
+# WAL lets readers run during a generation write. It is deliberately opt-in rather than on out of
+# the box: switching to WAL rewrites the database file header and keeps -wal/-shm files next to it,
+# and the repository tracks db.sqlite3, so every checkout would modify that committed file on its
+# first connection. Deployments set SCHEDULIFY_SQLITE_WAL=1; the mode persists in the file afterwards.
+DATABASE_SQLITE_WAL = os.environ.get('SCHEDULIFY_SQLITE_WAL', '').lower() in ('1', 'true', 'yes')
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'schedulify',
+        'OPTIONS': {
+            'MAX_ENTRIES': 50000,
+        },
     }
 }
 
+# Backend of the response cache used by the reference endpoints (degrees, departments,
+# classrooms, subjects, time slots). Either an alias below or a dotted cache backend path.
+RESPONSE_CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+}
+RESPONSE_CACHE_BACKEND = os.environ.get('SCHEDULIFY_RESPONSE_CACHE', 'locmem')
+CACHES['responses'] = {
+    'BACKEND': RESPONSE_CACHE_BACKENDS.get(RESPONSE_CACHE_BACKEND, RESPONSE_CACHE_BACKEND),
+    'LOCATION': os.environ.get(
+        'SCHEDULIFY_RESPONSE_CACHE_LOCATION',
+        str(BASE_DIR / 'cache' / 'responses') if RESPONSE_CACHE_BACKEND == 'file' else 'schedulify-responses',
+    ),
+    'TIMEOUT': 60 * 60,
+    'OPTIONS': {
+        'MAX_ENTRIES': 10000,
+    },
+}
+
+# Version tokens key every response cache entry, so they must be at least as widely shared as
+# the response cache: a shared response backend keeps them next to its entries.
+VERSION_CACHE_ALIAS = os.environ.get(
+    'SCHEDULIFY_VERSION_CACHE', 'default' if RESPONSE_CACHE_BACKEND == 'locmem' else 'responses',
+)
+
+TIMETABLE_GRID_CACHE_TIMEOUT = 60 * 60 * 24 * 7  # grids of old versions expire after a week
+TIMETABLE_SNAPSHOT_RETENTION = 50  # snapshots of older runs are pruned
+
+# Printable reports are rendered by a pool of REPORT_WORKERS threads; the formats listed in
+# REPORT_PREBUILD_FORMATS ('html', 'pdf') are rendered in the background after every publish.
+REPORT_WORKERS = 4
+REPORT_PREBUILD_FORMATS = ()
+
+# Pub/sub used to push notifications over the ASGI app. InProcessBroker only reaches
+# subscribers in the same process; CacheBroker relays through a shared cache backend.
+PUBSUB_BROKER = os.environ.get('SCHEDULIFY_PUBSUB_BROKER', 'notifications.pubsub.InProcessBroker')
+PUBSUB_CACHE_ALIAS = os.environ.get('SCHEDULIFY_PUBSUB_CACHE', 'default')  # must be shared for CacheBroker
+PUBSUB_HEARTBEAT_SECONDS = 15
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -4,6 +4,12 @@ from django.urls import path, include
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('notifications/', include('notifications.urls')),  # Must come before the core router's notifications/<pk>/
+    path('analytics/', include('analytics.urls')),
+    path('reports/', include('reports.urls')),
+    path('examinations/', include('examinations.urls')),
+    path('classrooms/', include('classrooms.urls')),
+    path('schedule/', include('schedule.urls')),
     path('', include('core.urls')),    # Map core.urls to root
     path('api/', include('users.urls')),
     path('api-auth/', include('rest_framework.urls')),   # Users app URLs
@@ -0,0 +1,261 @@
+#analytics/engine.py
+import logging
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from analytics.metrics import VERSION_SCOPES
+from core.grids import get_grid_layout
+from core.models import Classroom, Department, Faculty, Student, Subject, TimeSlot, Timetable
+from core.versioning import format_version, get_version
+
+logger = logging.getLogger(__name__)
+
+
+def _ids(values):
+    return np.fromiter((value or 0 for value in values), dtype=np.int64, count=len(values))
+
+
+def _lookup(keys, values, size, fill=0, dtype=np.int64):
+    """
+    Dense id -> value array so a whole column can be mapped with one take.
+    """
+    table = np.full(size, fill, dtype=dtype)
+    if len(keys):
+        table[np.asarray(keys, dtype=np.int64)] = values
+    return table
+
+
+class TimetableFrame:
+    """
+    The timetable loaded once into columnar numpy arrays: one row per entry
+    with subject, slot, room, faculty and department ids (0 when unassigned)
+    and the day/period coordinates and length of its slot.
+    """
+
+    def __init__(self):
+        self.days, self.periods = get_grid_layout()
+        rows = list(Timetable.objects.values_list('subject_id', 'time_slot_id', 'classroom_id', 'faculty_id', 'department_id'))
+        columns = list(zip(*rows)) or [()] * 5
+        self.subject, self.slot, self.room, self.faculty, self.department = (_ids(column) for column in columns)
+
+        slots = list(TimeSlot.objects.filter(is_original=False).values_list('id', 'day', 'start_time', 'end_time'))
+        day_index = {day: i for i, day in enumerate(self.days)}
+        period_index = {period: i for i, period in enumerate(self.periods)}
+        slot_ids = [slot_id for slot_id, _, _, _ in slots]
+        size = max([*slot_ids, *self.slot.tolist(), 0]) + 1
+        self.day = _lookup(slot_ids, [day_index[day] for _, day, _, _ in slots], size, -1)[self.slot]
+        self.period = _lookup(slot_ids, [period_index[(start, end)] for _, _, start, end in slots], size, -1)[self.slot]
+        hours = [(end.hour * 60 + end.minute - start.hour * 60 - start.minute) / 60 for _, _, start, end in slots]
+        self.hours = _lookup(slot_ids, hours, size, 0.0, np.float64)[self.slot]
+
+    def __len__(self):
+        return len(self.subject)
+
+    @property
+    def period_count(self):
+        return len(self.days) * len(self.periods)
+
+    @property
+    def cell(self):
+        """
+        Flat day x period index of every entry, -1 outside the grid layout.
+        """
+        placed = (self.day >= 0) & (self.period >= 0)
+        return np.where(placed, self.day * len(self.periods) + self.period, -1)
+
+
+def _occupied_cells(owner, cell, size):
+    """
+    Number of distinct grid cells used by each owner id (rooms, faculty).
+    """
+    mask = (owner > 0) & (cell >= 0)
+    pairs = np.unique(owner[mask] * (cell.max(initial=0) + 1) + cell[mask])
+    return np.bincount(pairs // (cell.max(initial=0) + 1), minlength=size)
+
+
+def room_rollup(frame, enrolled):
+    rooms = list(Classroom.objects.values_list('id', 'room_number', 'room_type', 'capacity'))
+    size = max([room_id for room_id, _, _, _ in rooms] + frame.room.tolist() + [0]) + 1
+    occupied = _occupied_cells(frame.room, frame.cell, size)
+    capacity = _lookup([room[0] for room in rooms], [room[3] for room in rooms], size)
+
+    assigned = frame.room > 0
+    seat_use = enrolled[frame.subject[assigned]] / np.maximum(capacity[frame.room[assigned]], 1)
+    seat_sum = np.bincount(frame.room[assigned], weights=seat_use, minlength=size)
+    sessions = np.bincount(frame.room[assigned], minlength=size)
+
+    total = frame.period_count or 1
+    return [
+        {
+            "id": room_id,
+            "room_number": room_number,
+            "room_type": room_type,
+            "capacity": room_capacity,
+            "occupied_periods": int(occupied[room_id]),
+            "occupancy_percent": round(100 * occupied[room_id] / total, 1),
+            "average_seat_utilization_percent": round(100 * seat_sum[room_id] / sessions[room_id], 1) if sessions[room_id] else 0.0,
+        }
+        for room_id, room_number, room_type, room_capacity in rooms
+    ]
+
+
+def faculty_rollup(frame):
+    faculty = list(Faculty.objects.values_list('id', 'user__username', 'department_id'))
+    size = max([member[0] for member in faculty] + frame.faculty.tolist() + [0]) + 1
+    hours = np.bincount(frame.faculty, weights=frame.hours, minlength=size)
+    sessions = np.bincount(frame.faculty, minlength=size)
+    clashes = sessions - _occupied_cells(frame.faculty, frame.cell, size)
+    return [
+        {
+            "id": faculty_id,
+            "username": username,
+            "department_id": department_id,
+            "weekly_hours": round(float(hours[faculty_id]), 2),
+            "sessions": int(sessions[faculty_id]),
+            "double_booked_sessions": int(clashes[faculty_id]),
+        }
+        for faculty_id, username, department_id in faculty
+    ]
+
+
+def _cohorts():
+    """
+    Groups students with the same subject set, the unit that shares one
+    timetable (see core.grids).
+    """
+    subjects_by_student = {}
+    for student_id, subject_id in Student.subjects.through.objects.values_list('student_id', 'subject_id').iterator(chunk_size=5000):
+        subjects_by_student.setdefault(student_id, []).append(subject_id)
+    cohorts = {}
+    for student_id, subject_ids in subjects_by_student.items():
+        cohorts.setdefault(tuple(sorted(subject_ids)), []).append(student_id)
+    return cohorts
+
+
+def cohort_rollup(frame):
+    """
+    Idle periods per cohort: empty periods between a cohort's first and last
+    session of each day, computed over a cohort x day x period matrix.
+    """
+    cohorts = _cohorts()
+    days, periods = len(frame.days), len(frame.periods)
+    if not cohorts or not days or not periods:
+        return []
+
+    placed = frame.cell >= 0
+    subject_size = max([frame.subject.max(initial=0)] + [max(key) for key in cohorts]) + 1
+    subject_cells = np.zeros((subject_size, days * periods), dtype=bool)
+    subject_cells[frame.subject[placed], frame.cell[placed]] = True
+
+    # OR the subject rows of each cohort together in one reduceat over the concatenated subject lists
+    keys = list(cohorts)
+    members = np.fromiter((subject_id for key in keys for subject_id in key), dtype=np.int64)
+    offsets = np.cumsum([0] + [len(key) for key in keys[:-1]])
+    busy = np.logical_or.reduceat(subject_cells[members], offsets, axis=0).reshape(len(keys), days, periods)
+
+    sessions = busy.sum(axis=2)
+    first = busy.argmax(axis=2)
+    last = periods - 1 - busy[:, :, ::-1].argmax(axis=2)
+    gaps = np.where(sessions > 0, last - first + 1 - sessions, 0)
+
+    return sorted((
+        {
+            "subjects": list(key),
+            "students": len(cohorts[key]),
+            "busy_periods": int(sessions[index].sum()),
+            "idle_periods": int(gaps[index].sum()),
+            "idle_periods_by_day": dict(zip(frame.days, gaps[index].tolist())),
+        }
+        for index, key in enumerate(keys)
+    ), key=lambda cohort: (-cohort["idle_periods"], -cohort["students"]))
+
+
+def lab_rollup(frame, rooms):
+    labs = [room for room in rooms if room["room_type"] == 'lab']
+    practical = set(Subject.objects.filter(class_type='practical').values_list('id', flat=True))
+    is_practical = np.isin(frame.subject, list(practical))
+    lab_ids = np.array([room["id"] for room in labs], dtype=np.int64)
+    in_lab = np.isin(frame.room, lab_ids)
+    return {
+        "labs": labs,
+        "average_occupancy_percent": round(float(np.mean([room["occupancy_percent"] for room in labs])), 1) if labs else 0.0,
+        "practical_sessions": int(is_practical.sum()),
+        "practical_sessions_in_labs": int((is_practical & in_lab).sum()),
+        "non_practical_sessions_in_labs": int((~is_practical & in_lab).sum()),
+    }
+
+
+def department_rollup(frame):
+    departments = list(Department.objects.values_list('id', 'name'))
+    size = max([department[0] for department in departments] + frame.department.tolist() + [0]) + 1
+    sessions = np.bincount(frame.department, minlength=size)
+    hours = np.bincount(frame.department, weights=frame.hours, minlength=size)
+    unassigned_rooms = np.bincount(frame.department[frame.room == 0], minlength=size)
+    unassigned_faculty = np.bincount(frame.department[frame.faculty == 0], minlength=size)
+    return [
+        {
+            "id": department_id,
+            "name": name,
+            "sessions": int(sessions[department_id]),
+            "weekly_hours": round(float(hours[department_id]), 2),
+            "sessions_without_room": int(unassigned_rooms[department_id]),
+            "sessions_without_faculty": int(unassigned_faculty[department_id]),
+        }
+        for department_id, name in departments
+    ]
+
+
+def compute_rollups():
+    started = time.monotonic()
+    frame = TimetableFrame()
+    counts = list(Student.subjects.through.objects.values('subject_id').annotate(total=Count('id')).values_list('subject_id', 'total'))
+    size = max([subject_id for subject_id, _ in counts] + frame.subject.tolist() + [0]) + 1
+    enrolled = _lookup([subject_id for subject_id, _ in counts], [total for _, total in counts], size)
+
+    rooms = room_rollup(frame, enrolled)
+    faculty = faculty_rollup(frame)
+    cohorts = cohort_rollup(frame)
+    rollups = {
+        "rooms": rooms,
+        "faculty": faculty,
+        "cohorts": cohorts,
+        "labs": lab_rollup(frame, rooms),
+        "departments": department_rollup(frame),
+    }
+    rollups["summary"] = {
+        "entries": len(frame),
+        "periods_per_week": frame.period_count,
+        "average_room_occupancy_percent": round(float(np.mean([room["occupancy_percent"] for room in rooms])), 1) if rooms else 0.0,
+        "average_faculty_weekly_hours": round(float(np.mean([member["weekly_hours"] for member in faculty])), 2) if faculty else 0.0,
+        "total_idle_periods": sum(cohort["idle_periods"] * cohort["students"] for cohort in cohorts),
+        "sessions_without_room": int((frame.room == 0).sum()),
+        "sessions_without_faculty": int((frame.faculty == 0).sum()),
+    }
+    logger.info(f"Computed timetable analytics for {len(frame)} entries in {time.monotonic() - started:.3f}s.")
+    return rollups
+
+
+def analytics_cache_key():
+    versions = ":".join(format_version(get_version(scope)) for scope in VERSION_SCOPES)
+    return f"analytics:{versions}"
+
+
+def get_rollups():
+    """
+    Returns every rollup for the current versions of the timetable and the
+    data it depends on, computing them at most once per version.
+    """
+    key = analytics_cache_key()
+    rollups = cache.get(key)
+    if rollups is None:
+        rollups = compute_rollups()
+        cache.set(key, rollups, timeout=getattr(settings, 'TIMETABLE_GRID_CACHE_TIMEOUT', None))
+    return rollups
+
+
+def get_metric(metric):
+    return get_rollups()[metric]
@@ -0,0 +1,14 @@
+#analytics/metrics.py
+from core.models import Classroom, Faculty, Student, Subject
+from core.versioning import TIMETABLE_SCOPE, model_scope
+
+METRICS = ('summary', 'rooms', 'faculty', 'cohorts', 'labs', 'departments')
+
+# Rollups depend on the timetable plus the rooms, staff and enrollments it is read against
+VERSION_SCOPES = (
+    TIMETABLE_SCOPE,
+    model_scope(Classroom),
+    model_scope(Faculty),
+    model_scope(Student),
+    model_scope(Subject),
+)
@@ -0,0 +1,9 @@
+#analytics/urls.py
+from django.urls import path
+
+from .views import AnalyticsView
+
+urlpatterns = [
+    path('', AnalyticsView.as_view(), name='analytics-summary'),
+    path('<str:metric>/', AnalyticsView.as_view(), name='analytics-metric'),
+]
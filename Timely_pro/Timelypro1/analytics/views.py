@@ -1,3 +1,40 @@
-from django.shortcuts import render
+#analytics/views.py
+import logging
 
-# Create your views here.
+from rest_framework import status
+from rest_framework.authentication import BasicAuthentication, SessionAuthentication
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from analytics.metrics import METRICS, VERSION_SCOPES
+from core.conditional import ConditionalGetMixin
+from core.permissions import IsAdmin
+from users.authentication import HashedTokenAuthentication
+
+logger = logging.getLogger(__name__)
+
+
+class AnalyticsView(ConditionalGetMixin, APIView):
+    """
+    Utilization rollups of the current timetable: summary, rooms, faculty,
+    cohorts, labs or departments.
+    """
+    version_scopes = VERSION_SCOPES
+    permission_classes = [IsAuthenticated, IsAdmin]
+    authentication_classes = [HashedTokenAuthentication, SessionAuthentication, BasicAuthentication]
+
+    def get(self, request, metric='summary'):
+        if metric not in METRICS:
+            return Response({"message": f"Unknown metric. Use one of {', '.join(METRICS)}."}, status=status.HTTP_404_NOT_FOUND)
+        return self.conditional_response(request, self._metric_response, metric)
+
+    def _metric_response(self, request, metric):
+        # The engine (and numpy) is only loaded once analytics are actually requested
+        from analytics.engine import get_metric
+
+        try:
+            return Response(get_metric(metric))
+        except Exception as e:
+            logger.error(f"Error computing timetable analytics: {str(e)}", exc_info=True)
+            return Response({"message": "An error occurred while computing analytics."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
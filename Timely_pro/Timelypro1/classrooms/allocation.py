@@ -0,0 +1,170 @@
+#classrooms/allocation.py
+import logging
+import time
+from collections import defaultdict
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count
+
+from core.grids import DAY_ORDER
+from core.models import Classroom, Student, Subject, Timetable
+from core.versioning import bump_version, model_scope
+
+logger = logging.getLogger(__name__)
+
+# Room types each class type may use, most suitable first
+ROOM_TYPES_BY_CLASS_TYPE = {
+    'theory': ('lecture', 'seminar'),
+    'practical': ('lab',),
+    'seminar': ('seminar', 'lecture'),
+}
+BATCH_SIZE = 1000
+
+
+class RoomCompatibility:
+    """
+    Subject x room compatibility mask (capacity against enrollment, room type
+    against class type, assigned classroom) computed once with numpy, plus
+    every subject's compatible rooms ordered by preference: better room type
+    first, then fewest empty seats.
+    """
+
+    def __init__(self, subject_ids=None):
+        rooms = list(Classroom.objects.values_list('id', 'capacity', 'room_type'))
+        subjects = Subject.objects.values_list('id', 'class_type', 'assigned_classroom_id')
+        if subject_ids is not None:
+            subjects = subjects.filter(id__in=subject_ids)
+        subjects = list(subjects)
+        enrolled = dict(
+            Student.subjects.through.objects.values('subject_id').annotate(total=Count('id')).values_list('subject_id', 'total')
+        )
+
+        self.room_ids = np.array([room_id for room_id, _, _ in rooms], dtype=np.int64)
+        capacity = np.array([capacity for _, capacity, _ in rooms], dtype=np.int64)
+        room_types = [room_type for _, _, room_type in rooms]
+        size = np.array([enrolled.get(subject_id, 0) for subject_id, _, _ in subjects], dtype=np.int64)
+        assigned = np.array([assigned or 0 for _, _, assigned in subjects], dtype=np.int64)
+
+        # rank[s, r]: position of room r's type in subject s's preference list, -1 if not allowed
+        rank = np.full((len(subjects), len(rooms)), -1, dtype=np.int64)
+        for row, (_, class_type, _) in enumerate(subjects):
+            allowed = ROOM_TYPES_BY_CLASS_TYPE.get(class_type, ())
+            rank[row] = [allowed.index(room_type) if room_type in allowed else -1 for room_type in room_types]
+
+        fits = capacity[None, :] >= size[:, None]
+        pinned = (assigned[:, None] == 0) | (self.room_ids[None, :] == assigned[:, None])
+        self.mask = fits & pinned & (rank >= 0)
+
+        waste = capacity[None, :] - size[:, None]
+        order = np.lexsort((waste, rank), axis=1) if len(rooms) else np.zeros((len(subjects), 0), dtype=np.int64)
+        self.candidates = {
+            subject_id: [int(room) for room in order[row] if self.mask[row, room]]
+            for row, (subject_id, _, _) in enumerate(subjects)
+        }
+
+
+def _match(sessions, candidates, preferred, occupied=frozenset()):
+    """
+    Maximum bipartite matching of one period's sessions to the rooms not
+    already occupied with augmenting paths (Kuhn's algorithm). Sessions with
+    fewer options go first and every session tries its rooms in preference
+    order, so the result is maximum and close to the best fit. Returns
+    {session: room}.
+    """
+    options = {
+        session: [
+            room for room in ([preferred[session]] if preferred.get(session) in candidates[subject_id] else []) + candidates[subject_id]
+            if room not in occupied
+        ]
+        for session, subject_id in sessions
+    }
+    room_owner = {}
+
+    def augment(session, visited):
+        for room in options[session]:
+            if room in visited:
+                continue
+            visited.add(room)
+            if room not in room_owner or augment(room_owner[room], visited):
+                room_owner[room] = session
+                return True
+        return False
+
+    for session in sorted(options, key=lambda session: len(options[session])):
+        augment(session, set())
+    return {session: room for room, session in room_owner.items()}
+
+
+def _scoped_entries(department=None):
+    entries = Timetable.objects.all()
+    if department is not None:
+        entries = entries.filter(department_id=department)
+    return entries
+
+
+def allocate_rooms(save=True, department=None):
+    """
+    Assigns a classroom to every timetable entry, one bipartite matching per
+    time slot. A practical spanning consecutive slots keeps its room when it
+    can. With a department id only that department's entries are allocated,
+    around the rooms other departments hold in each slot. Returns a summary;
+    entries without a compatible free room are left unassigned.
+    """
+    started = time.monotonic()
+    entries = list(_scoped_entries(department).values_list('id', 'subject_id', 'time_slot_id', 'time_slot__day', 'time_slot__start_time', 'time_slot__end_time'))
+    compatibility = RoomCompatibility({subject_id for _, subject_id, _, _, _, _ in entries})
+    room_index = {int(room_id): index for index, room_id in enumerate(compatibility.room_ids)}
+    occupied = defaultdict(set)
+    if department is not None:
+        held = Timetable.objects.exclude(department_id=department).exclude(classroom=None)
+        for slot_id, room_id in held.values_list('time_slot_id', 'classroom_id'):
+            occupied[slot_id].add(room_index[room_id])
+
+    by_slot = defaultdict(list)
+    for entry_id, subject_id, slot_id, day, start, end in entries:
+        by_slot[(DAY_ORDER.index(day), start, end, slot_id)].append((entry_id, subject_id))
+
+    assignment = {}
+    previous = {}  # (subject_id, day) -> (end_time, room index) of its latest session
+    for day, start, end, slot_id in sorted(by_slot):
+        sessions = by_slot[(day, start, end, slot_id)]
+        preferred = {}
+        for entry_id, subject_id in sessions:
+            last = previous.get((subject_id, day))
+            if last and last[0] == start:
+                preferred[entry_id] = last[1]
+        matched = _match(sessions, compatibility.candidates, preferred, occupied.get(slot_id, frozenset()))
+        for entry_id, subject_id in sessions:
+            if entry_id in matched:
+                assignment[entry_id] = int(compatibility.room_ids[matched[entry_id]])
+                previous[(subject_id, day)] = (end, matched[entry_id])
+
+    if save:
+        save_allocation(assignment, department)
+
+    unassigned = [entry_id for entry_id, _, _, _, _, _ in entries if entry_id not in assignment]
+    summary = {
+        "status": "success" if not unassigned else "partial",
+        "message": "Rooms allocated successfully." if not unassigned else f"{len(unassigned)} sessions have no compatible free room.",
+        "entries": len(entries),
+        "assigned": len(assignment),
+        "unassigned": unassigned,
+        "seconds": round(time.monotonic() - started, 3),
+    }
+    logger.info(f"Allocated rooms to {len(assignment)} of {len(entries)} timetable entries in {summary['seconds']}s.")
+    return summary
+
+
+def save_allocation(assignment, department=None):
+    """
+    Stores {timetable_id: classroom_id}; every other entry (of the
+    department, when one is given) loses its room.
+    """
+    with transaction.atomic():
+        # Clear first so moving rooms between entries never trips unique_classroom_time_slot midway
+        _scoped_entries(department).exclude(classroom=None).update(classroom=None)
+        updates = [Timetable(id=entry_id, classroom_id=classroom_id) for entry_id, classroom_id in assignment.items()]
+        Timetable.objects.bulk_update(updates, ['classroom'], batch_size=BATCH_SIZE)
+    # bulk_update skips post_save
+    bump_version(model_scope(Timetable))
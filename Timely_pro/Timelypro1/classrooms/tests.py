@@ -1,3 +1,105 @@
-from django.test import TestCase
+from datetime import time
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase
+
+from classrooms.allocation import RoomCompatibility, _match, allocate_rooms
+from core.models import Classroom, Degree, Department, Student, Subject, TimeSlot, Timetable
+from users.models import CustomUser
+
+
+class MatchTests(SimpleTestCase):
+    def test_augmenting_path_seats_every_session(self):
+        # Greedy seats 1 in room 0 and 2 in room 1; session 3 only fits once 2 moves to room 2
+        sessions = [(1, 'a'), (2, 'b'), (3, 'c')]
+        candidates = {'a': [0, 1], 'b': [1, 2], 'c': [1, 0]}
+        self.assertEqual(_match(sessions, candidates, {}), {1: 0, 2: 2, 3: 1})
+
+    def test_occupied_rooms_are_skipped(self):
+        self.assertEqual(_match([(1, 'a')], {'a': [0, 1]}, {}, occupied={0}), {1: 1})
+
+    def test_previous_room_is_preferred(self):
+        self.assertEqual(_match([(1, 'a')], {'a': [0, 1]}, {1: 1}), {1: 1})
+
+    def test_sessions_without_a_room_stay_unmatched(self):
+        matched = _match([(1, 'a'), (2, 'a')], {'a': [0]}, {})
+        self.assertEqual(list(matched.values()), [0])
+
+
+class RoomCompatibilityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='CSE', degree=Degree.objects.create(name='BTech'))
+        cls.small = Classroom.objects.create(room_number='L1', capacity=2)
+        cls.lecture = Classroom.objects.create(room_number='L2', capacity=4)
+        cls.seminar = Classroom.objects.create(room_number='S1', capacity=3, room_type='seminar')
+        cls.lab = Classroom.objects.create(room_number='P1', capacity=10, room_type='lab')
+        cls.theory = Subject.objects.create(name='Algorithms', code='CS201', department=department, hours_per_week=3)
+        cls.practical = Subject.objects.create(
+            name='Algorithms Lab', code='CS201P', department=department, hours_per_week=2, class_type='practical',
+        )
+        for i in range(3):
+            student = Student.objects.create(user=CustomUser.objects.create(username=f'student{i}'), department=department, year=2)
+            student.subjects.add(cls.theory, cls.practical)
+
+    def rooms(self, compatibility, subject):
+        return [int(compatibility.room_ids[room]) for room in compatibility.candidates[subject.id]]
+
+    def test_candidates_fit_and_are_ordered_by_type_then_waste(self):
+        compatibility = RoomCompatibility()
+        self.assertEqual(self.rooms(compatibility, self.theory), [self.lecture.id, self.seminar.id])
+        self.assertEqual(self.rooms(compatibility, self.practical), [self.lab.id])
+
+    def test_assigned_classroom_is_the_only_candidate(self):
+        Subject.objects.filter(pk=self.theory.pk).update(assigned_classroom=self.seminar)
+        self.assertEqual(self.rooms(RoomCompatibility(), self.theory), [self.seminar.id])
+
+    def test_sessions_of_a_slot_get_distinct_rooms(self):
+        department = self.theory.department
+        other = Subject.objects.create(name='Networks', code='CS202', department=department, hours_per_week=3)
+        for student in Student.objects.all():
+            student.subjects.add(other)
+        slot = TimeSlot.objects.create(day='Monday', start_time=time(9), end_time=time(10))
+        for subject in (self.theory, other, self.practical):
+            Timetable.objects.create(department=department, subject=subject, time_slot=slot)
+
+        result = allocate_rooms()
+        self.assertEqual(result['unassigned'], [])
+        rooms = dict(Timetable.objects.values_list('subject_id', 'classroom_id'))
+        self.assertEqual({rooms[self.theory.id], rooms[other.id]}, {self.lecture.id, self.seminar.id})
+        self.assertEqual(rooms[self.practical.id], self.lab.id)
+
+
+class DepartmentAllocationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        degree = Degree.objects.create(name='BTech')
+        cls.cse = Department.objects.create(name='CSE', degree=degree)
+        cls.ece = Department.objects.create(name='ECE', degree=degree)
+        cls.slot = TimeSlot.objects.create(day='Monday', start_time=time(9), end_time=time(10))
+        cls.small = Classroom.objects.create(room_number='R1', capacity=40)
+        cls.large = Classroom.objects.create(room_number='R2', capacity=60)
+        cls.cse_subject = Subject.objects.create(name='Algorithms', code='CS201', department=cls.cse, hours_per_week=3)
+        cls.ece_subject = Subject.objects.create(name='Signals', code='EC201', department=cls.ece, hours_per_week=3)
+
+    def setUp(self):
+        self.cse_entry = Timetable.objects.create(department=self.cse, subject=self.cse_subject, time_slot=self.slot)
+        self.ece_entry = Timetable.objects.create(
+            department=self.ece, subject=self.ece_subject, time_slot=self.slot, classroom=self.small,
+        )
+
+    def test_keeps_other_departments_rooms(self):
+        result = allocate_rooms(department=self.cse.id)
+        self.assertEqual(result['entries'], 1)
+        self.assertEqual(result['unassigned'], [])
+        self.cse_entry.refresh_from_db()
+        self.ece_entry.refresh_from_db()
+        self.assertEqual(self.cse_entry.classroom, self.large)
+        self.assertEqual(self.ece_entry.classroom, self.small)
+
+    def test_room_held_by_another_department_is_not_reused(self):
+        Timetable.objects.filter(pk=self.ece_entry.pk).update(classroom=self.large)
+        Classroom.objects.filter(pk=self.small.pk).update(room_type='lab')
+        result = allocate_rooms(department=self.cse.id)
+        self.assertEqual(result['unassigned'], [self.cse_entry.id])
+        self.ece_entry.refresh_from_db()
+        self.assertEqual(self.ece_entry.classroom, self.large)
@@ -0,0 +1,8 @@
+#classrooms/urls.py
+from django.urls import path
+
+from .views import RoomAllocationView
+
+urlpatterns = [
+    path('allocate/', RoomAllocationView.as_view(), name='room-allocation'),
+]
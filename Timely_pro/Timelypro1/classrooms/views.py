@@ -1,3 +1,37 @@
-from django.shortcuts import render
+#classrooms/views.py
+import logging
 
-# Create your views here.
+from rest_framework import status
+from rest_framework.authentication import BasicAuthentication, SessionAuthentication
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.permissions import IsAdmin
+from core.publish import capture_timetable, publish_timetable
+from core.routers import use_primary
+from users.authentication import HashedTokenAuthentication
+
+logger = logging.getLogger(__name__)
+
+
+class RoomAllocationView(APIView):
+    """
+    POST re-allocates the rooms of the current timetable and publishes it.
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+    authentication_classes = [HashedTokenAuthentication, SessionAuthentication, BasicAuthentication]
+
+    @use_primary()
+    def post(self, request):
+        # Matching needs numpy, which is only loaded once an allocation actually runs
+        from classrooms.allocation import allocate_rooms
+
+        try:
+            previous_version, previous_rows = capture_timetable()
+            result = allocate_rooms()
+            publish_timetable(previous_rows, metadata={"stage": "room_allocation"}, previous_version=previous_version)
+        except Exception as e:
+            logger.error(f"Error allocating rooms: {str(e)}", exc_info=True)
+            return Response({"message": "An error occurred during room allocation."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response(result)
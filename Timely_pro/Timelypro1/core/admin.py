@@ -3,9 +3,10 @@
 from django.contrib import admin
 from .models import (
     Degree, Department, Subject, Faculty, Classroom,
-    TimeSlot, Timetable, Notification, Student, AuditLog
+    TimeSlot, Timetable, TimetableSnapshot, Notification, Student, AuditLog
 )
 from core.timeslot_utils import split_time_slot_into_hourly_slots, generate_practical_pairs
+from core.validation import validate_timetable
 
 # Register models to appear in the Django admin site
 
@@ -64,6 +65,20 @@ class TimetableAdmin(admin.ModelAdmin):
     list_display = ('department', 'faculty', 'subject', 'classroom', 'get_day', 'get_start_time', 'get_end_time')
     search_fields = ('department__name', 'faculty__user__username', 'subject__name')
     list_filter = ('department', 'time_slot__day')
+    actions = ['validate_whole_timetable']
+
+    @admin.action(description='Validate the whole timetable')
+    def validate_whole_timetable(self, request, queryset):
+        # The selection only triggers the action; conflicts span the whole timetable
+        report = validate_timetable()
+        if report['valid']:
+            self.message_user(request, f"All {report['entries']} timetable entries satisfy the constraints.", level='success')
+            return
+        for constraint, violations in report['violations'].items():
+            if violations:
+                entries = sorted({entry for violation in violations for entry in violation.get('entries', [])})
+                details = f" (entries {', '.join(map(str, entries[:20]))})" if entries else ""
+                self.message_user(request, f"{constraint}: {len(violations)} violation(s){details}", level='error')
 
     def get_day(self, obj):
         return obj.time_slot.day
@@ -77,6 +92,13 @@ class TimetableAdmin(admin.ModelAdmin):
         return obj.time_slot.end_time
     get_end_time.short_description = 'End Time'
 
+@admin.register(TimetableSnapshot)
+class TimetableSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('created', 'source', 'row_count', 'fitness')
+    list_filter = ('source',)
+    exclude = ('data',)
+    readonly_fields = ('created', 'source', 'version', 'fitness', 'row_count', 'metadata')
+
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
     list_display = ('user', 'message', 'notification_type', 'timestamp', 'is_read')
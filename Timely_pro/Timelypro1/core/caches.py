@@ -0,0 +1,25 @@
+#core/caches.py
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def is_process_local(alias):
+    """
+    True when a cache alias is private to the process, so that writes and
+    deletes made by other workers never reach it.
+    """
+    return isinstance(caches[alias], (LocMemCache, DummyCache))
+
+
+def bounded_timeout(alias, timeout):
+    """
+    Caps the lifetime of entries invalidated by signals when the alias is
+    process-local: invalidations made by other workers never reach it, so
+    only expiry bounds how long they serve stale data.
+    """
+    if not is_process_local(alias):
+        return timeout
+    limit = getattr(settings, 'LOCAL_CACHE_MAX_TIMEOUT', 5)
+    return limit if timeout is None else min(timeout, limit)
@@ -0,0 +1,114 @@
+#core/clashes.py
+import logging
+from collections import Counter, defaultdict
+from itertools import combinations
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core.models import Student, SubjectClash
+from core.versioning import bump_version, format_version, get_version, model_scope
+
+logger = logging.getLogger(__name__)
+
+CLASH_SCOPE = model_scope(SubjectClash)
+BATCH_SIZE = 1000
+
+
+def pair(first, second):
+    return (first, second) if first < second else (second, first)
+
+
+def shared_enrollment_counts(enrollments):
+    """
+    Counts the students shared by every pair of subjects from (student_id,
+    subject_id) rows.
+    """
+    subjects_by_student = defaultdict(set)
+    for student_id, subject_id in enrollments:
+        subjects_by_student[student_id].add(subject_id)
+    shared = Counter()
+    for subject_ids in subjects_by_student.values():
+        shared.update(combinations(sorted(subject_ids), 2))
+    return shared
+
+
+def rebuild_subject_clashes():
+    """
+    Recomputes the whole matrix from Student.subjects, e.g. after enrollments
+    were bulk inserted without m2m_changed.
+    """
+    enrollments = Student.subjects.through.objects.values_list('student_id', 'subject_id').iterator(chunk_size=10000)
+    shared = shared_enrollment_counts(enrollments)
+    with transaction.atomic():
+        SubjectClash.objects.all().delete()
+        SubjectClash.objects.bulk_create([
+            SubjectClash(first_subject_id=first, second_subject_id=second, shared_students=count)
+            for (first, second), count in shared.items()
+        ], batch_size=BATCH_SIZE)
+    bump_version(CLASH_SCOPE)
+    logger.info(f"Rebuilt subject clash matrix with {len(shared)} pairs.")
+    return len(shared)
+
+
+def apply_clash_changes(changes):
+    """
+    Adds the given {(first, second): delta} changes to the stored counts and
+    drops the pairs that no longer share a student.
+    """
+    changes = {key: delta for key, delta in changes.items() if delta}
+    if not changes:
+        return
+    with transaction.atomic():
+        existing = {
+            (clash.first_subject_id, clash.second_subject_id): clash
+            for clash in SubjectClash.objects.select_for_update().filter(
+                first_subject_id__in={first for first, _ in changes},
+                second_subject_id__in={second for _, second in changes},
+            )
+        }
+        updated, created, emptied = [], [], []
+        for (first, second), delta in changes.items():
+            clash = existing.get((first, second))
+            if clash is None:
+                if delta > 0:
+                    created.append(SubjectClash(first_subject_id=first, second_subject_id=second, shared_students=delta))
+                continue
+            clash.shared_students = max(clash.shared_students + delta, 0)
+            (updated if clash.shared_students else emptied).append(clash)
+        SubjectClash.objects.bulk_create(created, batch_size=BATCH_SIZE)
+        SubjectClash.objects.bulk_update(updated, ['shared_students'], batch_size=BATCH_SIZE)
+        SubjectClash.objects.filter(id__in=[clash.id for clash in emptied]).delete()
+    bump_version(CLASH_SCOPE)
+
+
+def enrollment_changes(subject_ids, other_subject_ids, delta):
+    """
+    Pairs formed by the subject_ids a student gained (or lost) with each other
+    and with the subjects they otherwise take, each changed by delta.
+    """
+    changes = Counter()
+    subject_ids = set(subject_ids)
+    for subject_id in subject_ids:
+        for other in set(other_subject_ids) - subject_ids:
+            changes[pair(subject_id, other)] += delta
+    for first, second in combinations(sorted(subject_ids), 2):
+        changes[(first, second)] += delta
+    return changes
+
+
+def load_subject_clashes():
+    """
+    Returns the matrix as {(first_subject_id, second_subject_id): shared}
+    with first < second, cached until the next change.
+    """
+    key = f"subject_clashes:{format_version(get_version(CLASH_SCOPE))}"
+    clashes = cache.get(key)
+    if clashes is None:
+        clashes = {
+            (first, second): shared
+            for first, second, shared in SubjectClash.objects.values_list('first_subject_id', 'second_subject_id', 'shared_students')
+        }
+        cache.set(key, clashes, timeout=getattr(settings, 'TIMETABLE_GRID_CACHE_TIMEOUT', None))
+    return clashes
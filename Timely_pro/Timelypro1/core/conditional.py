@@ -0,0 +1,53 @@
+#core/conditional.py
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from core.versioning import format_version, get_version, model_scope
+
+
+class ConditionalGetMixin:
+    """
+    Adds ETag and Last-Modified headers to read requests of a viewset, derived
+    from the version tokens of the models its responses depend on. A request
+    whose validators still match is answered with 304 before the queryset is
+    evaluated.
+    """
+    version_models = ()
+    version_scopes = ()
+
+    def get_version_scopes(self):
+        return [*self.version_scopes, *(model_scope(model) for model in self.version_models)]
+
+    def get_validators(self, request):
+        versions = [get_version(scope) for scope in self.get_version_scopes()]
+        key = "|".join([
+            request.get_full_path(),
+            request.META.get('HTTP_ACCEPT', ''),
+            str(request.user.pk),
+            *(format_version(version) for version in versions),
+        ])
+        etag = quote_etag(hashlib.md5(key.encode()).hexdigest())
+        last_modified = http_date(int(max(versions))) if versions else None
+        return etag, last_modified
+
+    def conditional_response(self, request, handler, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return handler(request, *args, **kwargs)
+
+        etag, last_modified = self.get_validators(request)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response.headers.setdefault('ETag', etag)
+            if last_modified:
+                response.headers.setdefault('Last-Modified', last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().retrieve, *args, **kwargs)
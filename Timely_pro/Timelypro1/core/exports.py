@@ -0,0 +1,95 @@
+#core/exports.py
+import csv
+import logging
+import re
+
+from django.db.models import Case, IntegerField, When
+
+from core.grids import DAY_ORDER
+from core.models import Timetable
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ('csv', 'xlsx')
+EXPORT_HEADER = ['Department', 'Day', 'Start', 'End', 'Subject Code', 'Subject', 'Type', 'Faculty', 'Classroom']
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """
+    File-like object that hands back what is written to it, so csv.writer can
+    produce one line at a time for a streaming response.
+    """
+    def write(self, value):
+        return value
+
+
+def timetable_export_queryset(department=None, faculty=None):
+    day_order = Case(
+        *(When(time_slot__day=day, then=index) for index, day in enumerate(DAY_ORDER)),
+        output_field=IntegerField(),
+    )
+    queryset = Timetable.objects.select_related(
+        'department', 'subject', 'faculty__user', 'classroom', 'time_slot'
+    ).annotate(day_order=day_order).order_by('department__name', 'department_id', 'day_order', 'time_slot__start_time')
+    if department is not None:
+        queryset = queryset.filter(department_id=department)
+    if faculty is not None:
+        queryset = queryset.filter(faculty_id=faculty)
+    return queryset
+
+
+def export_row(entry):
+    return [
+        entry.department.name,
+        entry.time_slot.day,
+        entry.time_slot.start_time.strftime('%H:%M'),
+        entry.time_slot.end_time.strftime('%H:%M'),
+        entry.subject.code,
+        entry.subject.name,
+        entry.subject.class_type,
+        entry.faculty.user.username if entry.faculty else '',
+        entry.classroom.room_number if entry.classroom else '',
+    ]
+
+
+def iter_timetable_entries(queryset):
+    return queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def iter_export_rows(queryset):
+    """
+    Yields the header followed by one row per timetable entry, reading the
+    queryset in chunks so memory stays constant.
+    """
+    yield EXPORT_HEADER
+    for entry in iter_timetable_entries(queryset):
+        yield export_row(entry)
+
+
+def stream_csv(rows):
+    writer = csv.writer(Echo())
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def new_xlsx_workbook():
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    return workbook, workbook.create_sheet('Timetable')
+
+
+def write_xlsx(rows, target):
+    """
+    Writes rows to an XLSX file using openpyxl's write-only mode, which flushes
+    rows to disk instead of keeping the sheet in memory.
+    """
+    workbook, sheet = new_xlsx_workbook()
+    for row in rows:
+        sheet.append(row)
+    workbook.save(target)
+
+
+def safe_filename(value):
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', str(value)).strip('_') or 'unnamed'
@@ -0,0 +1,208 @@
+#core/grids.py
+import hashlib
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.models import Classroom, Department, Faculty, Student, TimeSlot, Timetable
+from core.versioning import format_version, get_version
+
+logger = logging.getLogger(__name__)
+
+GRID_KINDS = ('department', 'faculty', 'classroom', 'student')
+DAY_ORDER = [day for day, _ in TimeSlot.DAY_CHOICES]
+WARM_BATCH_SIZE = 500
+
+
+def _grid_timeout():
+    return getattr(settings, 'TIMETABLE_GRID_CACHE_TIMEOUT', None)
+
+
+def grid_cache_key(kind, entity_id, version):
+    return f"timetable_grid:{format_version(version)}:{kind}:{entity_id}"
+
+
+def _cohort_cache_key(cohort, version):
+    return f"timetable_grid:{format_version(version)}:cohort:{cohort}"
+
+
+def _cohort_hash(subject_ids):
+    joined = ",".join(str(subject_id) for subject_id in sorted(subject_ids))
+    return hashlib.md5(joined.encode()).hexdigest()
+
+
+def _timetable_entries():
+    return Timetable.objects.select_related('subject', 'faculty__user', 'classroom', 'time_slot')
+
+
+def get_grid_layout():
+    """
+    Returns the days and periods (start, end) that make up the rows and columns
+    of every grid, derived from the split time slots used by the generator.
+    """
+    slots = TimeSlot.objects.filter(is_original=False).values_list('day', 'start_time', 'end_time')
+    days_present = {day for day, _, _ in slots}
+    days = [day for day in DAY_ORDER if day in days_present]
+    periods = sorted({(start, end) for _, start, end in slots})
+    return days, periods
+
+
+def _cell(entry):
+    return {
+        "subject": entry.subject.code,
+        "subject_name": entry.subject.name,
+        "department_id": entry.department_id,
+        "faculty": entry.faculty.user.username if entry.faculty else None,
+        "classroom": entry.classroom.room_number if entry.classroom else None,
+    }
+
+
+def build_grid(entries, days, periods):
+    """
+    Builds a day x period matrix where each cell holds the list of sessions
+    taking place in that period.
+    """
+    day_index = {day: i for i, day in enumerate(days)}
+    period_index = {period: i for i, period in enumerate(periods)}
+    grid = [[[] for _ in periods] for _ in days]
+
+    for entry in entries:
+        slot = entry.time_slot
+        row = day_index.get(slot.day)
+        column = period_index.get((slot.start_time, slot.end_time))
+        if row is None or column is None:
+            logger.warning(f"Timetable entry {entry.id} does not fit the grid layout.")
+            continue
+        grid[row][column].append(_cell(entry))
+
+    return {
+        "days": days,
+        "periods": [{"start": start.strftime('%H:%M'), "end": end.strftime('%H:%M')} for start, end in periods],
+        "grid": grid,
+    }
+
+
+def _with_identity(grid, kind, entity_id, version):
+    return dict(grid, kind=kind, id=entity_id, version=format_version(version))
+
+
+def _entity_exists(kind, entity_id):
+    model = {
+        'department': Department,
+        'faculty': Faculty,
+        'classroom': Classroom,
+        'student': Student,
+    }[kind]
+    return model.objects.filter(id=entity_id).exists()
+
+
+def _student_subject_ids(student_id):
+    return set(
+        Student.subjects.through.objects.filter(student_id=student_id).values_list('subject_id', flat=True)
+    )
+
+
+def _compute_grid(kind, entity_id, version):
+    days, periods = get_grid_layout()
+    entries = _timetable_entries()
+    if kind == 'student':
+        subject_ids = _student_subject_ids(entity_id)
+        entries = entries.filter(subject_id__in=subject_ids)
+        grid = build_grid(entries, days, periods)
+        cohort = _cohort_hash(subject_ids)
+        cache.set_many({
+            _cohort_cache_key(cohort, version): grid,
+            grid_cache_key(kind, entity_id, version): cohort,
+        }, timeout=_grid_timeout())
+        return grid
+
+    grid = build_grid(entries.filter(**{f"{kind}_id": entity_id}), days, periods)
+    cache.set(grid_cache_key(kind, entity_id, version), grid, timeout=_grid_timeout())
+    return grid
+
+
+def get_grid(kind, entity_id):
+    """
+    Returns the grid of a department, faculty, classroom or student for the
+    current timetable version. Falls back to the database only on a cache miss.
+    Returns None if the entity does not exist.
+    """
+    if kind not in GRID_KINDS:
+        raise ValueError(f"Unknown grid kind: {kind}")
+
+    version = get_version()
+    cached = cache.get(grid_cache_key(kind, entity_id, version))
+    if kind == 'student' and cached is not None:
+        cached = cache.get(_cohort_cache_key(cached, version))
+    if cached is not None:
+        return _with_identity(cached, kind, entity_id, version)
+
+    if not _entity_exists(kind, entity_id):
+        return None
+    logger.info(f"Grid cache miss for {kind} {entity_id}, building from the database.")
+    return _with_identity(_compute_grid(kind, entity_id, version), kind, entity_id, version)
+
+
+def invalidate_student_grid(student_id):
+    cache.delete(grid_cache_key('student', student_id, get_version()))
+
+
+def _set_in_batches(values):
+    items = list(values.items())
+    for start in range(0, len(items), WARM_BATCH_SIZE):
+        cache.set_many(dict(items[start:start + WARM_BATCH_SIZE]), timeout=_grid_timeout())
+
+
+def warm_timetable_grids(version=None):
+    """
+    Materializes the grids of every department, faculty, classroom and student
+    from a single pass over the timetable and stores them in the cache.
+    Students sharing the same subjects share a single cached grid.
+    """
+    if version is None:
+        version = get_version()
+
+    days, periods = get_grid_layout()
+    by_kind = {kind: defaultdict(list) for kind in ('department', 'faculty', 'classroom')}
+    by_subject = defaultdict(list)
+    for entry in _timetable_entries():
+        by_kind['department'][entry.department_id].append(entry)
+        if entry.faculty_id:
+            by_kind['faculty'][entry.faculty_id].append(entry)
+        if entry.classroom_id:
+            by_kind['classroom'][entry.classroom_id].append(entry)
+        by_subject[entry.subject_id].append(entry)
+
+    entity_ids = {
+        'department': Department.objects.values_list('id', flat=True),
+        'faculty': Faculty.objects.values_list('id', flat=True),
+        'classroom': Classroom.objects.values_list('id', flat=True),
+    }
+    values = {}
+    for kind, ids in entity_ids.items():
+        for entity_id in ids:
+            values[grid_cache_key(kind, entity_id, version)] = build_grid(
+                by_kind[kind].get(entity_id, []), days, periods
+            )
+
+    student_subjects = {student_id: set() for student_id in Student.objects.values_list('id', flat=True)}
+    for student_id, subject_id in Student.subjects.through.objects.values_list('student_id', 'subject_id'):
+        student_subjects[student_id].add(subject_id)
+
+    cohorts = {}
+    for student_id, subject_ids in student_subjects.items():
+        cohort = _cohort_hash(subject_ids)
+        if cohort not in cohorts:
+            entries = [entry for subject_id in subject_ids for entry in by_subject.get(subject_id, [])]
+            cohorts[cohort] = build_grid(entries, days, periods)
+            values[_cohort_cache_key(cohort, version)] = cohorts[cohort]
+        values[grid_cache_key('student', student_id, version)] = cohort
+
+    _set_in_batches(values)
+    logger.info(
+        f"Warmed {len(values)} timetable grid entries "
+        f"({len(student_subjects)} students in {len(cohorts)} cohorts)."
+    )
+    return len(values)
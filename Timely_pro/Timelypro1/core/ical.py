@@ -0,0 +1,183 @@
+#core/ical.py
+import logging
+from datetime import date, datetime, timedelta, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.grids import DAY_ORDER, get_grid
+from core.versioning import format_version, get_version
+
+logger = logging.getLogger(__name__)
+
+PRODID = '-//Schedulify//Timetable//EN'
+
+
+def _term_date(name):
+    value = getattr(settings, name, None)
+    if value is None or isinstance(value, date):
+        return value
+    return date.fromisoformat(value)
+
+
+def get_term():
+    """
+    Returns (start, end, exceptions) of the current term from settings.
+    Without a configured start the recurrence starts this week.
+    """
+    start = _term_date('TERM_START_DATE')
+    if start is None:
+        today = date.today()
+        start = today - timedelta(days=today.weekday())
+    end = _term_date('TERM_END_DATE')
+    exceptions = [
+        value if isinstance(value, date) else date.fromisoformat(value)
+        for value in getattr(settings, 'TERM_EXCEPTION_DATES', [])
+    ]
+    return start, end, exceptions
+
+
+def _escape(text):
+    return (
+        str(text).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+    )
+
+
+def _fold(line):
+    """
+    Folds a content line at 75 octets as required by RFC 5545.
+    """
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line
+    parts = []
+    while encoded:
+        limit = 75 if not parts else 74
+        chunk = encoded[:limit]
+        # Never split a multi-byte character
+        while chunk and (encoded[len(chunk):len(chunk) + 1] or b'\x00')[0] & 0xC0 == 0x80:
+            chunk = chunk[:-1]
+        parts.append(chunk.decode('utf-8'))
+        encoded = encoded[len(chunk):]
+    return '\r\n '.join(parts)
+
+
+def _first_occurrence(start, day):
+    weekday = DAY_ORDER.index(day)
+    return start + timedelta(days=(weekday - start.weekday()) % 7)
+
+
+def _local(day_date, hhmm):
+    return datetime.combine(day_date, datetime.strptime(hhmm, '%H:%M').time()).strftime('%Y%m%dT%H%M%S')
+
+
+def iter_sessions(grid):
+    """
+    Yields (day, start, end, cell) for every session of a grid, merging
+    back-to-back periods of the same subject (practical pairs) into one.
+    """
+    periods = grid['periods']
+    for day, row in zip(grid['days'], grid['grid']):
+        open_sessions = {}
+        for index, cells in enumerate(row):
+            current = {}
+            for cell in cells:
+                key = (cell['subject'], cell['faculty'], cell['classroom'])
+                if key in current:
+                    yield day, periods[index]['start'], periods[index]['end'], cell
+                    continue
+                session = open_sessions.pop(key, None)
+                if session and session['end'] == periods[index]['start']:
+                    session['end'] = periods[index]['end']
+                else:
+                    if session:
+                        yield day, session['start'], session['end'], session['cell']
+                    session = {'start': periods[index]['start'], 'end': periods[index]['end'], 'cell': cell}
+                current[key] = session
+            for session in open_sessions.values():
+                yield day, session['start'], session['end'], session['cell']
+            open_sessions = current
+        for session in open_sessions.values():
+            yield day, session['start'], session['end'], session['cell']
+
+
+def build_calendar(grid, kind, entity_id, version, term=None):
+    """
+    Renders a grid as an iCalendar feed with one weekly recurring event per
+    session. Dated occurrences are never expanded: the recurrence is bounded
+    by the term and only exceptions falling on an event's weekday are listed.
+    """
+    start, end, exceptions = term or get_term()
+    exceptions_by_day = {}
+    for exception in exceptions:
+        exceptions_by_day.setdefault(DAY_ORDER[exception.weekday()], []).append(exception)
+
+    tzid = settings.TIME_ZONE
+    stamp = datetime.fromtimestamp(version, tz=timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    until = f";UNTIL={end.strftime('%Y%m%d')}T235959Z" if end else ''
+
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODID}',
+        'CALSCALE:GREGORIAN',
+        f'X-WR-CALNAME:{_escape(f"Timetable {kind} {entity_id}")}',
+    ]
+    for day, session_start, session_end, cell in iter_sessions(grid):
+        first = _first_occurrence(start, day)
+        if end and first > end:
+            continue
+        location = cell['classroom'] or ''
+        description = f"Faculty: {cell['faculty']}" if cell['faculty'] else ''
+        lines += [
+            'BEGIN:VEVENT',
+            f"UID:{kind}-{entity_id}-{cell['subject']}-{day}-{session_start.replace(':', '')}-{location}@schedulify",
+            f'DTSTAMP:{stamp}',
+            f'DTSTART;TZID={tzid}:{_local(first, session_start)}',
+            f'DTEND;TZID={tzid}:{_local(first, session_end)}',
+            f'RRULE:FREQ=WEEKLY{until}',
+            f"SUMMARY:{_escape(cell['subject_name'])} ({_escape(cell['subject'])})",
+        ]
+        skipped = [
+            exception for exception in exceptions_by_day.get(day, [])
+            if exception >= first and (end is None or exception <= end)
+        ]
+        if skipped:
+            lines.append(
+                f'EXDATE;TZID={tzid}:' + ','.join(_local(exception, session_start) for exception in skipped)
+            )
+        if location:
+            lines.append(f'LOCATION:{_escape(location)}')
+        if description:
+            lines.append(f'DESCRIPTION:{_escape(description)}')
+        lines.append('END:VEVENT')
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(_fold(line) for line in lines) + '\r\n'
+
+
+def calendar_cache_key(kind, entity_id, version):
+    return f"ical:{format_version(version)}:{kind}:{entity_id}"
+
+
+def invalidate_student_calendar(student_id):
+    cache.delete(calendar_cache_key('student', student_id, get_version()))
+
+
+def get_calendar(kind, entity_id):
+    """
+    Returns the iCalendar feed of an entity, cached until the timetable
+    version changes. Returns None if the entity does not exist.
+    """
+    version = get_version()
+    key = calendar_cache_key(kind, entity_id, version)
+    body = cache.get(key)
+    if body is not None:
+        return body
+
+    grid = get_grid(kind, entity_id)
+    if grid is None:
+        return None
+    body = build_calendar(grid, kind, entity_id, version)
+    cache.set(key, body, timeout=getattr(settings, 'TIMETABLE_GRID_CACHE_TIMEOUT', None))
+    logger.info(f"Built iCalendar feed for {kind} {entity_id}.")
+    return body
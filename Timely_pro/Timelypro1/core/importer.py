@@ -0,0 +1,338 @@
+#core/importer.py
+import logging
+import re
+from datetime import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from core.models import Classroom, Degree, Department, Faculty, Subject, TimeSlot
+from core.timeslot_utils import generate_practical_pairs
+from core.versioning import TIMETABLE_SCOPE, bump_version, model_scope
+from users.models import CustomUser, Role
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+# Hours below this value in "H:MM" ranges are afternoon hours ("1:30-2:30")
+AFTERNOON_HOUR_CUTOFF = 8
+SUBJECT_TYPES = {
+    'theory': 'theory',
+    'lab': 'practical',
+    'practical': 'practical',
+    'seminar': 'seminar',
+}
+ROOM_TYPES = {choice for choice, _ in Classroom.ROOM_TYPE_CHOICES}
+DAY_NAMES = [day for day, _ in TimeSlot.DAY_CHOICES]
+TIME_RANGE_PATTERN = re.compile(r'^\s*(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*$')
+
+
+def _parse_hour(hour, minute):
+    hour = int(hour)
+    if hour < AFTERNOON_HOUR_CUTOFF:
+        hour += 12
+    return time(hour, int(minute))
+
+
+def parse_time_range(value):
+    """
+    Parses "9:30-10:30" or "13:30-14:30" into a (start, end) pair of times.
+    """
+    match = TIME_RANGE_PATTERN.match(str(value))
+    if not match:
+        raise ValueError(f"'{value}' is not a time range like 9:30-10:30")
+    start = _parse_hour(match.group(1), match.group(2))
+    end = _parse_hour(match.group(3), match.group(4))
+    if start >= end:
+        raise ValueError(f"'{value}' starts after it ends")
+    return start, end
+
+
+def parse_day(value):
+    """
+    Resolves "Mon", "monday" or "Monday" to a TimeSlot day choice.
+    """
+    text = str(value).strip().lower()
+    for day in DAY_NAMES:
+        if len(text) >= 3 and day.lower().startswith(text):
+            return day
+    raise ValueError(f"'{value}' is not a day of the week")
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def validate_institution_config(config):
+    """
+    Validates an institution config in memory in a single pass and resolves
+    every reference by natural key (degree and department names, room numbers,
+    subject codes, faculty usernames) against the config and the rows already
+    in the database. Returns (plan, errors).
+    """
+    errors = []
+    if not isinstance(config, dict):
+        return None, ["The config must be a JSON object."]
+
+    existing_degrees = {name: id for id, name in Degree.objects.values_list('id', 'name')}
+    existing_departments = {name: id for id, name in Department.objects.values_list('id', 'name')}
+    existing_rooms = {number: (id, room_type) for id, number, room_type in Classroom.objects.values_list('id', 'room_number', 'room_type')}
+    existing_subjects = {code: id for id, code in Subject.objects.values_list('id', 'code')}
+    existing_users = {username: id for id, username in CustomUser.objects.values_list('id', 'username')}
+    existing_faculty = {username: id for id, username in Faculty.objects.values_list('id', 'user__username')}
+    existing_slots = set(TimeSlot.objects.filter(is_original=False).values_list('day', 'start_time', 'end_time'))
+
+    plan = {
+        'degrees': [],
+        'departments': [],
+        'rooms': [],
+        'faculty': [],
+        'subjects': [],
+        'time_slots': [],
+        'teaching': [],
+    }
+
+    degrees = set(existing_degrees)
+    for index, name in enumerate(_as_list(config.get('degrees'))):
+        if not isinstance(name, str) or not name.strip():
+            errors.append(f"degrees[{index}]: a degree must be a non-empty name.")
+        elif name not in degrees:
+            degrees.add(name)
+            plan['degrees'].append(name)
+
+    departments = set(existing_departments)
+    for index, item in enumerate(_as_list(config.get('departments'))):
+        path = f"departments[{index}]"
+        if not isinstance(item, dict) or not item.get('name'):
+            errors.append(f"{path}: a department needs a name.")
+            continue
+        if item['name'] in departments:
+            continue
+        degree = item.get('degree')
+        if degree not in degrees:
+            errors.append(f"{path}.degree: unknown degree '{degree}'.")
+            continue
+        departments.add(item['name'])
+        plan['departments'].append({'name': item['name'], 'degree': degree})
+
+    rooms = {number: room_type for number, (_, room_type) in existing_rooms.items()}
+    for index, item in enumerate(_as_list(config.get('rooms'))):
+        path = f"rooms[{index}]"
+        if not isinstance(item, dict) or not item.get('room_number'):
+            errors.append(f"{path}: a room needs a room_number.")
+            continue
+        number = str(item['room_number'])
+        if number in rooms:
+            continue
+        room_type = item.get('room_type', 'lecture')
+        capacity = item.get('capacity')
+        if room_type not in ROOM_TYPES:
+            errors.append(f"{path}.room_type: must be one of {', '.join(sorted(ROOM_TYPES))}.")
+        elif not isinstance(capacity, int) or capacity <= 0:
+            errors.append(f"{path}.capacity: capacity must be a positive integer.")
+        elif len(number) > Classroom._meta.get_field('room_number').max_length:
+            errors.append(f"{path}.room_number: '{number}' is too long.")
+        else:
+            rooms[number] = room_type
+            plan['rooms'].append({
+                'room_number': number,
+                'capacity': capacity,
+                'room_type': room_type,
+                'facilities': item.get('facilities', ''),
+                'room_title': item.get('room_title') or f"{number} ({room_type})",
+            })
+
+    default_department = config.get('department')
+    faculty = set(existing_faculty)
+    for index, item in enumerate(_as_list(config.get('faculty'))):
+        path = f"faculty[{index}]"
+        if isinstance(item, str):
+            item = {'username': item}
+        if not isinstance(item, dict) or not item.get('username'):
+            errors.append(f"{path}: a faculty member needs a username.")
+            continue
+        username = item['username']
+        if username in faculty:
+            continue
+        department = item.get('department', default_department)
+        if department not in departments:
+            errors.append(f"{path}.department: unknown department '{department}'.")
+        elif username in existing_users:
+            errors.append(f"{path}.username: user '{username}' exists but is not a faculty member.")
+        else:
+            faculty.add(username)
+            plan['faculty'].append({
+                'username': username,
+                'department': department,
+                'first_name': item.get('first_name', ''),
+                'last_name': item.get('last_name', ''),
+                'email': item.get('email', ''),
+            })
+
+    max_hours = getattr(settings, 'MAX_HOURS_PER_WEEK_PER_SUBJECT', None)
+    subjects = set(existing_subjects)
+    for index, item in enumerate(_as_list(config.get('subjects'))):
+        path = f"subjects[{index}]"
+        if not isinstance(item, dict) or not item.get('name'):
+            errors.append(f"{path}: a subject needs a name.")
+            continue
+        code = str(item.get('code', item['name']))
+        class_type = SUBJECT_TYPES.get(str(item.get('type', 'theory')).lower())
+        hours = item.get('hours_per_week')
+        room = item.get('room')
+        department = item.get('department', default_department)
+        teachers = _as_list(item.get('teacher', item.get('teachers')))
+        subject_errors = []
+
+        if code in subjects and code not in existing_subjects:
+            subject_errors.append(f"{path}.code: duplicate subject code '{code}'.")
+        if len(code) > Subject._meta.get_field('code').max_length:
+            subject_errors.append(f"{path}.code: '{code}' is too long.")
+        if class_type is None:
+            subject_errors.append(f"{path}.type: must be one of {', '.join(SUBJECT_TYPES)}.")
+        if not isinstance(hours, int) or hours <= 0:
+            subject_errors.append(f"{path}.hours_per_week: must be a positive integer.")
+        elif max_hours and hours > max_hours:
+            subject_errors.append(f"{path}.hours_per_week: cannot be more than {max_hours}.")
+        elif class_type == 'practical' and hours % 2 != 0:
+            subject_errors.append(f"{path}.hours_per_week: practical subjects need an even number of hours.")
+        if room is not None and str(room) not in rooms:
+            subject_errors.append(f"{path}.room: unknown room '{room}'.")
+        if class_type == 'practical' and room is None:
+            subject_errors.append(f"{path}.room: practical subjects need an assigned room.")
+        if department not in departments:
+            subject_errors.append(f"{path}.department: unknown department '{department}'.")
+        for teacher in teachers:
+            if teacher not in faculty:
+                subject_errors.append(f"{path}.teacher: unknown faculty member '{teacher}'.")
+
+        if subject_errors:
+            errors.extend(subject_errors)
+            continue
+        for teacher in teachers:
+            plan['teaching'].append((teacher, code))
+        if code in subjects:
+            continue
+        subjects.add(code)
+        plan['subjects'].append({
+            'name': item.get('title', item['name']),
+            'code': code,
+            'department': department,
+            'hours_per_week': hours,
+            'class_type': class_type,
+            'room': str(room) if room is not None else None,
+        })
+
+    days = []
+    for index, value in enumerate(_as_list(config.get('days'))):
+        try:
+            days.append(parse_day(value))
+        except ValueError as e:
+            errors.append(f"days[{index}]: {e}.")
+    periods = []
+    for index, value in enumerate(_as_list(config.get('time_slots'))):
+        try:
+            periods.append(parse_time_range(value))
+        except ValueError as e:
+            errors.append(f"time_slots[{index}]: {e}.")
+    for day in dict.fromkeys(days):
+        for start, end in dict.fromkeys(periods):
+            if (day, start, end) not in existing_slots:
+                plan['time_slots'].append((day, start, end))
+
+    return plan, errors
+
+
+def _bulk_create(model, objects, **kwargs):
+    created = model.objects.bulk_create(objects, batch_size=BATCH_SIZE, **kwargs)
+    if created:
+        bump_version(model_scope(model))
+    return created
+
+
+def _apply_plan(plan):
+    _bulk_create(Degree, [Degree(name=name) for name in plan['degrees']])
+    degrees = {name: id for id, name in Degree.objects.values_list('id', 'name')}
+
+    _bulk_create(Department, [
+        Department(name=item['name'], degree_id=degrees[item['degree']]) for item in plan['departments']
+    ])
+    departments = {name: id for id, name in Department.objects.values_list('id', 'name')}
+
+    _bulk_create(Classroom, [Classroom(**item) for item in plan['rooms']])
+    rooms = {number: id for id, number in Classroom.objects.values_list('id', 'room_number')}
+
+    unusable_password = make_password(None)
+    _bulk_create(CustomUser, [
+        CustomUser(
+            username=item['username'],
+            first_name=item['first_name'],
+            last_name=item['last_name'],
+            email=item['email'],
+            password=unusable_password,
+        )
+        for item in plan['faculty']
+    ])
+    usernames = [item['username'] for item in plan['faculty']]
+    users = dict(CustomUser.objects.filter(username__in=usernames).values_list('username', 'id'))
+    if users:
+        faculty_role, _ = Role.objects.get_or_create(name='Faculty')
+        _bulk_create(CustomUser.roles.through, [
+            CustomUser.roles.through(customuser_id=user_id, role_id=faculty_role.id) for user_id in users.values()
+        ])
+        bump_version(model_scope(CustomUser))
+    _bulk_create(Faculty, [
+        Faculty(user_id=users[item['username']], department_id=departments[item['department']])
+        for item in plan['faculty']
+    ])
+
+    _bulk_create(Subject, [
+        Subject(
+            name=item['name'],
+            code=item['code'],
+            department_id=departments[item['department']],
+            hours_per_week=item['hours_per_week'],
+            class_type=item['class_type'],
+            assigned_classroom_id=rooms.get(item['room']),
+        )
+        for item in plan['subjects']
+    ])
+
+    if plan['teaching']:
+        faculty = dict(Faculty.objects.values_list('user__username', 'id'))
+        subjects = dict(Subject.objects.filter(code__in={code for _, code in plan['teaching']}).values_list('code', 'id'))
+        Faculty.subjects.through.objects.bulk_create([
+            Faculty.subjects.through(faculty_id=faculty[teacher], subject_id=subjects[code])
+            for teacher, code in plan['teaching']
+        ], batch_size=BATCH_SIZE, ignore_conflicts=True)
+        bump_version(model_scope(Faculty))
+
+    if plan['time_slots']:
+        _bulk_create(TimeSlot, [
+            TimeSlot(day=day, start_time=start, end_time=end, is_split=True, is_original=False)
+            for day, start, end in plan['time_slots']
+        ], ignore_conflicts=True)
+        for day in dict.fromkeys(day for day, _, _ in plan['time_slots']):
+            generate_practical_pairs(day)
+        bump_version(TIMETABLE_SCOPE)
+
+
+def import_institution(config, dry_run=False):
+    """
+    Validates an institution config and, if it is valid, creates every new
+    degree, department, room, faculty member, subject and time slot with
+    batched bulk_create inside a single transaction.
+    """
+    plan, errors = validate_institution_config(config)
+    if errors:
+        return {"status": "error", "message": "The institution config is invalid.", "errors": errors}
+
+    created = {name: len(items) for name, items in plan.items()}
+    if not dry_run:
+        with transaction.atomic():
+            _apply_plan(plan)
+        logger.info(f"Imported institution config: {created}")
+    return {"status": "success", "message": "Institution imported successfully.", "created": created}
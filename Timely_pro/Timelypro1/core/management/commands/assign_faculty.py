@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from core.publish import capture_timetable, publish_timetable
+from core.staffing import assign_faculty
+
+
+class Command(BaseCommand):
+    help = "Assigns qualified, load-balanced faculty to every subject of the timetable."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Compute the assignment without saving it.")
+        parser.add_argument('--department', type=int, help="Only this department's entries.")
+
+    def handle(self, *args, **options):
+        previous_version, previous_rows = capture_timetable()
+        result = assign_faculty(save=not options['dry_run'], department=options['department'])
+        if not options['dry_run']:
+            publish_timetable(previous_rows, metadata={"stage": "faculty_assignment"}, previous_version=previous_version)
+        style = self.style.SUCCESS if result['status'] == 'success' else self.style.WARNING
+        self.stdout.write(style(str(result)))
@@ -0,0 +1,56 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Runs in a fresh interpreter, the way a web worker boots
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import django
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+booted = time.perf_counter()
+from django.test import Client
+response = Client(HTTP_HOST=sys.argv[2]).get(sys.argv[1])
+finished = time.perf_counter()
+print(json.dumps({
+    "boot": booted - started,
+    "first_request": finished - booted,
+    "status": response.status_code,
+    "modules": [name for name in sys.argv[3].split(",") if name in sys.modules],
+}))
+"""
+HEAVY_MODULES = ('deap', 'rich', 'numpy', 'core.utils')
+
+
+class Command(BaseCommand):
+    help = "Measures worker boot time and first request latency in fresh interpreters, and which heavy modules they load."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument('--path', default='/', help="Path of the first request.")
+
+    def handle(self, *args, **options):
+        host = next((host for host in settings.ALLOWED_HOSTS if host != '*' and not host.startswith('.')), 'localhost')
+        results = []
+        for _ in range(options['runs']):
+            output = subprocess.run(
+                [sys.executable, '-c', PROBE, options['path'], host, ",".join(HEAVY_MODULES)],
+                capture_output=True, text=True, check=True, env=os.environ.copy(),
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+        boot = statistics.median(result["boot"] for result in results)
+        first_request = statistics.median(result["first_request"] for result in results)
+        self.stdout.write(f"Worker boot:          {boot * 1000:.1f} ms (median of {len(results)})")
+        self.stdout.write(f"First request {options['path']}: {first_request * 1000:.1f} ms (HTTP {results[-1]['status']})")
+        loaded = results[-1]["modules"]
+        if loaded:
+            self.stdout.write(self.style.WARNING(f"Loaded at startup: {', '.join(loaded)}"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"None of {', '.join(HEAVY_MODULES)} loaded at startup."))
@@ -0,0 +1,117 @@
+import csv
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from core.exports import (
+    EXPORT_FORMATS, EXPORT_HEADER, export_row, iter_timetable_entries,
+    new_xlsx_workbook, safe_filename, timetable_export_queryset
+)
+
+
+class CsvSink:
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(EXPORT_HEADER)
+
+    def write(self, row):
+        self.writer.writerow(row)
+
+    def close(self):
+        self.file.close()
+
+
+class XlsxSink:
+    def __init__(self, path):
+        self.path = path
+        self.workbook, self.sheet = new_xlsx_workbook()
+        self.sheet.append(EXPORT_HEADER)
+
+    def write(self, row):
+        self.sheet.append(row)
+
+    def close(self):
+        self.workbook.save(self.path)
+
+
+class GroupedSinks:
+    """
+    Writes rows ordered by a group key into one file per group, named by
+    name_for(entry), keeping only the current group's file open.
+    """
+
+    def __init__(self, sink_class, directory, file_type, name_for):
+        self.sink_class = sink_class
+        self.directory = directory
+        self.file_type = file_type
+        self.name_for = name_for
+        self.sink, self.key = None, None
+        self.groups = 0
+
+    def write(self, key, entry, row):
+        if key != self.key:
+            self.close()
+            self.key = key
+            self.sink = self.sink_class(self.directory / f"{safe_filename(self.name_for(entry))}.{self.file_type}")
+            self.groups += 1
+        self.sink.write(row)
+
+    def close(self):
+        if self.sink:
+            self.sink.close()
+            self.sink = None
+
+
+class Command(BaseCommand):
+    help = (
+        "Exports the whole timetable plus one file per department and per faculty, "
+        "writing one department or faculty file at a time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('output_dir', help="Directory the export files are written to.")
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv', dest='file_type')
+
+    def handle(self, *args, **options):
+        file_type = options['file_type']
+        sink_class = CsvSink if file_type == 'csv' else XlsxSink
+        output_dir = Path(options['output_dir'])
+        (output_dir / 'departments').mkdir(parents=True, exist_ok=True)
+        (output_dir / 'faculties').mkdir(parents=True, exist_ok=True)
+
+        everything = sink_class(output_dir / f"timetable.{file_type}")
+        departments = GroupedSinks(
+            sink_class, output_dir / 'departments', file_type,
+            lambda entry: f"{entry.department.name}-{entry.department_id}",
+        )
+        faculties = GroupedSinks(
+            sink_class, output_dir / 'faculties', file_type,
+            lambda entry: f"{entry.faculty.user.username}-{entry.faculty_id}",
+        )
+        rows = 0
+
+        try:
+            # Entries are ordered by department, so the department files are written in the same pass
+            for entry in iter_timetable_entries(timetable_export_queryset()):
+                row = export_row(entry)
+                everything.write(row)
+                departments.write(entry.department_id, entry, row)
+                rows += 1
+        finally:
+            everything.close()
+            departments.close()
+
+        # A second pass ordered by faculty writes their files one at a time
+        by_faculty = timetable_export_queryset().exclude(faculty=None).order_by(
+            'faculty_id', 'department__name', 'department_id', 'day_order', 'time_slot__start_time'
+        )
+        try:
+            for entry in iter_timetable_entries(by_faculty):
+                faculties.write(entry.faculty_id, entry, export_row(entry))
+        finally:
+            faculties.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Exported {rows} timetable entries for {faculties.groups} faculty members to {output_dir}."
+        ))
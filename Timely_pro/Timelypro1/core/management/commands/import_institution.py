@@ -0,0 +1,30 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importer import import_institution
+
+
+class Command(BaseCommand):
+    help = "Imports degrees, departments, rooms, faculty, subjects and time slots from a JSON config."
+
+    def add_arguments(self, parser):
+        parser.add_argument('config', help="Path to the JSON institution config.")
+        parser.add_argument('--dry-run', action='store_true', help="Only validate the config.")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['config'], encoding='utf-8') as config_file:
+                config = json.load(config_file)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not read {options['config']}: {e}")
+
+        result = import_institution(config, dry_run=options['dry_run'])
+        if result['status'] != 'success':
+            for error in result['errors']:
+                self.stderr.write(error)
+            raise CommandError(result['message'])
+
+        for name, count in result['created'].items():
+            self.stdout.write(f"{name}: {count}")
+        self.stdout.write(self.style.SUCCESS(result['message'] if not options['dry_run'] else "The config is valid."))
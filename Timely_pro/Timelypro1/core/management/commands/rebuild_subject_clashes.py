@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.clashes import rebuild_subject_clashes
+
+
+class Command(BaseCommand):
+    help = "Recomputes the subject x subject shared-enrollment matrix from the student enrollments."
+
+    def handle(self, *args, **options):
+        count = rebuild_subject_clashes()
+        self.stdout.write(self.style.SUCCESS(f"Stored {count} subject pairs with shared students."))
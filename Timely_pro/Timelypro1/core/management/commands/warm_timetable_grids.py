@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.grids import warm_timetable_grids
+
+
+class Command(BaseCommand):
+    help = "Materializes the timetable grids of every department, faculty, classroom and student into the cache."
+
+    def handle(self, *args, **options):
+        count = warm_timetable_grids()
+        self.stdout.write(self.style.SUCCESS(f"Warmed {count} timetable grid cache entries."))
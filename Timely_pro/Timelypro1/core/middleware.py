@@ -0,0 +1,30 @@
+#core/middleware.py
+from django.conf import settings
+
+from core.routers import pin_to_primary, reset_pinning
+
+PIN_COOKIE = 'use_primary'
+UNSAFE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+
+class PrimaryPinningMiddleware:
+    """
+    Keeps a client's reads on the primary database for
+    DATABASE_STICKY_SECONDS after it wrote, so it sees its own changes even
+    if the replicas lag behind.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        reset_pinning()
+        if request.method in UNSAFE_METHODS or request.COOKIES.get(PIN_COOKIE):
+            pin_to_primary()
+
+        response = self.get_response(request)
+
+        if request.method in UNSAFE_METHODS:
+            response.set_cookie(PIN_COOKIE, '1', max_age=getattr(settings, 'DATABASE_STICKY_SECONDS', 5), httponly=True)
+        reset_pinning()
+        return response
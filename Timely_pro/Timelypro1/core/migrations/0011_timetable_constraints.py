@@ -0,0 +1,72 @@
+# Generated by Django 5.1.3 on 2026-10-19 08:56
+
+from django.db import migrations, models
+
+
+def deduplicate_rows(apps, schema_editor):
+    """
+    Removes the duplicates the new constraints would reject. Duplicate split
+    slots are merged into the oldest one, duplicate practical pairs are
+    deleted, and double-booked faculty or classrooms are unassigned from all
+    but the oldest timetable entry so that no session is lost.
+    """
+    TimeSlot = apps.get_model('core', 'TimeSlot')
+    PracticalPair = apps.get_model('core', 'PracticalPair')
+    Timetable = apps.get_model('core', 'Timetable')
+
+    kept_slots, merged_slots = {}, {}
+    for slot_id, day, start, end in TimeSlot.objects.filter(is_original=False).order_by('id').values_list('id', 'day', 'start_time', 'end_time'):
+        kept = kept_slots.setdefault((day, start, end), slot_id)
+        if kept != slot_id:
+            merged_slots[slot_id] = kept
+    for duplicate, kept in merged_slots.items():
+        Timetable.objects.filter(time_slot_id=duplicate).update(time_slot_id=kept)
+        PracticalPair.objects.filter(first_slot_id=duplicate).update(first_slot_id=kept)
+        PracticalPair.objects.filter(second_slot_id=duplicate).update(second_slot_id=kept)
+    TimeSlot.objects.filter(id__in=merged_slots).delete()
+
+    seen_pairs, duplicate_pairs = set(), []
+    for pair_id, first, second in PracticalPair.objects.order_by('id').values_list('id', 'first_slot_id', 'second_slot_id'):
+        if (first, second) in seen_pairs:
+            duplicate_pairs.append(pair_id)
+        seen_pairs.add((first, second))
+    PracticalPair.objects.filter(id__in=duplicate_pairs).delete()
+
+    for field in ('faculty_id', 'classroom_id'):
+        seen, duplicates = set(), []
+        for entry_id, owner, slot in Timetable.objects.exclude(**{field: None}).order_by('id').values_list('id', field, 'time_slot_id'):
+            if (owner, slot) in seen:
+                duplicates.append(entry_id)
+            seen.add((owner, slot))
+        Timetable.objects.filter(id__in=duplicates).update(**{field: None})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_alter_timetable_classroom'),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicate_rows, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='timeslot',
+            index=models.Index(fields=['day', 'start_time'], name='timeslot_day_start_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='practicalpair',
+            constraint=models.UniqueConstraint(fields=('first_slot', 'second_slot'), name='unique_practical_pair'),
+        ),
+        migrations.AddConstraint(
+            model_name='timeslot',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_original', False)), fields=('day', 'start_time', 'end_time'), name='unique_split_time_slot', violation_error_message='A split time slot with this day and time range already exists.'),
+        ),
+        migrations.AddConstraint(
+            model_name='timetable',
+            constraint=models.UniqueConstraint(condition=models.Q(('faculty__isnull', False)), fields=('faculty', 'time_slot'), name='unique_faculty_time_slot', violation_error_message='Faculty is already assigned during this time.'),
+        ),
+        migrations.AddConstraint(
+            model_name='timetable',
+            constraint=models.UniqueConstraint(condition=models.Q(('classroom__isnull', False)), fields=('classroom', 'time_slot'), name='unique_classroom_time_slot', violation_error_message='Classroom is already booked during this time.'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.3 on 2026-10-19 08:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_timetable_constraints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimetableSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('source', models.CharField(choices=[('generation', 'Generation'), ('restore', 'Restore')], default='generation', max_length=20)),
+                ('version', models.FloatField()),
+                ('fitness', models.FloatField(blank=True, null=True)),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('metadata', models.JSONField(blank=True, default=dict)),
+                ('data', models.BinaryField()),
+            ],
+            options={
+                'ordering': ['-created'],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.3 on 2026-10-19 09:05
+
+import django.db.models.deletion
+from collections import Counter, defaultdict
+from itertools import combinations
+
+from django.db import migrations, models
+
+
+def build_subject_clashes(apps, schema_editor):
+    Student = apps.get_model('core', 'Student')
+    SubjectClash = apps.get_model('core', 'SubjectClash')
+    subjects_by_student = defaultdict(set)
+    for student_id, subject_id in Student.subjects.through.objects.values_list('student_id', 'subject_id').iterator():
+        subjects_by_student[student_id].add(subject_id)
+    shared = Counter()
+    for subject_ids in subjects_by_student.values():
+        shared.update(combinations(sorted(subject_ids), 2))
+    SubjectClash.objects.bulk_create([
+        SubjectClash(first_subject_id=first, second_subject_id=second, shared_students=count)
+        for (first, second), count in shared.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_timetablesnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubjectClash',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shared_students', models.PositiveIntegerField(default=0)),
+                ('first_subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.subject')),
+                ('second_subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.subject')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('first_subject', 'second_subject'), name='unique_subject_clash'), models.CheckConstraint(condition=models.Q(('first_subject__lt', models.F('second_subject'))), name='subject_clash_ordered')],
+            },
+        ),
+        migrations.RunPython(build_subject_clashes, migrations.RunPython.noop),
+    ]
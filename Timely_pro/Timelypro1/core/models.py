@@ -109,9 +109,12 @@ class Student(models.Model):
     year = models.PositiveIntegerField()
 
     def clean(self):
-        for subject in self.subjects.all():
-            if subject.department != self.department:
-                raise ValidationError(f"Subject {subject.name} is not offered by the student's department.")
+        # core.validation imports the models, so it can only be imported here
+        from core.validation import enrollment_department_violations
+
+        violations = enrollment_department_violations(self)
+        if violations:
+            raise ValidationError([violation["message"] for violation in violations])
 
     def __str__(self):
         return self.user.username
@@ -133,6 +136,20 @@ class TimeSlot(models.Model):
     is_split = models.BooleanField(default=False)
     is_original = models.BooleanField(default=True)
 
+    class Meta:
+        constraints = [
+            # Originals may share a range with their own one-hour split child
+            models.UniqueConstraint(
+                fields=['day', 'start_time', 'end_time'],
+                condition=models.Q(is_original=False),
+                name='unique_split_time_slot',
+                violation_error_message='A split time slot with this day and time range already exists.',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['day', 'start_time'], name='timeslot_day_start_idx'),
+        ]
+
     @property
     def total_duration(self):
         delta = datetime.combine(date.min, self.end_time) - datetime.combine(date.min, self.start_time)
@@ -150,6 +167,11 @@ class PracticalPair(models.Model):
     first_slot = models.ForeignKey(TimeSlot, on_delete=models.CASCADE, related_name='first_pair')
     second_slot = models.ForeignKey(TimeSlot, on_delete=models.CASCADE, related_name='second_pair')
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['first_slot', 'second_slot'], name='unique_practical_pair'),
+        ]
+
     def __str__(self):
         return f"{self.first_slot.day}: {self.first_slot.start_time} - {self.second_slot.end_time}"
 
@@ -161,25 +183,76 @@ class Timetable(models.Model):
     classroom = models.ForeignKey(Classroom, on_delete=models.CASCADE,blank=True,null=True)
     time_slot = models.ForeignKey(TimeSlot, on_delete=models.CASCADE)
 
+    class Meta:
+        # Double-bookings are rejected by the database; full_clean() reports
+        # them through validate_constraints()
+        constraints = [
+            models.UniqueConstraint(
+                fields=['faculty', 'time_slot'],
+                condition=models.Q(faculty__isnull=False),
+                name='unique_faculty_time_slot',
+                violation_error_message='Faculty is already assigned during this time.',
+            ),
+            models.UniqueConstraint(
+                fields=['classroom', 'time_slot'],
+                condition=models.Q(classroom__isnull=False),
+                name='unique_classroom_time_slot',
+                violation_error_message='Classroom is already booked during this time.',
+            ),
+        ]
+
     def clean(self):
-        if self.time_slot.is_original:
-            raise ValidationError("Cannot use original time slots in a timetable. Use split slots only.")
+        # Same checks as the bulk validator; core.validation imports the models, so it can only be imported here
+        from core.validation import Entry, entry_errors
 
-        conflicting_faculty = Timetable.objects.filter(faculty=self.faculty, time_slot=self.time_slot).exclude(id=self.id)
-        if conflicting_faculty.exists():
-            raise ValidationError(f'Faculty {self.faculty} is already assigned during this time.')
+        errors = entry_errors(Entry(
+            self.id, self.department_id, self.subject_id, self.faculty_id, self.classroom_id, self.time_slot_id,
+        ))
+        if errors:
+            raise ValidationError(errors)
 
-        conflicting_classroom = Timetable.objects.filter(classroom=self.classroom, time_slot=self.time_slot).exclude(id=self.id)
-        if conflicting_classroom.exists():
-            raise ValidationError(f'Classroom {self.classroom} is already booked during this time.')
+    def __str__(self):
+        return f"{self.department} - {self.subject} ({self.time_slot.start_time} - {self.time_slot.end_time})"
 
-        if self.subject:
-            enrolled_students = self.subject.students.count()
-            if self.classroom.capacity < enrolled_students:
-                raise ValidationError(f'Classroom capacity is insufficient for the assigned subject.')
+# SubjectClash Model
+class SubjectClash(models.Model):
+    """
+    Number of students enrolled in both subjects, stored once per pair with
+    first_subject_id < second_subject_id. Maintained by core/clashes.py.
+    """
+    first_subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='+')
+    second_subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='+')
+    shared_students = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['first_subject', 'second_subject'], name='unique_subject_clash'),
+            models.CheckConstraint(condition=models.Q(first_subject__lt=models.F('second_subject')), name='subject_clash_ordered'),
+        ]
 
     def __str__(self):
-        return f"{self.department} - {self.subject} ({self.time_slot.start_time} - {self.time_slot.end_time})"
+        return f"{self.first_subject_id} x {self.second_subject_id}: {self.shared_students} students"
+
+# TimetableSnapshot Model
+class TimetableSnapshot(models.Model):
+    SOURCE_CHOICES = [
+        ('generation', 'Generation'),
+        ('restore', 'Restore'),
+    ]
+    created = models.DateTimeField(auto_now_add=True)
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES, default='generation')
+    version = models.FloatField()
+    fitness = models.FloatField(null=True, blank=True)
+    row_count = models.PositiveIntegerField(default=0)
+    metadata = models.JSONField(default=dict, blank=True)
+    # zlib compressed (subject, time_slot, classroom, faculty) id quadruples, see core/snapshots.py
+    data = models.BinaryField()
+
+    class Meta:
+        ordering = ['-created']
+
+    def __str__(self):
+        return f"{self.get_source_display()} snapshot of {self.created} ({self.row_count} entries)"
 
 # Notification Model
 class Notification(models.Model):
@@ -1,14 +1,16 @@
 #core/permissions.py
 from rest_framework.permissions import BasePermission
 
+from users.roles import get_user_roles
+
 class IsAdmin(BasePermission):
     def has_permission(self, request, view):
-        return request.user.is_authenticated and request.user.roles.filter(name='Admin').exists()
+        return 'Admin' in get_user_roles(request.user)
 
 class IsFaculty(BasePermission):
     def has_permission(self, request, view):
-        return request.user.is_authenticated and request.user.roles.filter(name='Faculty').exists()
+        return 'Faculty' in get_user_roles(request.user)
 
 class IsStudent(BasePermission):
     def has_permission(self, request, view):
-        return request.user.is_authenticated and request.user.roles.filter(name='Student').exists()
+        return 'Student' in get_user_roles(request.user)
@@ -0,0 +1,109 @@
+#core/progress.py
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.db import connections
+
+from notifications.pubsub import publish
+
+logger = logging.getLogger(__name__)
+
+MAX_TRACKED_RUNS = 20
+
+_runs = OrderedDict()
+_runs_lock = threading.Lock()
+
+
+def run_channel(run_id):
+    return f"generation:{run_id}"
+
+
+class GenerationRun:
+    """
+    Progress of one timetable generation. The GA loop reports into it and it
+    forwards every event to the run's pub/sub channel; cancel() asks the loop
+    to stop at the end of the current generation.
+    """
+
+    def __init__(self, total_generations=None):
+        self.id = uuid.uuid4().hex
+        self.total_generations = total_generations
+        self.status = 'running'
+        self.latest = None
+        self.started = time.monotonic()
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _publish(self, event):
+        self.latest = dict(event, run_id=self.id, status=self.status)
+        publish(run_channel(self.id), self.latest)
+
+    def report(self, generation, best, mean, conflicts):
+        elapsed = time.monotonic() - self.started
+        remaining = (self.total_generations or generation) - generation
+        self._publish({
+            "type": "progress",
+            "generation": generation,
+            "total_generations": self.total_generations,
+            "best_fitness": best,
+            "mean_fitness": mean,
+            "conflicts": conflicts,
+            "elapsed_seconds": round(elapsed, 2),
+            "eta_seconds": round(elapsed / generation * remaining, 2) if generation else None,
+        })
+
+    def finish(self, result):
+        self.status = 'cancelled' if self.cancelled else result.get('status', 'error')
+        self._publish({"type": "finished", "message": result.get('message')})
+
+
+def start_run(total_generations=None):
+    run = GenerationRun(total_generations)
+    with _runs_lock:
+        _runs[run.id] = run
+        while len(_runs) > MAX_TRACKED_RUNS:
+            _runs.popitem(last=False)
+    return run
+
+
+def get_run(run_id):
+    with _runs_lock:
+        return _runs.get(run_id)
+
+
+def run_generation(run, generate):
+    """
+    Runs generate(run=run) and always reports the outcome to the run.
+    """
+    try:
+        result = generate(run=run)
+    except Exception as e:
+        logger.error(f"Error in generation run {run.id}: {e}", exc_info=True)
+        result = {"status": "error", "message": "An error occurred during timetable generation."}
+    run.finish(result)
+    return result
+
+
+def start_background_generation(generate, total_generations=None):
+    """
+    Starts generate(run=...) in a worker thread and returns its run right away.
+    """
+    run = start_run(total_generations)
+
+    def target():
+        try:
+            run_generation(run, generate)
+        finally:
+            connections.close_all()
+
+    threading.Thread(target=target, name=f"generation-{run.id}", daemon=True).start()
+    return run
@@ -0,0 +1,107 @@
+#core/publish.py
+import logging
+
+from django.conf import settings
+from django.db import transaction
+
+from core.grids import warm_timetable_grids
+from core.models import Classroom, Faculty, Subject, TimeSlot, Timetable
+from core.snapshots import snapshot_rows, take_snapshot
+from core.versioning import TIMETABLE_SCOPE, bump_version, format_version, get_version, model_scope
+from notifications.fanout import notify_timetable_changes
+from notifications.pubsub import BROADCAST_CHANNEL, publish
+from reports.rendering import start_background_build
+from schedule.compiler import refresh_schedules
+
+logger = logging.getLogger(__name__)
+
+
+def capture_timetable_rows():
+    """
+    Returns the current timetable as (subject_id, time_slot_id, classroom_id,
+    faculty_id) tuples, the compact form used to compare timetables.
+    """
+    return list(Timetable.objects.values_list('subject_id', 'time_slot_id', 'classroom_id', 'faculty_id'))
+
+
+def capture_timetable():
+    """
+    Returns the current timetable version together with its rows. Taken
+    before a replace, it tells publish_timetable which version the previous
+    rows belong to, since every saved or deleted entry moves the version.
+    """
+    return get_version(TIMETABLE_SCOPE), capture_timetable_rows()
+
+
+def publish_timetable(previous_rows=None, source='generation', fitness=None, metadata=None, previous_version=None):
+    """
+    Publishes a freshly generated timetable: moves the timetable to a new
+    version, stores a snapshot of it, materializes the derived read models for
+    it in bulk (recompiling personal schedules only for the users whose
+    sessions changed) and, when the previous timetable is given, notifies
+    the users whose sessions changed. previous_version is the version the
+    previous rows were captured at (see capture_timetable).
+    """
+    if previous_version is None:
+        previous_version = get_version(TIMETABLE_SCOPE)
+    version = bump_version(TIMETABLE_SCOPE)
+    logger.info(f"Publishing timetable version {version}.")
+    current_rows = capture_timetable_rows()
+    take_snapshot(current_rows, version, source=source, fitness=fitness, metadata=metadata)
+    warm_timetable_grids(version)
+    refresh_schedules(previous_rows, current_rows, previous_version, version)
+    try:
+        # The analytics engine pulls in numpy, which workers only need once a timetable is published
+        from analytics.engine import get_rollups
+
+        get_rollups()
+    except Exception as e:
+        logger.error(f"Error warming timetable analytics: {e}", exc_info=True)
+    for file_format in getattr(settings, 'REPORT_PREBUILD_FORMATS', ()):
+        start_background_build(file_format=file_format)
+    if previous_rows is not None:
+        notify_timetable_changes(previous_rows, current_rows)
+    publish(BROADCAST_CHANNEL, {"type": "timetable_version", "version": format_version(version)})
+    return version
+
+
+def restore_snapshot(snapshot, batch_size=1000):
+    """
+    Replaces the timetable with the rows of a snapshot in one bulk write and
+    publishes it. Rows whose subject or time slot no longer exists are
+    skipped; rooms and faculty that were deleted since are left unassigned.
+    """
+    rows = snapshot_rows(snapshot)
+    departments = dict(Subject.objects.filter(id__in={row[0] for row in rows}).values_list('id', 'department_id'))
+    slots = set(TimeSlot.objects.filter(id__in={row[1] for row in rows}).values_list('id', flat=True))
+    rooms = set(Classroom.objects.filter(id__in={row[2] for row in rows if row[2]}).values_list('id', flat=True))
+    faculty = set(Faculty.objects.filter(id__in={row[3] for row in rows if row[3]}).values_list('id', flat=True))
+
+    entries = [
+        Timetable(
+            department_id=departments[subject_id],
+            subject_id=subject_id,
+            time_slot_id=time_slot_id,
+            classroom_id=classroom_id if classroom_id in rooms else None,
+            faculty_id=faculty_id if faculty_id in faculty else None,
+        )
+        for subject_id, time_slot_id, classroom_id, faculty_id in rows
+        if subject_id in departments and time_slot_id in slots
+    ]
+
+    previous_version, previous_rows = capture_timetable()
+    with transaction.atomic():
+        Timetable.objects.all().delete()
+        Timetable.objects.bulk_create(entries, batch_size=batch_size)
+    # bulk_create skips post_save, so move the model version explicitly
+    bump_version(model_scope(Timetable))
+
+    publish_timetable(previous_rows, source='restore', metadata={"restored_from": snapshot.id}, previous_version=previous_version)
+    skipped = len(rows) - len(entries)
+    logger.info(f"Restored timetable snapshot {snapshot.id}: {len(entries)} entries, {skipped} skipped.")
+    return {
+        "status": "success",
+        "message": f"Timetable snapshot {snapshot.id} restored.",
+        "restored": len(entries),
+        "skipped": skipped,
+    }
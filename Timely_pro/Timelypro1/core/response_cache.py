@@ -0,0 +1,54 @@
+#core/response_cache.py
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+
+from core.versioning import format_version, get_version
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_ALIAS = 'responses'
+
+
+def response_cache():
+    alias = RESPONSE_CACHE_ALIAS if RESPONSE_CACHE_ALIAS in settings.CACHES else 'default'
+    return caches[alias]
+
+
+class CachedResponseMixin:
+    """
+    Serves list and retrieve responses of a viewset from the response cache.
+    Entries are keyed by endpoint, query and the version tokens of the
+    viewset's version_models, so the signals that bump those tokens on
+    post_save, post_delete and m2m_changed invalidate exactly the endpoints
+    depending on the changed model. Meant to be combined with, and listed
+    after, ConditionalGetMixin which provides get_version_scopes().
+    """
+
+    def get_response_cache_key(self, request):
+        versions = [format_version(get_version(scope)) for scope in self.get_version_scopes()]
+        key = "|".join([request.get_full_path(), request.META.get('HTTP_ACCEPT', ''), *versions])
+        return f"response:{self.basename}:{self.action}:{hashlib.md5(key.encode()).hexdigest()}"
+
+    def cached_response(self, request, handler, *args, **kwargs):
+        cache = response_cache()
+        key = self.get_response_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data)
+            logger.debug(f"Cached response for {self.basename} {self.action}.")
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, super().retrieve, *args, **kwargs)
@@ -1,7 +1,7 @@
 from rest_framework import serializers
 from .models import (
     Degree, Department, Subject, Faculty, Classroom,
-    TimeSlot, Timetable, Notification, Student
+    TimeSlot, Timetable, TimetableSnapshot, Notification, Student
 )
 from users.models import CustomUser, Role
 from django.contrib.auth import get_user_model
@@ -85,6 +85,12 @@ class TimetableSerializer(serializers.ModelSerializer):
         model = Timetable
         fields = '__all__'
 
+# Timetable Snapshot Serializer
+class TimetableSnapshotSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TimetableSnapshot
+        exclude = ['data']
+
 # Notification Serializer
 class NotificationSerializer(serializers.ModelSerializer):
     user = CustomUserSerializer()
@@ -0,0 +1,160 @@
+#core/signals.py
+from collections import Counter, defaultdict
+
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from core.clashes import apply_clash_changes, enrollment_changes
+from core.grids import invalidate_student_grid
+from core.ical import invalidate_student_calendar
+from core.models import (
+    Degree, Department, Subject, Faculty, Classroom,
+    TimeSlot, Timetable, Notification, Student
+)
+from core.versioning import TIMETABLE_SCOPE, bump_version, model_scope
+from schedule.compiler import invalidate_user_schedule
+from users.models import CustomUser, Role
+
+# Models whose version token is exposed to ETags and response caches
+VERSIONED_MODELS = (
+    Degree, Department, Subject, Faculty, Classroom,
+    TimeSlot, Timetable, Notification, Student, CustomUser, Role,
+)
+
+# Many-to-many relations, mapped to the model whose representation they change
+VERSIONED_RELATIONS = {
+    Faculty.subjects.through: Faculty,
+    Faculty.degrees.through: Faculty,
+    Student.subjects.through: Student,
+    CustomUser.roles.through: CustomUser,
+}
+
+
+def bump_model_version(sender, **kwargs):
+    bump_version(model_scope(sender))
+
+
+def bump_relation_version(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_version(model_scope(VERSIONED_RELATIONS[sender]))
+
+
+for model in VERSIONED_MODELS:
+    post_save.connect(bump_model_version, sender=model, dispatch_uid=f"version_save_{model._meta.label_lower}")
+    post_delete.connect(bump_model_version, sender=model, dispatch_uid=f"version_delete_{model._meta.label_lower}")
+
+for through in VERSIONED_RELATIONS:
+    m2m_changed.connect(bump_relation_version, sender=through, dispatch_uid=f"version_m2m_{through._meta.label_lower}")
+
+
+# Any change to a timetable entry or a time slot invalidates every grid
+@receiver(post_save, sender=Timetable)
+@receiver(post_delete, sender=Timetable)
+@receiver(post_save, sender=TimeSlot)
+@receiver(post_delete, sender=TimeSlot)
+def bump_timetable_version(sender, **kwargs):
+    bump_version(TIMETABLE_SCOPE)
+
+
+# Fields copied into grid cells, calendar feeds and compiled schedules
+TIMETABLE_LABELS = {
+    Subject: ('code', 'name'),
+    Classroom: ('room_number',),
+    Faculty: ('user',),
+    CustomUser: ('username',),
+}
+
+
+def detect_label_change(sender, instance, update_fields=None, **kwargs):
+    fields = [sender._meta.get_field(name).attname for name in TIMETABLE_LABELS[sender]]
+    instance._timetable_labels_changed = False
+    if instance.pk is None or (update_fields is not None and not set(update_fields) & set(TIMETABLE_LABELS[sender])):
+        # Saves such as the last_login update never touch a label
+        return
+    stored = sender.objects.filter(pk=instance.pk).values_list(*fields).first()
+    instance._timetable_labels_changed = stored is not None and stored != tuple(getattr(instance, field) for field in fields)
+
+
+def bump_timetable_labels(sender, instance, **kwargs):
+    if getattr(instance, '_timetable_labels_changed', False):
+        bump_version(TIMETABLE_SCOPE)
+
+
+for model in TIMETABLE_LABELS:
+    pre_save.connect(detect_label_change, sender=model, dispatch_uid=f"labels_pre_save_{model._meta.label_lower}")
+    post_save.connect(bump_timetable_labels, sender=model, dispatch_uid=f"labels_save_{model._meta.label_lower}")
+
+
+def invalidate_student_timetable(student_id):
+    invalidate_student_grid(student_id)
+    invalidate_student_calendar(student_id)
+    for user_id in Student.objects.filter(pk=student_id).values_list('user_id', flat=True):
+        invalidate_user_schedule(user_id)
+
+
+# A change of enrollment only invalidates the grids and feeds of the students involved
+@receiver(m2m_changed, sender=Student.subjects.through)
+def invalidate_enrollment_grids(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear', 'pre_clear'):
+        return
+    if not reverse:
+        invalidate_student_timetable(instance.pk)
+    elif action == 'pre_clear':
+        for student_id in instance.students.values_list('id', flat=True):
+            invalidate_student_timetable(student_id)
+    else:
+        for student_id in pk_set or ():
+            invalidate_student_timetable(student_id)
+
+
+def _subjects_by_student(student_ids):
+    subjects = defaultdict(set)
+    for student_id, subject_id in Student.subjects.through.objects.filter(student_id__in=student_ids).values_list('student_id', 'subject_id'):
+        subjects[student_id].add(subject_id)
+    return subjects
+
+
+# A user gaining or losing a student or faculty profile changes what their schedule covers
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+@receiver(post_save, sender=Faculty)
+@receiver(post_delete, sender=Faculty)
+def invalidate_profile_schedule(sender, instance, **kwargs):
+    invalidate_user_schedule(instance.user_id)
+
+
+# Keep the shared-enrollment matrix in step with every enrollment change
+@receiver(m2m_changed, sender=Student.subjects.through)
+def update_subject_clashes(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ('pre_remove', 'pre_clear'):
+        # Only enrollments that actually exist are removed; remember them for the post_ signal
+        if not reverse:
+            current = set(instance.subjects.values_list('id', flat=True))
+            instance._removed_enrollments = current if action == 'pre_clear' else current & set(pk_set)
+        else:
+            students = instance.students.values_list('id', flat=True)
+            instance._removed_enrollments = set(students if action == 'pre_clear' else students.filter(id__in=pk_set))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    delta = 1 if action == 'post_add' else -1
+    changed = pk_set if action == 'post_add' else getattr(instance, '_removed_enrollments', set())
+    if not changed:
+        return
+
+    if not reverse:
+        current = set(instance.subjects.values_list('id', flat=True))
+        changes = enrollment_changes(changed, current, delta)
+    else:
+        changes = Counter()
+        for subject_ids in _subjects_by_student(changed).values():
+            changes.update(enrollment_changes({instance.pk}, subject_ids, delta))
+    apply_clash_changes(changes)
+
+
+# Deleting a student removes its enrollments without m2m_changed
+@receiver(pre_delete, sender=Student)
+def remove_student_clashes(sender, instance, **kwargs):
+    subject_ids = set(instance.subjects.values_list('id', flat=True))
+    apply_clash_changes(enrollment_changes(subject_ids, (), -1))
@@ -0,0 +1,79 @@
+#core/snapshots.py
+import logging
+import struct
+import zlib
+
+from django.conf import settings
+
+from core.models import TimetableSnapshot
+from notifications.fanout import diff_timetables
+
+logger = logging.getLogger(__name__)
+
+ROW_FORMAT = struct.Struct('<4I')
+
+
+def encode_rows(rows):
+    """
+    Packs (subject_id, time_slot_id, classroom_id, faculty_id) rows into a
+    compressed blob of little-endian uint32 quadruples, 0 standing for None.
+    """
+    packed = bytearray(ROW_FORMAT.size * len(rows))
+    for index, row in enumerate(sorted(rows, key=lambda row: tuple(value or 0 for value in row))):
+        ROW_FORMAT.pack_into(packed, index * ROW_FORMAT.size, *(value or 0 for value in row))
+    return zlib.compress(bytes(packed), 6)
+
+
+def decode_rows(data):
+    return [
+        tuple(value or None for value in row)
+        for row in ROW_FORMAT.iter_unpack(zlib.decompress(bytes(data)))
+    ]
+
+
+def take_snapshot(rows, version, source='generation', fitness=None, metadata=None):
+    """
+    Stores the given timetable rows as a snapshot and prunes the oldest ones
+    beyond TIMETABLE_SNAPSHOT_RETENTION.
+    """
+    snapshot = TimetableSnapshot.objects.create(
+        source=source,
+        version=version,
+        fitness=fitness,
+        row_count=len(rows),
+        metadata=metadata or {},
+        data=encode_rows(rows),
+    )
+    retention = getattr(settings, 'TIMETABLE_SNAPSHOT_RETENTION', 50)
+    expired = TimetableSnapshot.objects.order_by('-created', '-id').values_list('id', flat=True)[retention:]
+    TimetableSnapshot.objects.filter(id__in=list(expired)).delete()
+    logger.info(f"Stored timetable snapshot {snapshot.id} with {len(rows)} entries ({len(snapshot.data)} bytes).")
+    return snapshot
+
+
+def snapshot_rows(snapshot):
+    return decode_rows(snapshot.data)
+
+
+def _describe(rows):
+    return [
+        {"subject": subject_id, "time_slot": time_slot_id, "classroom": classroom_id, "faculty": faculty_id}
+        for (subject_id, time_slot_id, classroom_id, faculty_id), count in sorted(rows.items(), key=lambda item: tuple(value or 0 for value in item[0]))
+        for _ in range(count)
+    ]
+
+
+def diff_snapshots(old, new):
+    """
+    Returns the entries added and removed between two snapshots, found in
+    linear time by counting their rows.
+    """
+    added, removed = diff_timetables(snapshot_rows(old), snapshot_rows(new))
+    return {
+        "from": old.id,
+        "to": new.id,
+        "added_count": sum(added.values()),
+        "removed_count": sum(removed.values()),
+        "added": _describe(added),
+        "removed": _describe(removed),
+    }
@@ -0,0 +1,364 @@
+#core/staffing.py
+import heapq
+import logging
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from core.models import Faculty, Subject, Timetable
+from core.versioning import bump_version, model_scope
+
+logger = logging.getLogger(__name__)
+
+CLASH_ROUNDS = 3
+IMPROVEMENT_PASSES = 2
+BATCH_SIZE = 1000
+INFINITY = float('inf')
+
+
+class MinCostFlow:
+    """
+    Min-cost flow by the primal-dual method: Dijkstra with node potentials
+    finds the shortest augmenting distance, then a Dinic style blocking flow
+    pushes along every path of that length at once. With the small integer
+    costs used here only a handful of Dijkstra phases are needed.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.graph = [[] for _ in range(size)]
+        self.to, self.capacity, self.cost = [], [], []
+
+    def add_edge(self, tail, head, capacity, cost=0):
+        """
+        Adds an edge and its residual twin; returns the edge index, whose
+        flow can be read back with flow_on.
+        """
+        index = len(self.to)
+        self.to += [head, tail]
+        self.capacity += [capacity, 0]
+        self.cost += [cost, -cost]
+        self.graph[tail].append(index)
+        self.graph[head].append(index + 1)
+        return index
+
+    def flow_on(self, index):
+        return self.capacity[index ^ 1]
+
+    def _distances(self, source, potential):
+        distance = [INFINITY] * self.size
+        distance[source] = 0
+        heap = [(0, source)]
+        while heap:
+            dist, node = heapq.heappop(heap)
+            if dist > distance[node]:
+                continue
+            for edge in self.graph[node]:
+                if not self.capacity[edge]:
+                    continue
+                head = self.to[edge]
+                candidate = dist + self.cost[edge] + potential[node] - potential[head]
+                if candidate < distance[head]:
+                    distance[head] = candidate
+                    heapq.heappush(heap, (candidate, head))
+        return distance
+
+    def _levels(self, source, potential):
+        """
+        BFS depth of every node over the admissible edges (spare capacity
+        and zero reduced cost).
+        """
+        level = [-1] * self.size
+        level[source] = 0
+        queue = [source]
+        for node in queue:
+            for edge in self.graph[node]:
+                head = self.to[edge]
+                if level[head] < 0 and self.capacity[edge] and self.cost[edge] + potential[node] == potential[head]:
+                    level[head] = level[node] + 1
+                    queue.append(head)
+        return level
+
+    def _blocking_flow(self, source, sink, level, potential):
+        pointer = [0] * self.size
+        pushed = cost = 0
+        path, node = [], source
+        while True:
+            if node == sink:
+                amount = min(self.capacity[edge] for edge in path)
+                for edge in path:
+                    self.capacity[edge] -= amount
+                    self.capacity[edge ^ 1] += amount
+                    cost += amount * self.cost[edge]
+                pushed += amount
+                path, node = [], source
+                continue
+            edges = self.graph[node]
+            while pointer[node] < len(edges):
+                edge = edges[pointer[node]]
+                head = self.to[edge]
+                if (
+                    self.capacity[edge] and level[head] == level[node] + 1
+                    and self.cost[edge] + potential[node] == potential[head]
+                ):
+                    break
+                pointer[node] += 1
+            else:
+                # Dead end: retreat and skip the edge that led here
+                if node == source:
+                    return pushed, cost
+                level[node] = -1
+                node = self.to[path.pop() ^ 1]
+                pointer[node] += 1
+                continue
+            path.append(edge)
+            node = head
+
+    def solve(self, source, sink):
+        """
+        Pushes the maximum flow from source to sink at minimum cost (costs
+        must be non-negative). Returns (flow, cost).
+        """
+        potential = [0] * self.size
+        flow = cost = 0
+        while True:
+            distance = self._distances(source, potential)
+            if distance[sink] == INFINITY:
+                return flow, cost
+            # Capping at the sink distance keeps every residual reduced cost non-negative
+            potential = [p + min(d, distance[sink]) for p, d in zip(potential, distance)]
+            while True:
+                level = self._levels(source, potential)
+                if level[sink] < 0:
+                    break
+                pushed, pushed_cost = self._blocking_flow(source, sink, level, potential)
+                flow += pushed
+                cost += pushed_cost
+
+
+def _minutes(start, end):
+    return end.hour * 60 + end.minute - start.hour * 60 - start.minute
+
+
+def _scoped_entries(department=None):
+    entries = Timetable.objects.all()
+    if department is not None:
+        entries = entries.filter(department_id=department)
+    return entries
+
+
+class StaffingProblem:
+    """
+    The generated timetable as seen by faculty assignment: the slots and
+    weekly minutes of every scheduled subject, its department and the
+    faculty qualified to teach it. With a department id only that
+    department's entries are staffed, and the slots and minutes faculty
+    already teach in other departments are kept as fixed bookings.
+    """
+
+    def __init__(self, department=None):
+        self.entries = list(_scoped_entries(department).values_list('id', 'subject_id', 'time_slot_id', 'time_slot__start_time', 'time_slot__end_time'))
+        self.slots = defaultdict(set)
+        self.minutes = Counter()
+        for _, subject_id, slot_id, start, end in self.entries:
+            self.slots[subject_id].add(slot_id)
+            self.minutes[subject_id] += _minutes(start, end)
+        self.booked = defaultdict(set)
+        self.booked_minutes = Counter()
+        if department is not None:
+            others = Timetable.objects.exclude(department_id=department).exclude(faculty=None)
+            for faculty_id, slot_id, start, end in others.values_list('faculty_id', 'time_slot_id', 'time_slot__start_time', 'time_slot__end_time'):
+                self.booked[faculty_id].add(slot_id)
+                self.booked_minutes[faculty_id] += _minutes(start, end)
+        self.department = dict(Subject.objects.filter(id__in=self.slots).values_list('id', 'department_id'))
+        self.qualified = defaultdict(list)
+        for faculty_id, subject_id in Faculty.subjects.through.objects.filter(subject_id__in=self.slots).values_list('faculty_id', 'subject_id'):
+            self.qualified[subject_id].append(faculty_id)
+        self.cap = settings.FACULTY_MAX_SUBJECTS_PER_DEPARTMENT
+
+
+def solve_flow(problem, forbidden=frozenset()):
+    """
+    Assigns every subject to at most one qualified faculty member with a
+    min-cost flow: source -> subject (1) -> faculty x department (cap) ->
+    faculty -> sink, where a faculty member's k-th subject costs k so the
+    cheapest maximum flow spreads subjects evenly. Returns {subject: faculty}.
+    """
+    subjects = sorted(problem.slots)
+    teaching = sorted({
+        (faculty_id, problem.department[subject_id])
+        for subject_id in subjects for faculty_id in problem.qualified[subject_id]
+        if (subject_id, faculty_id) not in forbidden
+    })
+    faculty = sorted({faculty_id for faculty_id, _ in teaching})
+    node = {('subject', subject_id): 2 + index for index, subject_id in enumerate(subjects)}
+    node.update({('teaching', key): 2 + len(subjects) + index for index, key in enumerate(teaching)})
+    node.update({('faculty', faculty_id): 2 + len(subjects) + len(teaching) + index for index, faculty_id in enumerate(faculty)})
+    network = MinCostFlow(2 + len(node))
+    source, sink = 0, 1
+
+    edges = {}
+    for subject_id in subjects:
+        network.add_edge(source, node[('subject', subject_id)], 1)
+        for faculty_id in problem.qualified[subject_id]:
+            if (subject_id, faculty_id) not in forbidden:
+                key = (faculty_id, problem.department[subject_id])
+                edges[(subject_id, faculty_id)] = network.add_edge(node[('subject', subject_id)], node[('teaching', key)], 1)
+    subjects_per_faculty = Counter()
+    for faculty_id, department_id in teaching:
+        network.add_edge(node[('teaching', (faculty_id, department_id))], node[('faculty', faculty_id)], problem.cap)
+        subjects_per_faculty[faculty_id] += problem.cap
+    for faculty_id in faculty:
+        for level in range(1, subjects_per_faculty[faculty_id] + 1):
+            network.add_edge(node[('faculty', faculty_id)], sink, 1, level)
+
+    network.solve(source, sink)
+    return {subject_id: faculty_id for (subject_id, faculty_id), edge in edges.items() if network.flow_on(edge)}
+
+
+def resolve_clashes(problem, teacher):
+    """
+    Keeps, per faculty member, the longest subjects whose slots do not
+    overlap each other or the member's bookings and unassigns the rest. Returns the (subject, faculty) pairs
+    dropped.
+    """
+    by_faculty = defaultdict(list)
+    for subject_id, faculty_id in teacher.items():
+        by_faculty[faculty_id].append(subject_id)
+    dropped = set()
+    for faculty_id, subject_ids in by_faculty.items():
+        busy = set(problem.booked[faculty_id])
+        for subject_id in sorted(subject_ids, key=lambda subject_id: (-problem.minutes[subject_id], subject_id)):
+            if busy & problem.slots[subject_id]:
+                dropped.add((subject_id, faculty_id))
+                del teacher[subject_id]
+            else:
+                busy |= problem.slots[subject_id]
+    return dropped
+
+
+class FacultyLoad:
+    """
+    Weekly minutes, busy slots and subjects per department of every faculty
+    member under an assignment.
+    """
+
+    def __init__(self, problem, teacher):
+        self.problem = problem
+        self.minutes = Counter(problem.booked_minutes)
+        self.busy = defaultdict(set, {faculty_id: set(slots) for faculty_id, slots in problem.booked.items()})
+        self.subjects = Counter()
+        for subject_id, faculty_id in teacher.items():
+            self.add(subject_id, faculty_id)
+
+    def add(self, subject_id, faculty_id):
+        self.minutes[faculty_id] += self.problem.minutes[subject_id]
+        self.busy[faculty_id] |= self.problem.slots[subject_id]
+        self.subjects[(faculty_id, self.problem.department[subject_id])] += 1
+
+    def remove(self, subject_id, faculty_id):
+        self.minutes[faculty_id] -= self.problem.minutes[subject_id]
+        self.busy[faculty_id] -= self.problem.slots[subject_id]
+        self.subjects[(faculty_id, self.problem.department[subject_id])] -= 1
+
+    def can_take(self, subject_id, faculty_id):
+        return (
+            self.subjects[(faculty_id, self.problem.department[subject_id])] < self.problem.cap
+            and not self.busy[faculty_id] & self.problem.slots[subject_id]
+        )
+
+
+def improve(problem, teacher, passes=IMPROVEMENT_PASSES):
+    """
+    Seats unassigned subjects with the least loaded qualified faculty member
+    that is free, then moves subjects from busier to less busy faculty while
+    that narrows the gap in weekly minutes. Returns the number of changes.
+    """
+    load = FacultyLoad(problem, teacher)
+    changes = 0
+    for _ in range(passes):
+        changed = False
+        for subject_id in sorted(problem.slots, key=lambda subject_id: (-problem.minutes[subject_id], subject_id)):
+            current = teacher.get(subject_id)
+            ceiling = load.minutes[current] - problem.minutes[subject_id] if current is not None else INFINITY
+            options = [
+                faculty_id for faculty_id in problem.qualified[subject_id]
+                if faculty_id != current and load.minutes[faculty_id] < ceiling and load.can_take(subject_id, faculty_id)
+            ]
+            if not options:
+                continue
+            best = min(options, key=lambda faculty_id: (load.minutes[faculty_id], faculty_id))
+            if current is not None:
+                load.remove(subject_id, current)
+            load.add(subject_id, best)
+            teacher[subject_id] = best
+            changes += 1
+            changed = True
+        if not changed:
+            break
+    return changes
+
+
+def assign_faculty(save=True, department=None):
+    """
+    Assigns one qualified faculty member to every subject of the timetable
+    (or of one department's entries), balancing weekly load, honouring
+    FACULTY_MAX_SUBJECTS_PER_DEPARTMENT and never booking anyone twice in a
+    slot. Subjects whose faculty clash are forbidden that pairing and the
+    flow is solved again, a few rounds at most, before a greedy pass settles
+    the rest.
+    """
+    started = time.monotonic()
+    problem = StaffingProblem(department)
+    forbidden = set()
+    for _ in range(CLASH_ROUNDS):
+        teacher = solve_flow(problem, forbidden)
+        dropped = resolve_clashes(problem, teacher)
+        if not dropped:
+            break
+        forbidden |= dropped
+    moves = improve(problem, teacher)
+
+    # A subject scheduled twice in one slot still gets its teacher only once
+    busy = {(faculty_id, slot_id) for faculty_id, slots in problem.booked.items() for slot_id in slots}
+    assignment = {}
+    for entry_id, subject_id, slot_id, _, _ in problem.entries:
+        faculty_id = teacher.get(subject_id)
+        if faculty_id is not None and (faculty_id, slot_id) not in busy:
+            busy.add((faculty_id, slot_id))
+            assignment[entry_id] = faculty_id
+    if save:
+        save_assignment(assignment, department)
+
+    unassigned = sorted(set(problem.slots) - set(teacher))
+    codes = dict(Subject.objects.filter(id__in=unassigned).values_list('id', 'code'))
+    minutes = [total for total in FacultyLoad(problem, teacher).minutes.values() if total]
+    result = {
+        "status": "success" if not unassigned else "partial",
+        "message": "Faculty assigned successfully." if not unassigned else f"{len(unassigned)} subjects have no qualified free faculty.",
+        "subjects": len(problem.slots),
+        "unassigned_subjects": [codes.get(subject_id, subject_id) for subject_id in unassigned],
+        "sessions_without_faculty": len(problem.entries) - len(assignment),
+        "max_weekly_hours": round(max(minutes, default=0) / 60, 2),
+        "min_weekly_hours": round(min(minutes, default=0) / 60, 2),
+        "improvement_moves": moves,
+        "seconds": round(time.monotonic() - started, 3),
+    }
+    logger.info(f"Faculty assignment finished: {result}")
+    return result
+
+
+def save_assignment(assignment, department=None):
+    """
+    Stores {timetable_id: faculty_id}; every other entry (of the department,
+    when one is given) loses its faculty.
+    """
+    with transaction.atomic():
+        # Clear first so swapping faculty never trips unique_faculty_time_slot midway
+        _scoped_entries(department).exclude(faculty=None).update(faculty=None)
+        updates = [Timetable(id=entry_id, faculty_id=faculty_id) for entry_id, faculty_id in assignment.items()]
+        Timetable.objects.bulk_update(updates, ['faculty'], batch_size=BATCH_SIZE)
+    # bulk_update skips post_save
+    bump_version(model_scope(Timetable))
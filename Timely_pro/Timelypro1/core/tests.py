@@ -1,3 +1,263 @@
-from django.test import TestCase
+import itertools
+import random
+from collections import Counter, defaultdict
+from datetime import time
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache, caches
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APITestCase
+
+from core.grids import get_grid
+from core.models import Classroom, Degree, Department, Faculty, Student, Subject, TimeSlot, Timetable, TimetableSnapshot
+from core.staffing import MinCostFlow, assign_faculty, improve, resolve_clashes, solve_flow
+from core.utils import generate_timetable
+from core.versioning import bump_version, get_version
+from users.models import CustomUser, Role
+
+
+@override_settings(VERSION_CACHE_ALIAS='responses')
+class VersionCacheAliasTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        caches['responses'].clear()
+
+    def test_tokens_live_in_the_configured_alias(self):
+        version = bump_version('test')
+        self.assertEqual(caches['responses'].get('version:test'), version)
+        self.assertIsNone(cache.get('version:test'))
+        self.assertEqual(get_version('test'), version)
+
+
+class TimetableGridConditionalTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='CSE', degree=Degree.objects.create(name='BTech'))
+        cls.subject = Subject.objects.create(name='Algorithms', code='CS201', department=department, hours_per_week=3)
+        cls.student = Student.objects.create(
+            user=CustomUser.objects.create(username='student'), department=department, year=2,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.student.user)
+
+    def test_enrollment_change_invalidates_student_grid(self):
+        url = f'/timetables/grid/?student={self.student.id}'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.student.subjects.add(self.subject)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertNotEqual(response.status_code, 304)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class GridLabelTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='CSE', degree=Degree.objects.create(name='BTech'))
+        slot = TimeSlot.objects.create(day='Monday', start_time=time(9), end_time=time(10), is_original=False)
+        cls.room = Classroom.objects.create(room_number='R1', capacity=40)
+        cls.subject = Subject.objects.create(name='Algorithms', code='CS201', department=department, hours_per_week=3)
+        Timetable.objects.create(department=department, subject=cls.subject, time_slot=slot, classroom=cls.room)
+
+    def setUp(self):
+        cache.clear()
+
+    def cell(self):
+        return get_grid('classroom', self.room.id)['grid'][0][0][0]
+
+    def test_room_rename_reaches_cached_grid(self):
+        self.assertEqual(self.cell()['classroom'], 'R1')
+        self.room.room_number = 'RX'
+        self.room.save()
+        self.assertEqual(self.cell()['classroom'], 'RX')
+
+    def test_subject_rename_reaches_cached_grid(self):
+        self.assertEqual(self.cell()['subject_name'], 'Algorithms')
+        self.subject.name = 'Advanced Algorithms'
+        self.subject.save()
+        self.assertEqual(self.cell()['subject_name'], 'Advanced Algorithms')
+
+    def test_unrelated_save_keeps_version(self):
+        version = get_version()
+        self.room.capacity = 50
+        self.room.save()
+        self.assertEqual(get_version(), version)
+
+
+def staffing_problem(slots, qualified, minutes=None, cap=2):
+    """In-memory stand-in for StaffingProblem, every subject in department 1."""
+    return SimpleNamespace(
+        slots={subject_id: set(subject_slots) for subject_id, subject_slots in slots.items()},
+        minutes=Counter(minutes or {subject_id: 60 * len(subject_slots) for subject_id, subject_slots in slots.items()}),
+        department={subject_id: 1 for subject_id in slots},
+        qualified=defaultdict(list, qualified),
+        cap=cap,
+        booked=defaultdict(set),
+        booked_minutes=Counter(),
+    )
+
+
+class MinCostFlowTests(SimpleTestCase):
+    def test_assignment_matches_brute_force(self):
+        rng = random.Random(7)
+        for size in range(1, 6):
+            costs = [[rng.randint(0, 9) for _ in range(size)] for _ in range(size)]
+            network = MinCostFlow(2 + 2 * size)
+            for worker in range(size):
+                network.add_edge(0, 2 + worker, 1)
+                network.add_edge(2 + size + worker, 1, 1)
+                for job in range(size):
+                    network.add_edge(2 + worker, 2 + size + job, 1, costs[worker][job])
+            best = min(sum(costs[worker][job] for worker, job in enumerate(jobs)) for jobs in itertools.permutations(range(size)))
+            self.assertEqual(network.solve(0, 1), (size, best))
+
+    def test_flow_is_limited_by_capacity(self):
+        network = MinCostFlow(4)
+        first = network.add_edge(0, 2, 3, 1)
+        network.add_edge(0, 3, 3, 5)
+        network.add_edge(2, 1, 2)
+        network.add_edge(3, 1, 2)
+        self.assertEqual(network.solve(0, 1), (4, 12))
+        self.assertEqual(network.flow_on(first), 2)
+
+
+class StaffingStepTests(SimpleTestCase):
+    def test_subjects_are_spread_evenly(self):
+        problem = staffing_problem({subject_id: [subject_id] for subject_id in range(1, 5)}, {
+            subject_id: [10, 20] for subject_id in range(1, 5)
+        })
+        teacher = solve_flow(problem)
+        self.assertEqual(len(teacher), 4)
+        self.assertEqual(Counter(teacher.values()), {10: 2, 20: 2})
+
+    def test_cap_per_department_is_honoured(self):
+        problem = staffing_problem({1: [1], 2: [2]}, {1: [10], 2: [10]}, cap=1)
+        self.assertEqual(len(solve_flow(problem)), 1)
+
+    def test_forbidden_pairs_are_not_used(self):
+        problem = staffing_problem({1: [1]}, {1: [10, 20]})
+        self.assertEqual(solve_flow(problem, forbidden={(1, 10)}), {1: 20})
+
+    def test_clash_keeps_the_longer_subject(self):
+        problem = staffing_problem({1: [1], 2: [1, 2]}, {1: [10], 2: [10]})
+        teacher = {1: 10, 2: 10}
+        self.assertEqual(resolve_clashes(problem, teacher), {(1, 10)})
+        self.assertEqual(teacher, {2: 10})
+
+    def test_improve_moves_load_to_idle_faculty(self):
+        problem = staffing_problem({1: [1], 2: [2], 3: [3]}, {1: [10], 2: [10, 20], 3: [10, 20]}, cap=3)
+        teacher = {1: 10, 2: 10, 3: 10}
+        self.assertGreater(improve(problem, teacher), 0)
+        self.assertEqual(Counter(teacher.values()), {10: 2, 20: 1})
+
+    def test_improve_seats_unassigned_subjects(self):
+        problem = staffing_problem({1: [1], 2: [1]}, {1: [10], 2: [10, 20]})
+        teacher = {1: 10}
+        improve(problem, teacher)
+        self.assertEqual(teacher, {1: 10, 2: 20})
+
+
+class DepartmentStaffingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        degree = Degree.objects.create(name='BTech')
+        cls.cse = Department.objects.create(name='CSE', degree=degree)
+        cls.ece = Department.objects.create(name='ECE', degree=degree)
+        cls.first = TimeSlot.objects.create(day='Monday', start_time=time(9), end_time=time(10))
+        cls.second = TimeSlot.objects.create(day='Monday', start_time=time(10), end_time=time(11))
+        cls.cse_subject = Subject.objects.create(name='Algorithms', code='CS201', department=cls.cse, hours_per_week=3)
+        cls.ece_subject = Subject.objects.create(name='Signals', code='EC201', department=cls.ece, hours_per_week=3)
+        cls.busy = Faculty.objects.create(user=CustomUser.objects.create(username='busy'), department=cls.ece)
+        cls.busy.subjects.add(cls.cse_subject, cls.ece_subject)
+
+    def test_keeps_other_departments_faculty(self):
+        ece_entry = Timetable.objects.create(department=self.ece, subject=self.ece_subject, time_slot=self.first, faculty=self.busy)
+        cse_entry = Timetable.objects.create(department=self.cse, subject=self.cse_subject, time_slot=self.first)
+        result = assign_faculty(department=self.cse.id)
+        # The only qualified member already teaches ECE in that slot
+        self.assertEqual(result['unassigned_subjects'], ['CS201'])
+        ece_entry.refresh_from_db()
+        cse_entry.refresh_from_db()
+        self.assertEqual(ece_entry.faculty, self.busy)
+        self.assertIsNone(cse_entry.faculty)
+
+    def test_counts_load_from_other_departments(self):
+        Timetable.objects.create(department=self.ece, subject=self.ece_subject, time_slot=self.first, faculty=self.busy)
+        cse_entry = Timetable.objects.create(department=self.cse, subject=self.cse_subject, time_slot=self.second)
+        free = Faculty.objects.create(user=CustomUser.objects.create(username='free'), department=self.cse)
+        free.subjects.add(self.cse_subject)
+        assign_faculty(department=self.cse.id)
+        cse_entry.refresh_from_db()
+        self.assertEqual(cse_entry.faculty, free)
+
+
+class TimetableSnapshotDiffTests(APITestCase):
+    def setUp(self):
+        admin = CustomUser.objects.create(username='admin')
+        admin.roles.add(Role.objects.create(name='Admin'))
+        self.client.force_authenticate(admin)
+        self.snapshot = TimetableSnapshot.objects.create(version=1.0, data=b'')
+
+    def test_invalid_to_is_rejected(self):
+        response = self.client.get(f'/timetable-snapshots/{self.snapshot.id}/diff/?to=latest')
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_to_is_not_found(self):
+        response = self.client.get(f'/timetable-snapshots/{self.snapshot.id}/diff/?to={self.snapshot.id + 1}')
+        self.assertEqual(response.status_code, 404)
+
+
+class HardConstraintTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        degree = Degree.objects.create(name='BTech')
+        cls.cse = Department.objects.create(name='CSE', degree=degree)
+        cls.ece = Department.objects.create(name='ECE', degree=degree)
+        cls.original = TimeSlot.objects.create(day='Monday', start_time=time(9), end_time=time(11))
+        cls.split = TimeSlot.objects.create(day='Monday', start_time=time(9), end_time=time(10), is_original=False)
+        cls.room = Classroom.objects.create(room_number='R1', capacity=1)
+        cls.subject = Subject.objects.create(name='Algorithms', code='CS201', department=cls.cse, hours_per_week=3)
+        cls.student = Student.objects.create(user=CustomUser.objects.create(username='student'), department=cls.cse, year=2)
+        cls.student.subjects.add(cls.subject)
+
+    def test_timetable_clean_uses_the_validator(self):
+        entry = Timetable(department=self.cse, subject=self.subject, time_slot=self.split, classroom=self.room)
+        entry.clean()
+        entry.department = self.ece
+        with self.assertRaises(ValidationError) as raised:
+            entry.clean()
+        self.assertEqual(raised.exception.messages, ["The subject does not belong to the timetable entry's department."])
+
+    def test_timetable_clean_rejects_original_slot(self):
+        entry = Timetable(department=self.cse, subject=self.subject, time_slot=self.original)
+        with self.assertRaises(ValidationError):
+            entry.clean()
+
+    def test_student_clean_checks_the_edited_department(self):
+        self.student.clean()
+        self.student.department = self.ece
+        with self.assertNumQueries(1), self.assertRaises(ValidationError) as raised:
+            self.student.clean()
+        self.assertEqual(raised.exception.messages, ["Subject Algorithms is not offered by the student's department."])
+
+    def test_generation_breaking_a_constraint_is_not_published(self):
+        kept = Timetable.objects.create(department=self.cse, subject=self.subject, time_slot=self.split)
+        session = SimpleNamespace(subjects=[self.subject], practical_pairs=[1], time_slots=[self.split], generations=1)
+        session.evolve = lambda run: SimpleNamespace(fitness=SimpleNamespace(values=(0,)))
+
+        def save_sessions(best_ind):
+            Timetable.objects.create(department=self.cse, subject=self.subject, time_slot=self.original)
+
+        with mock.patch('core.utils.SolverSession.from_database', return_value=session), \
+                mock.patch('core.utils.save_sessions', save_sessions), \
+                mock.patch('core.utils.publish_timetable') as publish:
+            result = generate_timetable()
+        self.assertEqual(result['status'], 'error')
+        self.assertEqual(result['violations']['original_slot'], 1)
+        publish.assert_not_called()
+        self.assertEqual(list(Timetable.objects.values_list('id', flat=True)), [kept.id])
@@ -1,9 +1,16 @@
 from datetime import datetime, timedelta
+from functools import cache
 from core.models import TimeSlot, PracticalPair
-from rich.console import Console
+from django.db import transaction
 from django.utils.timezone import make_aware
 
-console = Console()
+
+@cache
+def console():
+    # rich is only needed when slots are actually split, not to load the admin
+    from rich.console import Console
+    return Console()
+
 
 def split_time_slot_into_hourly_slots(slot=None):
     """
@@ -22,28 +29,26 @@ def split_time_slot_into_hourly_slots(slot=None):
         current_time = make_aware(datetime.combine(datetime.today(), ts.start_time))
         end_time = make_aware(datetime.combine(datetime.today(), ts.end_time))
 
-        # Fetch existing splits for the same day to avoid duplicates
-        existing_splits = TimeSlot.objects.filter(is_split=True, day=ts.day).values_list('start_time', 'end_time')
-        existing_time_ranges = {(split[0], split[1]) for split in existing_splits}
-
+        hourly_slots = []
         while current_time < end_time:
             next_hour = current_time + timedelta(hours=1)
             if next_hour > end_time:
                 next_hour = end_time  # Handle remaining portion <1 hour
 
-            # Only create slots if they do not already exist
-            if (current_time.time(), next_hour.time()) not in existing_time_ranges:
-                TimeSlot.objects.create(
-                    day=ts.day,
-                    start_time=current_time.time(),
-                    end_time=next_hour.time(),
-                    is_split=True,
-                    is_original=False
-                )
-                total_created_slots += 1  # Increment slot count
-
+            hourly_slots.append(TimeSlot(
+                day=ts.day,
+                start_time=current_time.time(),
+                end_time=next_hour.time(),
+                is_split=True,
+                is_original=False
+            ))
             current_time = next_hour
 
+        # Existing splits are skipped by the unique_split_time_slot constraint
+        existing_count = TimeSlot.objects.filter(is_original=False, day=ts.day).count()
+        TimeSlot.objects.bulk_create(hourly_slots, ignore_conflicts=True)
+        total_created_slots += TimeSlot.objects.filter(is_original=False, day=ts.day).count() - existing_count
+
         ts.is_split = True
         ts.save()
 
@@ -53,9 +58,9 @@ def split_time_slot_into_hourly_slots(slot=None):
             days_processed.add(ts.day)  # Mark the day as processed
 
     if total_created_slots == 0:
-        console.print("[bold yellow]No slots were created. Ensure original time slots are long enough.[/bold yellow]")
+        console().print("[bold yellow]No slots were created. Ensure original time slots are long enough.[/bold yellow]")
     else:
-        console.print(f"[bold green]Time slots have been split. Total slots created: {total_created_slots}[/bold green]")
+        console().print(f"[bold green]Time slots have been split. Total slots created: {total_created_slots}[/bold green]")
 
 
 def generate_practical_pairs(day=None, max_pairs_per_day=2):
@@ -71,7 +76,7 @@ def generate_practical_pairs(day=None, max_pairs_per_day=2):
         split_slots = TimeSlot.objects.filter(is_split=True, is_original=False).order_by('day', 'start_time')
 
     if not split_slots.exists():
-        console.print("[bold yellow]No split slots available to generate practical pairs.[/bold yellow]")
+        console().print("[bold yellow]No split slots available to generate practical pairs.[/bold yellow]")
         return
 
     # Group slots by day
@@ -79,16 +84,19 @@ def generate_practical_pairs(day=None, max_pairs_per_day=2):
     for ts in split_slots:
         slots_by_day.setdefault(ts.day, []).append(ts)
 
-    total_pairs_created = 0  # Track total created pairs
+    new_pairs = []
+    existing_pairs = set(PracticalPair.objects.filter(
+        first_slot__in=split_slots
+    ).values_list('first_slot_id', 'second_slot_id'))
 
     # Generate practical pairs
     for day, slots in slots_by_day.items():
-        console.print(f"[bold cyan]Processing practical pairs for day: {day}[/bold cyan]")
+        console().print(f"[bold cyan]Processing practical pairs for day: {day}[/bold cyan]")
         pairs_created_today = 0  # Track pairs created for the current day
         for i in range(len(slots) - 1):
             # Stop creating pairs if the daily limit is reached
             if pairs_created_today >= max_pairs_per_day:
-                console.print(
+                console().print(
                     f"[bold green]Maximum practical pairs reached for {day} (Limit: {max_pairs_per_day}).[/bold green]"
                 )
                 break
@@ -99,20 +107,26 @@ def generate_practical_pairs(day=None, max_pairs_per_day=2):
             # Check if the current slot ends where the next slot begins
             if current_slot.end_time == next_slot.start_time:
                 # Avoid duplicate pairs
-                if not PracticalPair.objects.filter(first_slot=current_slot, second_slot=next_slot).exists():
-                    PracticalPair.objects.create(first_slot=current_slot, second_slot=next_slot)
-                    total_pairs_created += 1
+                if (current_slot.id, next_slot.id) not in existing_pairs:
+                    new_pairs.append(PracticalPair(first_slot=current_slot, second_slot=next_slot))
                     pairs_created_today += 1
 
-                    console.print(
+                    console().print(
                         f"[bold green]Created practical pair: {current_slot.start_time}-{current_slot.end_time} and "
                         f"{next_slot.start_time}-{next_slot.end_time}[/bold green]"
                     )
 
+    # Pairs inserted concurrently are skipped by the unique_practical_pair constraint, and
+    # bulk_create returns every object passed to it, so count the rows actually added
+    with transaction.atomic():
+        pairs_before = PracticalPair.objects.count()
+        PracticalPair.objects.bulk_create(new_pairs, ignore_conflicts=True)
+        total_pairs_created = PracticalPair.objects.count() - pairs_before
+
     if total_pairs_created == 0:
-        console.print("[bold yellow]No practical pairs were created. Check your time slots for consecutive availability.[/bold yellow]")
+        console().print("[bold yellow]No practical pairs were created. Check your time slots for consecutive availability.[/bold yellow]")
     else:
-        console.print(f"[bold cyan]Total practical pairs generated: {total_pairs_created}[/bold cyan]")
+        console().print(f"[bold cyan]Total practical pairs generated: {total_pairs_created}[/bold cyan]")
 
 
 
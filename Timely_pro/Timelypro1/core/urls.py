@@ -3,8 +3,8 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 from .views import (
     DegreeViewSet, DepartmentViewSet, SubjectViewSet, FacultyViewSet,
-    ClassroomViewSet, TimeSlotViewSet, TimetableViewSet, NotificationViewSet,
-    StudentViewSet, HomeView
+    ClassroomViewSet, TimeSlotViewSet, TimetableViewSet, TimetableSnapshotViewSet, NotificationViewSet,
+    StudentViewSet, HomeView, InstitutionImportView, generation_progress_stream
 )
 
 router = DefaultRouter()
@@ -15,10 +15,13 @@ router.register(r'faculties', FacultyViewSet)
 router.register(r'classrooms', ClassroomViewSet)
 router.register(r'time-slots', TimeSlotViewSet)
 router.register(r'timetables', TimetableViewSet)
+router.register(r'timetable-snapshots', TimetableSnapshotViewSet)
 router.register(r'notifications', NotificationViewSet)
 router.register(r'students', StudentViewSet)
 
 urlpatterns = [
     path('', HomeView.as_view(), name='home'),
+    path('institution/import/', InstitutionImportView.as_view(), name='institution-import'),
+    path('timetables/runs/<str:run_id>/progress/', generation_progress_stream, name='generation-progress'),
     path('', include(router.urls)),
 ]
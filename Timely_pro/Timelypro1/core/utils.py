@@ -1,26 +1,34 @@
 import logging
 import random
 from collections import defaultdict
-from functools import partial
+from operator import attrgetter
 
 from django.db import transaction
 from deap import base, creator, tools
 from core.models import Timetable, TimeSlot, Subject, PracticalPair
+from classrooms.allocation import allocate_rooms
+from core.clashes import load_subject_clashes, pair
+from core.publish import capture_timetable, publish_timetable
+from core.routers import use_primary
+from core.staffing import assign_faculty
+from core.validation import InvalidTimetable, restrict_report, validate_timetable
 
-# Logging setup
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.DEBUG)
 
-# Initialize DEAP Tools
-creator.create("FitnessMin", base.Fitness, weights=(-1.0,))
-creator.create("Individual", list, fitness=creator.FitnessMin)
-toolbox = base.Toolbox()
+# Initialize DEAP Tools; creator classes are global, so only register them once per process
+if not hasattr(creator, "FitnessMin"):
+    creator.create("FitnessMin", base.Fitness, weights=(-1.0,))
+if not hasattr(creator, "Individual"):
+    creator.create("Individual", list, fitness=creator.FitnessMin)
 
 # Constants
 POPULATION_SIZE = 100
 MUTATION_RATE = 0.3
 CROSSOVER_RATE = 0.9
 GENERATIONS = 300
+SESSIONS_PER_INDIVIDUAL = 40
+MAX_NO_PROGRESS = 10  # Terminate after 10 generations with no improvement
+STUDENT_CLASH_PENALTY = 1  # per student with two sessions in the same slot
 
 # Single classroom for all sessions
 single_classroom = "Room 101"
@@ -65,7 +73,7 @@ def get_sorted_time_slots():
         logger.error(f"Error fetching time slots: {e}")
         return []
 
-def initialize_session(practical_pairs, all_subjects, remaining_time_slots):
+def initialize_session(practical_pairs, all_subjects, remaining_time_slots, rng=random):
     logger.info(f"Initializing session with practical pairs: {practical_pairs}, subjects: {all_subjects}, and time slots: {remaining_time_slots}")
 
     # Filter valid subjects
@@ -80,16 +88,16 @@ def initialize_session(practical_pairs, all_subjects, remaining_time_slots):
     if practical_pairs and practical_subjects:
         valid_pairs = [pair for pair in practical_pairs if pair is not None]
         if valid_pairs:
-            practical_pair = random.choice(valid_pairs)
-            subject = random.choice(practical_subjects)
+            practical_pair = rng.choice(valid_pairs)
+            subject = rng.choice(practical_subjects)
             if subject:
                 practical_pairs.remove(practical_pair)  # Remove assigned pair
                 logger.info(f"Assigned Practical Subject: {subject} to Time Slot Pair: {practical_pair}")
                 return {"subject": subject, "time_slot": (practical_pair.first_slot, practical_pair.second_slot)}
 
     if remaining_time_slots and theory_subjects:
-        time_slot = random.choice(remaining_time_slots)
-        subject = random.choice(theory_subjects)
+        time_slot = rng.choice(remaining_time_slots)
+        subject = rng.choice(theory_subjects)
         if subject:
             remaining_time_slots.remove(time_slot)  # Remove assigned slot
             logger.info(f"Assigned Theory Subject: {subject} to Time Slot: {time_slot}")
@@ -98,10 +106,12 @@ def initialize_session(practical_pairs, all_subjects, remaining_time_slots):
     logger.warning("Failed to initialize a valid session.")
     return {"subject": None, "time_slot": None}
 
-def fitness_function(individual):
+def fitness_function(individual, clashes=None):
     logger.debug("Evaluating fitness for individual...")
     conflicts = 0
     time_slot_usage = set()
+    slot_subjects = defaultdict(list)
+    clashes = clashes or {}
 
     for session in individual:
         if not is_valid_session(session):
@@ -128,6 +138,13 @@ def fitness_function(individual):
             else:
                 time_slot_usage.add(time_slot)
 
+        # Students enrolled in both subjects cannot attend two sessions in one slot
+        for slot in (time_slot if isinstance(time_slot, tuple) else (time_slot,)):
+            for other in slot_subjects[slot]:
+                if other != subject.id:
+                    conflicts += STUDENT_CLASH_PENALTY * clashes.get(pair(subject.id, other), 0)
+            slot_subjects[slot].append(subject.id)
+
         subject_hours = sum(1 for s in individual if is_valid_session(s) and s["subject"] == subject)
         if subject.class_type == "theory" and subject_hours > 3:
             conflicts += 5
@@ -135,25 +152,57 @@ def fitness_function(individual):
     logger.debug(f"Fitness conflicts: {conflicts}")
     return (conflicts,)
 
-def crossover(ind1, ind2):
+def conflict_breakdown(individual, clashes=None):
+    """
+    Splits the conflicts counted by fitness_function into their causes, for
+    progress reporting.
+    """
+    breakdown = {"invalid_sessions": 0, "slot_clashes": 0, "student_clashes": 0, "theory_overload": 0}
+    time_slot_usage = set()
+    slot_subjects = defaultdict(list)
+    subject_hours = defaultdict(int)
+    clashes = clashes or {}
+
+    for session in individual:
+        if not is_valid_session(session) or not hasattr(session["subject"], "class_type"):
+            breakdown["invalid_sessions"] += 1
+            continue
+        subject_hours[session["subject"]] += 1
+        time_slot = session["time_slot"]
+        for slot in (time_slot if isinstance(time_slot, tuple) else (time_slot,)):
+            if slot in time_slot_usage:
+                breakdown["slot_clashes"] += 1
+            else:
+                time_slot_usage.add(slot)
+            for other in slot_subjects[slot]:
+                if other != session["subject"].id:
+                    breakdown["student_clashes"] += clashes.get(pair(session["subject"].id, other), 0)
+            slot_subjects[slot].append(session["subject"].id)
+
+    breakdown["theory_overload"] = sum(
+        hours for subject, hours in subject_hours.items() if subject.class_type == "theory" and hours > 3
+    )
+    return breakdown
+
+def crossover(ind1, ind2, rng=random, rate=None):
     logger.debug("Performing crossover...")
-    if random.random() < CROSSOVER_RATE:
+    if rng.random() < (CROSSOVER_RATE if rate is None else rate):
         if len(ind1) < 2 or len(ind2) < 2:
             logger.warning("Skipping crossover: Individuals too small.")
             return
-        point1 = random.randint(1, len(ind1) - 2)
-        point2 = random.randint(point1, len(ind1) - 1)
+        point1 = rng.randint(1, len(ind1) - 2)
+        point2 = rng.randint(point1, len(ind1) - 1)
         ind1[point1:point2], ind2[point1:point2] = ind2[point1:point2], ind1[point1:point2]
 
-def mutate(individual, practical_pairs, remaining_time_slots, subjects):
+def mutate(individual, practical_pairs, remaining_time_slots, subjects, rng=random, rate=None):
     logger.debug("Applying mutation...")
     
     if not individual:
         logger.warning("Skipping mutation: Individual is empty.")
         return individual
 
-    if random.random() < MUTATION_RATE:
-        slot_idx = random.randint(0, len(individual) - 1)
+    if rng.random() < (MUTATION_RATE if rate is None else rate):
+        slot_idx = rng.randint(0, len(individual) - 1)
         session = individual[slot_idx]
 
         if not is_valid_session(session):
@@ -166,13 +215,13 @@ def mutate(individual, practical_pairs, remaining_time_slots, subjects):
             return individual
 
         # Assign a new random subject
-        session["subject"] = random.choice(valid_subjects)
+        session["subject"] = rng.choice(valid_subjects)
 
         # Handle mutation for practical subjects
         if session["subject"].class_type == "practical" and practical_pairs:
             valid_pairs = [pair for pair in practical_pairs if pair is not None]
             if valid_pairs:
-                practical_pair = random.choice(valid_pairs)
+                practical_pair = rng.choice(valid_pairs)
                 session["time_slot"] = (practical_pair.first_slot, practical_pair.second_slot)
 
                 # Safely remove the practical pair after assignment
@@ -189,7 +238,7 @@ def mutate(individual, practical_pairs, remaining_time_slots, subjects):
         elif remaining_time_slots:
             valid_slots = [slot for slot in remaining_time_slots if slot is not None]
             if valid_slots:
-                time_slot = random.choice(valid_slots)
+                time_slot = rng.choice(valid_slots)
                 session["time_slot"] = time_slot
 
                 # Safely remove the time slot after assignment
@@ -204,53 +253,96 @@ def mutate(individual, practical_pairs, remaining_time_slots, subjects):
     return individual
 
 
-def generate_timetable():
-    logger.info("Starting timetable generation...")
-    try:
-        with transaction.atomic():
-            Timetable.objects.all().delete()
-        logger.info("Cleared existing timetable entries.")
-
-        subjects = [s for s in Subject.objects.all() if s and hasattr(s, "class_type")]
-        practical_pairs = get_sorted_practical_pairs()
-        remaining_time_slots = get_sorted_time_slots()
-
-        if not subjects:
-            logger.error("No valid subjects available.")
-            return {"status": "error", "message": "No valid subjects available."}
-        if not practical_pairs:
-            logger.error("No practical pairs available.")
-            return {"status": "error", "message": "No practical pairs available."}
-        if not remaining_time_slots:
-            logger.error("No time slots available.")
-            return {"status": "error", "message": "No time slots available."}
+class SolverSession:
+    """
+    One timetable generation with everything it mutates: its own DEAP
+    toolbox, random number generator, snapshot of the problem (subjects,
+    practical pairs, time slots, clash matrix) and GA parameters. Sessions
+    share no state, so several can run at once in one process, e.g. one per
+    department.
+    """
+
+    def __init__(
+        self, subjects, practical_pairs, time_slots, clashes=None, department=None, seed=None,
+        population_size=None, generations=None, mutation_rate=None, crossover_rate=None,
+    ):
+        self.subjects = list(subjects)
+        self.practical_pairs = list(practical_pairs)
+        self.time_slots = list(time_slots)
+        self.clashes = clashes or {}
+        self.department = department
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.population_size = population_size or POPULATION_SIZE
+        self.generations = generations or GENERATIONS
+        self.mutation_rate = MUTATION_RATE if mutation_rate is None else mutation_rate
+        self.crossover_rate = CROSSOVER_RATE if crossover_rate is None else crossover_rate
+        # Pools that initial sessions and mutations take slots from
+        self.pair_pool = list(self.practical_pairs)
+        self.slot_pool = list(self.time_slots)
+        self.toolbox = self._build_toolbox()
+
+    @classmethod
+    def from_database(cls, department=None, **parameters):
+        """
+        Snapshots the problem from the database, limited to the subjects of
+        one department when a department id is given.
+        """
+        subjects = Subject.objects.all()
+        if department is not None:
+            subjects = subjects.filter(department_id=department)
+        return cls(
+            [s for s in subjects if s and hasattr(s, "class_type")],
+            get_sorted_practical_pairs(),
+            get_sorted_time_slots(),
+            load_subject_clashes(),
+            department=department,
+            **parameters,
+        )
 
+    def _build_toolbox(self):
+        toolbox = base.Toolbox()
+        toolbox.register("attr_slot", initialize_session, self.pair_pool, self.subjects, self.slot_pool, rng=self.random)
+        toolbox.register("individual", tools.initRepeat, creator.Individual, toolbox.attr_slot, n=SESSIONS_PER_INDIVIDUAL)
+        toolbox.register("population", tools.initRepeat, list, toolbox.individual)
+        toolbox.register("evaluate", fitness_function, clashes=self.clashes)
+        toolbox.register("mate", crossover, rng=self.random, rate=self.crossover_rate)
         toolbox.register(
-            "attr_slot", partial(initialize_session, practical_pairs, subjects, remaining_time_slots)
+            "mutate", mutate, practical_pairs=self.pair_pool, remaining_time_slots=self.slot_pool,
+            subjects=self.subjects, rng=self.random, rate=self.mutation_rate,
         )
-        toolbox.register("individual", tools.initRepeat, creator.Individual, toolbox.attr_slot, n=40)
-        toolbox.register("population", tools.initRepeat, list, toolbox.individual)
-        toolbox.register("evaluate", fitness_function)
-        toolbox.register("mate", crossover)
-        toolbox.register("mutate", partial(mutate, practical_pairs, remaining_time_slots, subjects))
-        toolbox.register("select", tools.selTournament, tournsize=3)
+        toolbox.register("select", self.select_tournament, tournsize=3)
+        return toolbox
+
+    def select_tournament(self, individuals, k, tournsize):
+        # tools.selTournament draws from the global random module
+        return [
+            max((self.random.choice(individuals) for _ in range(tournsize)), key=attrgetter("fitness"))
+            for _ in range(k)
+        ]
+
+    def evaluate(self, individuals):
+        for ind, fit in zip(individuals, map(self.toolbox.evaluate, individuals)):
+            ind.fitness.values = fit
 
-        population = toolbox.population(n=POPULATION_SIZE)
+    def evolve(self, run=None):
+        """
+        Runs the GA and returns the best individual, or None when the
+        population could not be built or the run was cancelled.
+        """
+        toolbox = self.toolbox
+        population = toolbox.population(n=self.population_size)
         if not population:
             logger.error("Population initialization failed.")
-            return {"status": "error", "message": "Population initialization failed."}
-
-        fitnesses = list(map(toolbox.evaluate, population))
-        for ind, fit in zip(population, fitnesses):
-            ind.fitness.values = fit
+            return None
+        self.evaluate(population)
 
         # Track early termination
         best_fitness = None
         no_progress_count = 0
-        MAX_NO_PROGRESS = 10  # Terminate after 10 generations with no improvement
 
-        for gen in range(GENERATIONS):
-            logger.info(f"Generation {gen + 1}/{GENERATIONS}")
+        for gen in range(self.generations):
+            logger.info(f"Generation {gen + 1}/{self.generations}")
 
             # Select, crossover, and mutate the population
             offspring = toolbox.select(population, len(population))
@@ -265,17 +357,20 @@ def generate_timetable():
                 del mutant.fitness.values
 
             # Evaluate invalid individuals
-            invalid_ind = [ind for ind in offspring if not ind.fitness.valid]
-            fitnesses = map(toolbox.evaluate, invalid_ind)
-            for ind, fit in zip(invalid_ind, fitnesses):
-                ind.fitness.values = fit
-
+            self.evaluate([ind for ind in offspring if not ind.fitness.valid])
             population[:] = offspring
 
             # Check the best fitness in the current generation
             best_in_gen = tools.selBest(population, 1)[0]
             logger.info(f"Best fitness in generation {gen + 1}: {best_in_gen.fitness.values[0]}")
 
+            if run is not None:
+                mean_fitness = sum(ind.fitness.values[0] for ind in population) / len(population)
+                run.report(gen + 1, best_in_gen.fitness.values[0], mean_fitness, conflict_breakdown(best_in_gen, self.clashes))
+                if run.cancelled:
+                    logger.warning(f"Generation run {run.id} cancelled after {gen + 1} generations.")
+                    return None
+
             # Early termination check
             if best_fitness is None or best_in_gen.fitness.values[0] < best_fitness:
                 best_fitness = best_in_gen.fitness.values[0]
@@ -287,38 +382,121 @@ def generate_timetable():
                 logger.warning(f"No improvement for {MAX_NO_PROGRESS} generations. Terminating early.")
                 break
 
-        # Final best individual
         best_ind = tools.selBest(population, 1)[0]
         logger.info(f"Best individual's fitness: {best_ind.fitness.values[0]}")
+        return best_ind
+
+
+@use_primary()
+def generate_timetable(run=None, department=None, seed=None):
+    """
+    Generates and publishes a new timetable. When a GenerationRun is given,
+    per-generation progress is reported to it and the run can be cancelled,
+    in which case the current timetable is left untouched; so is a timetable
+    that breaks a hard constraint once saved. With a department
+    id only that department's subjects are scheduled and only its entries
+    replaced.
+    """
+    logger.info("Starting timetable generation...")
+    try:
+        previous_version, previous_rows = capture_timetable()
+        session = SolverSession.from_database(department=department, seed=seed)
 
-        # Save the timetable
-        for session in best_ind:
-            if is_valid_session(session) and hasattr(session["subject"], "department"):
-                try:
-                    if isinstance(session["time_slot"], tuple):
-                        for slot in session["time_slot"]:
-                            Timetable.objects.create(
-                                department=session["subject"].department,
-                                faculty=None,
-                                subject=session["subject"],
-                                classroom=None,
-                                time_slot=slot
-                            )
-                    else:
-                        Timetable.objects.create(
-                            department=session["subject"].department,
-                            faculty=None,
-                            subject=session["subject"],
-                            classroom=None,
-                            time_slot=session["time_slot"]
-                        )
-                except Exception as e:
-                    logger.error(f"Error saving session: {e}")
+        if not session.subjects:
+            logger.error("No valid subjects available.")
+            return {"status": "error", "message": "No valid subjects available."}
+        if not session.practical_pairs:
+            logger.error("No practical pairs available.")
+            return {"status": "error", "message": "No practical pairs available."}
+        if not session.time_slots:
+            logger.error("No time slots available.")
+            return {"status": "error", "message": "No time slots available."}
+
+        best_ind = session.evolve(run)
+        if best_ind is None:
+            if run is not None and run.cancelled:
+                return {"status": "error", "message": "Timetable generation was cancelled."}
+            return {"status": "error", "message": "Population initialization failed."}
 
+        # Replace the timetable in one transaction so readers never see it empty
+        with transaction.atomic():
+            entries = Timetable.objects.all()
+            if department is not None:
+                entries = entries.filter(department_id=department)
+            entries.delete()
+            logger.info("Cleared existing timetable entries.")
+            save_sessions(best_ind)
+            rooms = allocate_rooms(department=department)
+            staffing = assign_faculty(department=department)
+
+            # Nothing is published unless the saved timetable meets every hard constraint
+            report = validate_timetable(check_enrollments=False)
+            if department is not None:
+                report = restrict_report(report, Timetable.objects.filter(department_id=department).values_list('id', flat=True))
+            if not report["valid"]:
+                raise InvalidTimetable(report)
+
+        publish_timetable(
+            previous_rows,
+            fitness=best_ind.fitness.values[0],
+            metadata={
+                "run_id": run.id if run is not None else None,
+                "generations": session.generations,
+                "department": department,
+                "seed": seed,
+            },
+            previous_version=previous_version,
+        )
+
+    except InvalidTimetable as e:
+        logger.error(f"Generated timetable rejected: {e}")
+        return {
+            "status": "error",
+            "message": "Generated timetable violates hard constraints; the current timetable was kept.",
+            "violations": e.report["counts"],
+        }
     except Exception as e:
         logger.error(f"An error occurred: {e}", exc_info=True)
         return {"status": "error", "message": str(e)}
 
     logger.info("Timetable generation completed successfully.")
-    return {"status": "success", "message": "Timetable generated successfully."}
-
+    return {
+        "status": "success",
+        "message": "Timetable generated successfully.",
+        "violations": report["counts"],
+        "unassigned_rooms": len(rooms["unassigned"]),
+        "unassigned_subjects": staffing["unassigned_subjects"],
+    }
+
+
+def save_sessions(best_ind):
+    """
+    Stores the sessions of the best individual as Timetable rows.
+    """
+    for session in best_ind:
+        if is_valid_session(session) and hasattr(session["subject"], "department"):
+            try:
+                with transaction.atomic():
+                    save_session(session)
+            except Exception as e:
+                logger.error(f"Error saving session: {e}")
+
+
+def save_session(session):
+    if isinstance(session["time_slot"], tuple):
+        for slot in session["time_slot"]:
+            Timetable.objects.create(
+                department=session["subject"].department,
+                faculty=None,
+                subject=session["subject"],
+                classroom=None,
+                time_slot=slot
+            )
+    else:
+        Timetable.objects.create(
+            department=session["subject"].department,
+            faculty=None,
+            subject=session["subject"],
+            classroom=None,
+            time_slot=session["time_slot"]
+        )
@@ -0,0 +1,164 @@
+#core/validation.py
+import logging
+from collections import Counter, defaultdict, namedtuple
+
+from django.db.models import Count, F
+
+from core.models import Classroom, Student, Subject, TimeSlot, Timetable
+
+logger = logging.getLogger(__name__)
+
+Entry = namedtuple('Entry', ['id', 'department_id', 'subject_id', 'faculty_id', 'classroom_id', 'time_slot_id'])
+
+CONSTRAINTS = (
+    'original_slot',
+    'faculty_conflict',
+    'classroom_conflict',
+    'classroom_capacity',
+    'subject_department',
+    'enrollment_department',
+)
+
+
+def load_entries():
+    return [Entry(*row) for row in Timetable.objects.values_list(*Entry._fields)]
+
+
+class InvalidTimetable(Exception):
+    def __init__(self, report):
+        super().__init__(f"Timetable violates hard constraints: {report['counts']}")
+        self.report = report
+
+
+def enrollment_department_violations(student=None):
+    """
+    Enrollments in a subject of another department, for every student or,
+    given a (possibly edited) student, for that student's department.
+    """
+    enrollments = Student.subjects.through.objects
+    if student is None:
+        mismatched = enrollments.exclude(subject__department_id=F('student__department_id'))
+    else:
+        mismatched = enrollments.filter(student_id=student.pk).exclude(subject__department_id=student.department_id)
+    mismatched = mismatched.values_list('student_id', 'subject_id', 'subject__name')
+    return [
+        {
+            "student": student_id,
+            "subject": subject_id,
+            "message": f"Subject {subject_name} is not offered by the student's department.",
+        }
+        for student_id, subject_id, subject_name in mismatched
+    ]
+
+
+def validate_timetable(entries=None, check_enrollments=True):
+    """
+    Checks every hard constraint of a timetable at once. Reference data
+    (slots, rooms, subjects, enrollment counts) is loaded with one query each
+    and conflicts are found with hash-map occupancy, so the cost is linear in
+    the number of entries. Entries default to the stored timetable; unsaved
+    ones (e.g. from the generator) may be passed as Entry tuples with id None.
+    Returns a report with the violations grouped per constraint.
+    """
+    if entries is None:
+        entries = load_entries()
+
+    slot_ids = {entry.time_slot_id for entry in entries}
+    subject_ids = {entry.subject_id for entry in entries}
+    room_ids = {entry.classroom_id for entry in entries if entry.classroom_id}
+
+    original_slots = set(TimeSlot.objects.filter(id__in=slot_ids, is_original=True).values_list('id', flat=True))
+    capacities = dict(Classroom.objects.filter(id__in=room_ids).values_list('id', 'capacity'))
+    subject_departments = dict(Subject.objects.filter(id__in=subject_ids).values_list('id', 'department_id'))
+    enrolled = Counter(dict(
+        Student.subjects.through.objects.filter(subject_id__in=subject_ids)
+        .values('subject_id').annotate(total=Count('id')).values_list('subject_id', 'total')
+    ))
+
+    violations = defaultdict(list)
+    faculty_occupancy = {}
+    classroom_occupancy = {}
+
+    for entry in entries:
+        if entry.time_slot_id in original_slots:
+            violations['original_slot'].append({
+                "entries": [entry.id],
+                "message": "Cannot use original time slots in a timetable. Use split slots only.",
+            })
+
+        if entry.faculty_id:
+            key = (entry.faculty_id, entry.time_slot_id)
+            if key in faculty_occupancy:
+                violations['faculty_conflict'].append({
+                    "entries": [faculty_occupancy[key], entry.id],
+                    "faculty": entry.faculty_id,
+                    "time_slot": entry.time_slot_id,
+                    "message": "Faculty is already assigned during this time.",
+                })
+            else:
+                faculty_occupancy[key] = entry.id
+
+        if entry.classroom_id:
+            key = (entry.classroom_id, entry.time_slot_id)
+            if key in classroom_occupancy:
+                violations['classroom_conflict'].append({
+                    "entries": [classroom_occupancy[key], entry.id],
+                    "classroom": entry.classroom_id,
+                    "time_slot": entry.time_slot_id,
+                    "message": "Classroom is already booked during this time.",
+                })
+            else:
+                classroom_occupancy[key] = entry.id
+
+            capacity = capacities.get(entry.classroom_id, 0)
+            if capacity < enrolled[entry.subject_id]:
+                violations['classroom_capacity'].append({
+                    "entries": [entry.id],
+                    "classroom": entry.classroom_id,
+                    "capacity": capacity,
+                    "enrolled": enrolled[entry.subject_id],
+                    "message": "Classroom capacity is insufficient for the assigned subject.",
+                })
+
+        if subject_departments.get(entry.subject_id) != entry.department_id:
+            violations['subject_department'].append({
+                "entries": [entry.id],
+                "message": "The subject does not belong to the timetable entry's department.",
+            })
+
+    if check_enrollments:
+        violations['enrollment_department'] = enrollment_department_violations()
+
+    counts = {constraint: len(violations.get(constraint, [])) for constraint in CONSTRAINTS}
+    report = {
+        "valid": not any(counts.values()),
+        "entries": len(entries),
+        "counts": counts,
+        "violations": {constraint: violations.get(constraint, []) for constraint in CONSTRAINTS},
+    }
+    logger.info(f"Validated {len(entries)} timetable entries: {counts}")
+    return report
+
+
+def restrict_report(report, entry_ids):
+    """
+    Keeps only the violations of a report that involve one of the given
+    entries, e.g. those a department-only generation is responsible for.
+    """
+    entry_ids = set(entry_ids)
+    violations = {
+        constraint: [violation for violation in items if entry_ids & set(violation.get("entries", ()))]
+        for constraint, items in report["violations"].items()
+    }
+    counts = {constraint: len(items) for constraint, items in violations.items()}
+    return dict(report, valid=not any(counts.values()), counts=counts, violations=violations)
+
+
+def entry_errors(entry):
+    """
+    Messages for the constraints a single entry breaks on its own (slot,
+    capacity, department). Conflicts with other entries are left to the
+    unique constraints on Timetable.
+    """
+    report = validate_timetable([entry], check_enrollments=False)
+    return [violation["message"] for items in report["violations"].values() for violation in items]
@@ -0,0 +1,50 @@
+#core/versioning.py
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+TIMETABLE_SCOPE = 'timetable'
+
+
+def model_scope(model):
+    return f"model:{model._meta.label_lower}"
+
+
+def _version_key(scope):
+    return f"version:{scope}"
+
+
+def _cache():
+    return caches[getattr(settings, 'VERSION_CACHE_ALIAS', 'default')]
+
+
+def get_version(scope=TIMETABLE_SCOPE):
+    """
+    Returns the current version token of a scope as a float timestamp.
+    The token is created lazily the first time a scope is read.
+    """
+    cache = _cache()
+    key = _version_key(scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time(), timeout=None)
+        version = cache.get(key, time.time())
+    return version
+
+
+def bump_version(scope=TIMETABLE_SCOPE):
+    """
+    Moves a scope to a new version so that every cache entry keyed on the
+    previous token is ignored from now on.
+    """
+    cache = _cache()
+    key = _version_key(scope)
+    previous = cache.get(key) or 0
+    version = max(time.time(), previous + 0.000001)
+    cache.set(key, version, timeout=None)
+    return version
+
+
+def format_version(version):
+    return f"{version:.6f}"
@@ -1,4 +1,9 @@
+import tempfile
+from functools import partial
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
 from rest_framework import viewsets, status
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
@@ -7,15 +12,33 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.views.generic import TemplateView
 from django.contrib.auth import get_user_model
-from core.utils import generate_timetable
+from core.progress import get_run, run_channel, run_generation, start_background_generation, start_run
+from core.grids import GRID_KINDS, get_grid
+from core.ical import get_calendar
+from core.conditional import ConditionalGetMixin
+from core.importer import import_institution
+from core.publish import capture_timetable, publish_timetable, restore_snapshot
+from core.routers import use_primary
+from core.snapshots import diff_snapshots
+from core.staffing import assign_faculty
+from core.permissions import IsAdmin
+from core.exports import EXPORT_FORMATS, iter_export_rows, stream_csv, timetable_export_queryset, write_xlsx
+from core.response_cache import CachedResponseMixin
+from core.validation import validate_timetable
+from core.versioning import TIMETABLE_SCOPE
 from .models import (
     Degree, Department, Subject, Faculty, Classroom,
-    TimeSlot, Timetable, Notification, Student
+    TimeSlot, Timetable, TimetableSnapshot, Notification, Student
 )
+from users.models import Role
+from users.authentication import HashedTokenAuthentication
+from users.roles import get_user_roles
+from notifications.pubsub import get_broker
+from notifications.sse import authenticate_stream, event_stream, sse_response
 from .serializers import (
     DegreeSerializer, DepartmentSerializer, SubjectSerializer,
     FacultySerializer, ClassroomSerializer, TimeSlotSerializer,
-    TimetableSerializer, NotificationSerializer, StudentSerializer
+    TimetableSerializer, TimetableSnapshotSerializer, NotificationSerializer, StudentSerializer
 )
 
 import logging
@@ -27,79 +50,289 @@ class HomeView(TemplateView):
     template_name = 'core/home.html'
 
 
-class DegreeViewSet(viewsets.ModelViewSet):
+class DegreeViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Degree.objects.all()
     serializer_class = DegreeSerializer
+    version_models = (Degree,)
     permission_classes = [IsAuthenticated]
-    authentication_classes = [SessionAuthentication, BasicAuthentication]
+    authentication_classes = [HashedTokenAuthentication, SessionAuthentication, BasicAuthentication]
 
 
-class DepartmentViewSet(viewsets.ModelViewSet):
+class DepartmentViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Department.objects.all()
     serializer_class = DepartmentSerializer
+    version_models = (Department, Degree)
     permission_classes = [IsAuthenticated]
-    authentication_classes = [SessionAuthentication, BasicAuthentication]
+    authentication_classes = [HashedTokenAuthentication, SessionAuthentication, BasicAuthentication]
 
 
-class SubjectViewSet(viewsets.ModelViewSet):
+class SubjectViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Subject.objects.all()
     serializer_class = SubjectSerializer
+    version_models = (Subject, Department, Degree)
     permission_classes = [IsAuthenticated]
-    authentication_classes = [SessionAuthentication, BasicAuthentication]
+    authentication_classes = [HashedTokenAuthentication, SessionAuthentication, BasicAuthentication]
 
 
-class FacultyViewSet(viewsets.ModelViewSet):
+class FacultyViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Faculty.objects.all()
     serializer_class = FacultySerializer
+    version_models = (Faculty, CustomUser, Role, Department, Degree, Subject)
     permission_classes = [IsAuthenticated]
-    authentication_classes = [SessionAuthentication, BasicAuthentication]
+    authentication_classes = [HashedTokenAuthentication, SessionAuthentication, BasicAuthentication]
 
 
-class ClassroomViewSet(viewsets.ModelViewSet):
+class ClassroomViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Classroom.objects.all()
     serializer_class = ClassroomSerializer
+    version_models = (Classroom,)
     permission_classes = [IsAuthenticated]
-    authentication_classes = [SessionAuthentication, BasicAuthentication]
+    authentication_classes = [HashedTokenAuthentication, SessionAuthentication, BasicAuthentication]
 
 
-class TimeSlotViewSet(viewsets.ModelViewSet):
+class TimeSlotViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
     queryset = TimeSlot.objects.all()
     serializer_class = TimeSlotSerializer
+    version_models = (TimeSlot,)
     permission_classes = [IsAuthenticated]
-    authentication_classes = [SessionAuthentication, BasicAuthentication]
+    authentication_classes = [HashedTokenAuthentication, SessionAuthentication, BasicAuthentication]
 
 
-class TimetableViewSet(viewsets.ModelViewSet):
+class TimetableViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Timetable.objects.all()
     serializer_class = TimetableSerializer
+    version_scopes = (TIMETABLE_SCOPE,)
+    version_models = (Timetable, Department, Degree, Faculty, Student, CustomUser, Role, Subject, Classroom, TimeSlot)
     permission_classes = [IsAuthenticated]
-    authentication_classes = [SessionAuthentication, BasicAuthentication]
+    authentication_classes = [HashedTokenAuthentication, SessionAuthentication, BasicAuthentication]
 
     @action(detail=False, methods=['post'])
     def generate(self, request):
+        """
+        Generates the timetable. With ?background=1 the generation runs in a
+        worker thread and the run id is returned right away; its progress is
+        streamed at /timetables/runs/<run_id>/progress/. ?department= limits
+        the generation to one department's subjects.
+        """
+        # The solver stack (DEAP) is only loaded once a generation actually runs
+        from core.utils import GENERATIONS, generate_timetable
+
+        department = request.query_params.get('department')
+        if department:
+            try:
+                generate_timetable = partial(generate_timetable, department=int(department))
+            except ValueError:
+                return Response({"message": "Invalid department id."}, status=status.HTTP_400_BAD_REQUEST)
+
         try:
-            result = generate_timetable()
+            if request.query_params.get('background') in ('1', 'true'):
+                run = start_background_generation(generate_timetable, GENERATIONS)
+                return Response(
+                    {"message": "Timetable generation started.", "run_id": run.id},
+                    status=status.HTTP_202_ACCEPTED
+                )
+
+            run = start_run(GENERATIONS)
+            result = run_generation(run, generate_timetable)
             if result['status'] == 'success':
-                return Response({"message": result['message']})
+                return Response({"message": result['message'], "run_id": run.id, "violations": result.get('violations')})
             else:
-                return Response({"message": result['message']}, status=status.HTTP_400_BAD_REQUEST)
+                return Response(
+                    {"message": result['message'], "run_id": run.id, "violations": result.get('violations')},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
         except Exception as e:
             logger.error(f"Error generating timetable: {str(e)}", exc_info=True)
             return Response({"message": "An error occurred during timetable generation."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @action(detail=False, methods=['get'], url_path=r'runs/(?P<run_id>[0-9a-f]+)')
+    def run_status(self, request, run_id=None):
+        run = get_run(run_id)
+        if run is None:
+            return Response({"message": "Generation run not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"run_id": run.id, "status": run.status, "latest": run.latest})
+
+    @action(
+        detail=False, methods=['post'], url_path=r'runs/(?P<run_id>[0-9a-f]+)/cancel',
+        permission_classes=[IsAuthenticated, IsAdmin]
+    )
+    def cancel_run(self, request, run_id=None):
+        run = get_run(run_id)
+        if run is None:
+            return Response({"message": "Generation run not found."}, status=status.HTTP_404_NOT_FOUND)
+        if run.status != 'running':
+            return Response({"message": f"Generation run already {run.status}."}, status=status.HTTP_409_CONFLICT)
+        run.cancel()
+        return Response({"message": "Cancellation requested.", "run_id": run.id}, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, IsAdmin])
+    def validate(self, request):
+        """
+        Checks the whole timetable against every hard constraint and returns
+        the violations grouped per constraint.
+        """
+        try:
+            return Response(validate_timetable())
+        except Exception as e:
+            logger.error(f"Error validating timetable: {str(e)}", exc_info=True)
+            return Response({"message": "An error occurred during timetable validation."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @action(detail=False, methods=['post'], url_path='assign-faculty', permission_classes=[IsAuthenticated, IsAdmin])
+    @use_primary()
+    def faculty_assignment(self, request):
+        """
+        Re-assigns qualified faculty to every subject of the current timetable
+        and publishes it.
+        """
+        try:
+            previous_version, previous_rows = capture_timetable()
+            result = assign_faculty()
+            publish_timetable(previous_rows, metadata={"stage": "faculty_assignment"}, previous_version=previous_version)
+        except Exception as e:
+            logger.error(f"Error assigning faculty: {str(e)}", exc_info=True)
+            return Response({"message": "An error occurred during faculty assignment."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response(result)
+
+    @action(detail=False, methods=['get'])
+    def grid(self, request):
+        """
+        Returns the precomputed day x period grid of exactly one of
+        ?department=, ?faculty=, ?classroom= or ?student=.
+        """
+        return self.conditional_response(request, self._grid_response)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Streams the timetable as CSV or XLSX (?file_type=), optionally limited
+        to a ?department= or ?faculty=.
+        """
+        file_type = request.query_params.get('file_type', 'csv')
+        if file_type not in EXPORT_FORMATS:
+            return Response(
+                {"message": f"file_type must be one of: {', '.join(EXPORT_FORMATS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        filters = {}
+        for name in ('department', 'faculty'):
+            if name in request.query_params:
+                try:
+                    filters[name] = int(request.query_params[name])
+                except ValueError:
+                    return Response({"message": f"Invalid {name} id."}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = iter_export_rows(timetable_export_queryset(**filters))
+        if file_type == 'csv':
+            response = StreamingHttpResponse(stream_csv(rows), content_type='text/csv')
+            response['Content-Disposition'] = 'attachment; filename="timetable.csv"'
+            return response
+
+        target = tempfile.TemporaryFile()
+        write_xlsx(rows, target)
+        target.seek(0)
+        return FileResponse(
+            target,
+            as_attachment=True,
+            filename='timetable.xlsx',
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+
+    @action(detail=False, methods=['get'])
+    def ical(self, request):
+        """
+        Returns an iCalendar feed of weekly recurring events for exactly one of
+        ?department=, ?faculty=, ?classroom= or ?student=.
+        """
+        entity, error = self._grid_entity(request)
+        if error:
+            return error
+
+        kind, entity_id = entity
+        body = get_calendar(kind, entity_id)
+        if body is None:
+            return Response({"message": f"{kind.capitalize()} not found."}, status=status.HTTP_404_NOT_FOUND)
+        response = HttpResponse(body, content_type='text/calendar; charset=utf-8')
+        response['Content-Disposition'] = f'inline; filename="timetable-{kind}-{entity_id}.ics"'
+        return response
+
+    def _grid_entity(self, request):
+        requested = [kind for kind in GRID_KINDS if kind in request.query_params]
+        if len(requested) != 1:
+            return None, Response(
+                {"message": f"Provide exactly one of: {', '.join(GRID_KINDS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        kind = requested[0]
+        try:
+            return (kind, int(request.query_params[kind])), None
+        except ValueError:
+            return None, Response({"message": f"Invalid {kind} id."}, status=status.HTTP_400_BAD_REQUEST)
+
+    def _grid_response(self, request):
+        entity, error = self._grid_entity(request)
+        if error:
+            return error
+
+        kind, entity_id = entity
+        grid = get_grid(kind, entity_id)
+        if grid is None:
+            return Response({"message": f"{kind.capitalize()} not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(grid)
+
 
-class NotificationViewSet(viewsets.ModelViewSet):
+class TimetableSnapshotViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = TimetableSnapshot.objects.defer('data')
+    serializer_class = TimetableSnapshotSerializer
+    # Snapshots are only written and pruned while a timetable is published
+    version_scopes = (TIMETABLE_SCOPE,)
+    permission_classes = [IsAuthenticated, IsAdmin]
+    authentication_classes = [HashedTokenAuthentication, SessionAuthentication, BasicAuthentication]
+
+    @action(detail=True, methods=['get'])
+    def diff(self, request, pk=None):
+        """
+        Lists the entries added and removed from this snapshot to the one
+        given by ?to= (the latest snapshot by default).
+        """
+        old = self.get_object()
+        other = request.query_params.get('to')
+        if other:
+            try:
+                new = TimetableSnapshot.objects.filter(pk=int(other)).first()
+            except ValueError:
+                return Response({"message": "Invalid snapshot id."}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            new = TimetableSnapshot.objects.first()
+        if new is None:
+            return Response({"message": "Snapshot to compare against not found."}, status=status.HTTP_404_NOT_FOUND)
+        return self.conditional_response(request, lambda request: Response(diff_snapshots(old, new)))
+
+    @action(detail=True, methods=['post'])
+    def restore(self, request, pk=None):
+        try:
+            result = restore_snapshot(self.get_object())
+            return Response(result)
+        except Exception as e:
+            logger.error(f"Error restoring timetable snapshot: {str(e)}", exc_info=True)
+            return Response({"message": "An error occurred while restoring the timetable."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class NotificationViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Notification.objects.all()
     serializer_class = NotificationSerializer
+    version_models = (Notification, CustomUser, Role)
     permission_classes = [IsAuthenticated]
-    authentication_classes = [SessionAuthentication, BasicAuthentication]
+    authentication_classes = [HashedTokenAuthentication, SessionAuthentication, BasicAuthentication]
 
 
-class StudentViewSet(viewsets.ModelViewSet):
+class StudentViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Student.objects.all()
     serializer_class = StudentSerializer
+    version_models = (Student, CustomUser, Role, Department, Degree, Subject)
     permission_classes = [IsAuthenticated]
-    authentication_classes = [SessionAuthentication, BasicAuthentication]
+    authentication_classes = [HashedTokenAuthentication, SessionAuthentication, BasicAuthentication]
 
 
 class TimetableGenerateView(APIView):
@@ -107,9 +340,11 @@ class TimetableGenerateView(APIView):
     API endpoint to trigger timetable generation.
     """
     permission_classes = [IsAuthenticated]
-    authentication_classes = [SessionAuthentication, BasicAuthentication]
+    authentication_classes = [HashedTokenAuthentication, SessionAuthentication, BasicAuthentication]
 
     def post(self, request, *args, **kwargs):
+        from core.utils import generate_timetable
+
         try:
             result = generate_timetable()
             if result["status"] == "success":
@@ -120,6 +355,47 @@ class TimetableGenerateView(APIView):
             return Response({"message": "An unexpected error occurred."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class InstitutionImportView(APIView):
+    """
+    API endpoint to bulk import an institution config (degrees, departments,
+    rooms, faculty, days, time slots and subjects). Pass ?dry_run=1 to only validate.
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+    authentication_classes = [HashedTokenAuthentication, SessionAuthentication, BasicAuthentication]
+
+    def post(self, request, *args, **kwargs):
+        dry_run = request.query_params.get('dry_run') in ('1', 'true')
+        try:
+            result = import_institution(request.data, dry_run=dry_run)
+            if result["status"] == "success":
+                return Response(result, status=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED)
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Error in InstitutionImportView: {str(e)}", exc_info=True)
+            return Response({"message": "An unexpected error occurred."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+async def generation_progress_stream(request, run_id):
+    """
+    Server-Sent Events stream of a generation run: per-generation best and
+    mean fitness, conflict breakdown and ETA, ending with a finished event.
+    Restricted to admins and meant to be served by the ASGI app.
+    """
+    user = await authenticate_stream(request)
+    if user is None:
+        return JsonResponse({"message": "Authentication credentials were not provided."}, status=401)
+    if 'Admin' not in await sync_to_async(get_user_roles)(user):
+        return JsonResponse({"message": "You do not have permission to perform this action."}, status=403)
+
+    run = get_run(run_id)
+    if run is None:
+        return JsonResponse({"message": "Generation run not found."}, status=404)
+
+    subscription = get_broker().subscribe([run_channel(run.id)])
+    initial = [run.latest] if run.latest else []
+    return sse_response(event_stream(subscription, initial, until=lambda event: event["type"] == "finished"))
+
+
 class HomeAPIView(APIView):
     def get(self, request, *args, **kwargs):
         return Response({"message": "Welcome to Shedulify"})
@@ -1,3 +1,16 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Exam, ExamSession
+
+
+@admin.register(ExamSession)
+class ExamSessionAdmin(admin.ModelAdmin):
+    list_display = ('number', 'date', 'start_time')
+
+
+@admin.register(Exam)
+class ExamAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'session', 'candidates')
+    search_fields = ('subject__name', 'subject__code')
+    list_filter = ('session',)
+    filter_horizontal = ('classrooms',)
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from examinations.scheduler import IMPROVEMENT_PASSES, schedule_exams
+
+
+class Command(BaseCommand):
+    help = "Schedules one clash-free exam per subject from the student enrollments."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-sessions', type=int, default=None)
+        parser.add_argument('--passes', type=int, default=IMPROVEMENT_PASSES, help="Local improvement passes.")
+        parser.add_argument('--dry-run', action='store_true', help="Compute the schedule without saving it.")
+
+    def handle(self, *args, **options):
+        result = schedule_exams(max_sessions=options['max_sessions'], passes=options['passes'], save=not options['dry_run'])
+        style = self.style.SUCCESS if result['status'] == 'success' else self.style.WARNING
+        self.stdout.write(style(str(result)))
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.3 on 2026-10-19 09:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('core', '0012_timetablesnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField(unique=True)),
+                ('date', models.DateField(blank=True, null=True)),
+                ('start_time', models.TimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['number'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Exam',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('candidates', models.PositiveIntegerField(default=0)),
+                ('classrooms', models.ManyToManyField(blank=True, related_name='exams', to='core.classroom')),
+                ('subject', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='exam', to='core.subject')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exams', to='examinations.examsession')),
+            ],
+        ),
+    ]
@@ -1,3 +1,27 @@
 from django.db import models
 
-# Create your models here.
+from core.models import Classroom, Subject
+
+
+# ExamSession Model
+class ExamSession(models.Model):
+    number = models.PositiveIntegerField(unique=True)
+    date = models.DateField(null=True, blank=True)
+    start_time = models.TimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['number']
+
+    def __str__(self):
+        return f"Exam session {self.number}"
+
+
+# Exam Model
+class Exam(models.Model):
+    subject = models.OneToOneField(Subject, on_delete=models.CASCADE, related_name='exam')
+    session = models.ForeignKey(ExamSession, on_delete=models.CASCADE, related_name='exams')
+    classrooms = models.ManyToManyField(Classroom, related_name='exams', blank=True)
+    candidates = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.subject.code} in session {self.session.number}"
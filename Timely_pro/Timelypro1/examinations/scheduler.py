@@ -0,0 +1,267 @@
+#examinations/scheduler.py
+import bisect
+import heapq
+import logging
+import time
+from collections import Counter, defaultdict
+from itertools import combinations
+
+from django.db import transaction
+
+from core.models import Classroom, Student, Subject
+from examinations.models import Exam, ExamSession
+
+logger = logging.getLogger(__name__)
+
+# Penalty for a student sitting exams 1..5 sessions apart, as in the Carter benchmarks
+PROXIMITY_WEIGHTS = {1: 16, 2: 8, 3: 4, 4: 2, 5: 1}
+IMPROVEMENT_PASSES = 3
+
+
+def build_conflict_graph():
+    """
+    Returns (enrolled, graph): the number of students per subject and a
+    sparse adjacency map subject -> {subject: shared students}, built in one
+    pass over the enrollments.
+    """
+    subjects_by_student = defaultdict(list)
+    enrollments = Student.subjects.through.objects.values_list('student_id', 'subject_id')
+    for student_id, subject_id in enrollments.iterator(chunk_size=10000):
+        subjects_by_student[student_id].append(subject_id)
+
+    enrolled = Counter()
+    shared = Counter()
+    for subject_ids in subjects_by_student.values():
+        subject_ids = sorted(set(subject_ids))
+        enrolled.update(subject_ids)
+        shared.update(combinations(subject_ids, 2))
+
+    graph = defaultdict(dict)
+    for (first, second), weight in shared.items():
+        graph[first][second] = weight
+        graph[second][first] = weight
+    return enrolled, graph
+
+
+class SessionRooms:
+    """
+    Rooms still free in one exam session. Every room seats one exam, so an
+    exam fits while the free rooms together still seat all its candidates.
+    """
+
+    def __init__(self, rooms):
+        self.free = sorted((capacity, room_id) for room_id, capacity in rooms)
+        self.capacities = {room_id: capacity for room_id, capacity in rooms}
+        self.capacity = sum(self.capacities.values())
+
+    def fits(self, size):
+        return size <= self.capacity
+
+    def take(self, size):
+        """
+        Picks the smallest free room that seats everyone, or else the largest
+        rooms until everyone is seated. Returns the room ids taken, or None
+        (taking nothing) when the free rooms cannot seat everyone.
+        """
+        if not self.fits(size):
+            return None
+        index = bisect.bisect_left(self.free, (size, -1))
+        if index < len(self.free):
+            capacity, room_id = self.free.pop(index)
+            self.capacity -= capacity
+            return [room_id]
+        taken = []
+        while size > 0:
+            capacity, room_id = self.free.pop()
+            self.capacity -= capacity
+            size -= capacity
+            taken.append(room_id)
+        return taken
+
+    def release(self, room_ids):
+        for room_id in room_ids:
+            bisect.insort(self.free, (self.capacities[room_id], room_id))
+            self.capacity += self.capacities[room_id]
+
+
+def penalty_by_session(subject_id, graph, sessions):
+    """
+    Proximity penalty the subject's students would get in every session,
+    from one pass over its neighbours.
+    """
+    penalties = Counter()
+    for neighbour, weight in graph.get(subject_id, {}).items():
+        other = sessions.get(neighbour)
+        if other is None:
+            continue
+        for distance, factor in PROXIMITY_WEIGHTS.items():
+            penalties[other - distance] += weight * factor
+            penalties[other + distance] += weight * factor
+    return penalties
+
+
+def dsatur(subject_ids, enrolled, graph, rooms, max_sessions=None):
+    """
+    Colours the conflict graph with DSatur: repeatedly takes the subject with
+    the most distinct sessions among its neighbours (ties broken by weighted
+    degree) and puts it in the first session without a conflict whose free
+    rooms still seat its candidates. Returns (sessions, allocation,
+    session_rooms, unscheduled).
+    """
+    total_capacity = sum(capacity for _, capacity in rooms)
+    degree = {subject_id: sum(graph.get(subject_id, {}).values()) for subject_id in subject_ids}
+    saturation = {subject_id: set() for subject_id in subject_ids}
+    heap = [(0, -degree[subject_id], -enrolled[subject_id], subject_id) for subject_id in subject_ids]
+    heapq.heapify(heap)
+
+    sessions, session_rooms, allocation, unscheduled = {}, [], {}, {}
+    while heap:
+        negative_saturation, _, _, subject_id = heapq.heappop(heap)
+        if subject_id in sessions or subject_id in unscheduled:
+            continue
+        if -negative_saturation != len(saturation[subject_id]):
+            continue  # stale entry, a fresher one is in the heap
+
+        size = enrolled[subject_id]
+        session = next(
+            (
+                session for session in range(len(session_rooms))
+                if session not in saturation[subject_id] and session_rooms[session].fits(size)
+            ),
+            None,
+        )
+        if session is None:
+            if (max_sessions is not None and len(session_rooms) >= max_sessions) or size > total_capacity:
+                unscheduled[subject_id] = True
+                continue
+            session = len(session_rooms)
+            session_rooms.append(SessionRooms(rooms))
+
+        sessions[subject_id] = session
+        allocation[subject_id] = session_rooms[session].take(size)
+        for neighbour in graph.get(subject_id, {}):
+            if neighbour in saturation and neighbour not in sessions and session not in saturation[neighbour]:
+                saturation[neighbour].add(session)
+                heapq.heappush(heap, (-len(saturation[neighbour]), -degree[neighbour], -enrolled[neighbour], neighbour))
+
+    return sessions, allocation, session_rooms, list(unscheduled)
+
+
+def improve(sessions, allocation, session_rooms, enrolled, graph, passes=IMPROVEMENT_PASSES):
+    """
+    Local improvement: moves single exams to another conflict-free session
+    whose free rooms seat them whenever that lowers the proximity penalty of
+    the students involved. Returns the number of moves made.
+    """
+    session_count = len(session_rooms)
+
+    moves = 0
+    for _ in range(passes):
+        moved = False
+        for subject_id in sorted(sessions, key=lambda subject_id: -len(graph.get(subject_id, {}))):
+            current = sessions[subject_id]
+            blocked = {sessions.get(neighbour) for neighbour in graph.get(subject_id, {})}
+            penalties = penalty_by_session(subject_id, graph, sessions)
+            best, best_penalty = current, penalties[current]
+            if not best_penalty:
+                continue
+            for session in range(session_count):
+                if session == current or session in blocked or not session_rooms[session].fits(enrolled[subject_id]):
+                    continue
+                penalty = penalties[session]
+                if penalty < best_penalty:
+                    best, best_penalty = session, penalty
+            if best != current:
+                session_rooms[current].release(allocation[subject_id])
+                allocation[subject_id] = session_rooms[best].take(enrolled[subject_id])
+                sessions[subject_id] = best
+                moves += 1
+                moved = True
+        if not moved:
+            break
+    return moves
+
+
+def total_penalty(sessions, graph):
+    return sum(
+        weight * PROXIMITY_WEIGHTS.get(abs(sessions[first] - sessions[second]), 0)
+        for first, neighbours in graph.items() if first in sessions
+        for second, weight in neighbours.items() if second in sessions and first < second
+    )
+
+
+def schedule_exams(max_sessions=None, passes=IMPROVEMENT_PASSES, save=True):
+    """
+    Schedules one exam per subject with enrolled students so that no student
+    has two exams in the same session and every session fits in the rooms.
+    Replaces the stored exam timetable when save is true.
+    """
+    started = time.monotonic()
+    enrolled, graph = build_conflict_graph()
+    rooms = list(Classroom.objects.values_list('id', 'capacity'))
+    subject_ids = sorted(enrolled)
+    if not subject_ids:
+        return {"status": "error", "message": "No enrollments to schedule exams for."}
+    if not rooms:
+        return {"status": "error", "message": "No classrooms available for exams."}
+
+    sessions, allocation, session_rooms, unscheduled = dsatur(subject_ids, enrolled, graph, rooms, max_sessions)
+    initial_penalty = total_penalty(sessions, graph)
+    moves = improve(sessions, allocation, session_rooms, enrolled, graph, passes)
+    # Renumber densely in case local improvement emptied a session
+    numbers = {session: number for number, session in enumerate(sorted(set(sessions.values())))}
+    sessions = {subject_id: numbers[session] for subject_id, session in sessions.items()}
+
+    # Sessions only accept exams their free rooms can seat, so this is a safety net
+    capacities = dict(rooms)
+    unseated = [
+        subject_id for subject_id in sessions
+        if sum(capacities[room_id] for room_id in allocation[subject_id] or ()) < enrolled[subject_id]
+    ]
+    if unseated:
+        logger.error(f"Exam scheduling left {len(unseated)} exams without enough seats, nothing saved.")
+    elif save:
+        save_schedule(sessions, allocation, enrolled)
+
+    codes = dict(Subject.objects.filter(id__in=unscheduled + unseated).values_list('id', 'code'))
+    if unseated:
+        status, message = "error", f"{len(unseated)} exams could not be seated."
+    elif unscheduled:
+        status, message = "partial", f"{len(unscheduled)} exams could not be scheduled."
+    else:
+        status, message = "success", "Exams scheduled successfully."
+    result = {
+        "status": status,
+        "message": message,
+        "subjects": len(subject_ids),
+        "conflicts": sum(len(neighbours) for neighbours in graph.values()) // 2,
+        "sessions": len(set(sessions.values())),
+        "unscheduled": [codes.get(subject_id, subject_id) for subject_id in unscheduled],
+        "unseated": [codes.get(subject_id, subject_id) for subject_id in unseated],
+        "initial_penalty": initial_penalty,
+        "penalty": total_penalty(sessions, graph),
+        "improvement_moves": moves,
+        "seconds": round(time.monotonic() - started, 3),
+    }
+    logger.info(f"Exam scheduling finished: {result}")
+    return result
+
+
+def save_schedule(sessions, allocation, enrolled):
+    """
+    Replaces the stored exam timetable; session n (0-based) becomes ExamSession number n + 1.
+    """
+    with transaction.atomic():
+        Exam.objects.all().delete()
+        ExamSession.objects.all().delete()
+        ExamSession.objects.bulk_create([ExamSession(number=session + 1) for session in set(sessions.values())])
+        session_ids = dict(ExamSession.objects.values_list('number', 'id'))
+        Exam.objects.bulk_create([
+            Exam(subject_id=subject_id, session_id=session_ids[session + 1], candidates=enrolled[subject_id])
+            for subject_id, session in sessions.items()
+        ], batch_size=1000)
+        exam_ids = dict(Exam.objects.values_list('subject_id', 'id'))
+        Exam.classrooms.through.objects.bulk_create([
+            Exam.classrooms.through(exam_id=exam_ids[subject_id], classroom_id=room_id)
+            for subject_id, room_ids in allocation.items() for room_id in room_ids
+        ], batch_size=1000)
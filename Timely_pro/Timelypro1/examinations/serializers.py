@@ -0,0 +1,20 @@
+from rest_framework import serializers
+
+from .models import Exam, ExamSession
+
+
+# Exam Session Serializer
+class ExamSessionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ExamSession
+        fields = '__all__'
+
+
+# Exam Serializer
+class ExamSerializer(serializers.ModelSerializer):
+    subject_code = serializers.CharField(source='subject.code', read_only=True)
+    session_number = serializers.IntegerField(source='session.number', read_only=True)
+
+    class Meta:
+        model = Exam
+        fields = ['id', 'subject', 'subject_code', 'session', 'session_number', 'classrooms', 'candidates']
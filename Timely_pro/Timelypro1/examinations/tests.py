@@ -1,3 +1,100 @@
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
 
-# Create your tests here.
+from core.models import Classroom, Degree, Department, Student, Subject
+from examinations.models import Exam
+from examinations.scheduler import SessionRooms, dsatur, improve, schedule_exams
+from users.models import CustomUser
+
+
+class SessionRoomsTests(SimpleTestCase):
+    def test_takes_smallest_room_that_fits(self):
+        rooms = SessionRooms([(1, 100), (2, 40), (3, 60)])
+        self.assertEqual(rooms.take(50), [3])
+        self.assertEqual(rooms.capacity, 140)
+
+    def test_splits_exam_across_largest_rooms(self):
+        rooms = SessionRooms([(1, 100), (2, 40), (3, 60)])
+        self.assertEqual(rooms.take(150), [1, 3])
+        self.assertEqual(rooms.capacity, 40)
+
+    def test_refuses_exam_the_free_rooms_cannot_seat(self):
+        rooms = SessionRooms([(1, 100), (2, 100)])
+        rooms.take(60)
+        rooms.take(60)
+        self.assertFalse(rooms.fits(60))
+        self.assertIsNone(rooms.take(60))
+        self.assertEqual(rooms.capacity, 0)
+
+    def test_release_returns_rooms(self):
+        rooms = SessionRooms([(1, 100), (2, 100)])
+        taken = rooms.take(60)
+        rooms.release(taken)
+        self.assertEqual(rooms.capacity, 200)
+        self.assertEqual(rooms.take(60), taken)
+
+
+class DsaturTests(SimpleTestCase):
+    def test_whole_rooms_limit_a_session(self):
+        # Three independent 60 student exams fit the 200 seats but not the two rooms
+        enrolled = {1: 60, 2: 60, 3: 60}
+        sessions, allocation, session_rooms, unscheduled = dsatur([1, 2, 3], enrolled, {}, [(10, 100), (11, 100)])
+        self.assertEqual(unscheduled, [])
+        self.assertEqual(len(set(sessions.values())), 2)
+        for subject_id, room_ids in allocation.items():
+            self.assertTrue(room_ids)
+        for session in set(sessions.values()):
+            members = [subject_id for subject_id, other in sessions.items() if other == session]
+            taken = [room_id for subject_id in members for room_id in allocation[subject_id]]
+            self.assertEqual(len(taken), len(set(taken)))
+
+    def test_conflicting_exams_get_different_sessions(self):
+        graph = {1: {2: 5}, 2: {1: 5, 3: 2}, 3: {2: 2}}
+        enrolled = {1: 10, 2: 10, 3: 10}
+        sessions, _, _, unscheduled = dsatur([1, 2, 3], enrolled, graph, [(10, 100), (11, 100), (12, 100)])
+        self.assertEqual(unscheduled, [])
+        self.assertNotEqual(sessions[1], sessions[2])
+        self.assertNotEqual(sessions[2], sessions[3])
+
+    def test_max_sessions_leaves_exams_unscheduled(self):
+        enrolled = {1: 60, 2: 60, 3: 60}
+        sessions, _, _, unscheduled = dsatur([1, 2, 3], enrolled, {}, [(10, 100), (11, 100)], max_sessions=1)
+        self.assertEqual(len(sessions), 2)
+        self.assertEqual(len(unscheduled), 1)
+
+    def test_improve_keeps_rooms_consistent(self):
+        graph = {1: {2: 3}, 2: {1: 3}, 3: {}}
+        enrolled = {1: 30, 2: 30, 3: 30}
+        rooms = [(10, 50), (11, 50)]
+        sessions, allocation, session_rooms, _ = dsatur([1, 2, 3], enrolled, graph, rooms)
+        improve(sessions, allocation, session_rooms, enrolled, graph)
+        self.assertNotEqual(sessions[1], sessions[2])
+        for session, free in enumerate(session_rooms):
+            used = sum(50 * len(allocation[subject_id]) for subject_id, other in sessions.items() if other == session)
+            self.assertEqual(free.capacity + used, 100)
+
+
+class ScheduleExamsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='CSE', degree=Degree.objects.create(name='BTech'))
+        cls.subjects = [
+            Subject.objects.create(name=f'Subject {i}', code=f'S{i}', department=department, hours_per_week=3)
+            for i in range(3)
+        ]
+        for room_number in ('R1', 'R2'):
+            Classroom.objects.create(room_number=room_number, capacity=100)
+        # 60 students per subject, no student takes two of them
+        for subject in cls.subjects:
+            for i in range(60):
+                user = CustomUser.objects.create(username=f'{subject.code}-{i}')
+                Student.objects.create(user=user, department=department, year=1).subjects.add(subject)
+
+    def test_every_exam_gets_a_room(self):
+        result = schedule_exams()
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(result['sessions'], 2)
+        self.assertEqual(result['unseated'], [])
+        exams = Exam.objects.prefetch_related('classrooms')
+        self.assertEqual(len(exams), 3)
+        for exam in exams:
+            self.assertGreaterEqual(sum(room.capacity for room in exam.classrooms.all()), exam.candidates)
@@ -0,0 +1,13 @@
+#examinations/urls.py
+from django.urls import include, path
+from rest_framework.routers import DefaultRouter
+
+from .views import ExamSessionViewSet, ExamViewSet
+
+router = DefaultRouter()
+router.register(r'sessions', ExamSessionViewSet)
+router.register(r'exams', ExamViewSet)
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
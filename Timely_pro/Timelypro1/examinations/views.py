@@ -1,3 +1,57 @@
-from django.shortcuts import render
+#examinations/views.py
+import logging
 
-# Create your views here.
+from rest_framework import status, viewsets
+from rest_framework.authentication import BasicAuthentication, SessionAuthentication
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from core.permissions import IsAdmin
+from examinations.models import Exam, ExamSession
+from examinations.scheduler import schedule_exams
+from examinations.serializers import ExamSerializer, ExamSessionSerializer
+from users.authentication import HashedTokenAuthentication
+
+logger = logging.getLogger(__name__)
+
+
+class ExamSessionViewSet(viewsets.ModelViewSet):
+    queryset = ExamSession.objects.all()
+    serializer_class = ExamSessionSerializer
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [HashedTokenAuthentication, SessionAuthentication, BasicAuthentication]
+
+
+class ExamViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = Exam.objects.select_related('subject', 'session').prefetch_related('classrooms')
+    serializer_class = ExamSerializer
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [HashedTokenAuthentication, SessionAuthentication, BasicAuthentication]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        session = self.request.query_params.get('session')
+        if session:
+            queryset = queryset.filter(session__number=session)
+        return queryset
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated, IsAdmin])
+    def schedule(self, request):
+        """
+        Schedules the exams of every subject with enrolled students, replacing
+        the current exam timetable. ?max_sessions= caps the number of sessions.
+        """
+        try:
+            max_sessions = request.query_params.get('max_sessions')
+            max_sessions = int(max_sessions) if max_sessions else None
+        except ValueError:
+            return Response({"message": "max_sessions must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            result = schedule_exams(max_sessions=max_sessions)
+        except Exception as e:
+            logger.error(f"Error scheduling exams: {str(e)}", exc_info=True)
+            return Response({"message": "An error occurred during exam scheduling."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        if result['status'] == 'error':
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
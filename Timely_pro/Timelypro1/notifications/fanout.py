@@ -0,0 +1,103 @@
+#notifications/fanout.py
+import logging
+from collections import Counter, defaultdict
+
+from django.db import transaction
+
+from core.models import Faculty, Notification, Student, Subject
+from core.versioning import bump_version, model_scope
+from notifications.pubsub import publish_notification
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+MESSAGE_LENGTH = Notification._meta.get_field('message').max_length
+
+
+def diff_timetables(previous_rows, current_rows):
+    """
+    Compares two timetables given as (subject_id, time_slot_id, classroom_id,
+    faculty_id) rows and returns the (added, removed) multisets.
+    """
+    previous, current = Counter(previous_rows), Counter(current_rows)
+    return current - previous, previous - current
+
+
+def affected_users(changed_rows):
+    """
+    Maps every user affected by the changed rows to the ids of the subjects
+    that changed for them: students and faculty through their subjects, plus
+    faculty directly assigned to a changed session.
+    """
+    subject_ids = {row[0] for row in changed_rows}
+    affected = defaultdict(set)
+
+    enrollments = Student.subjects.through.objects.filter(subject_id__in=subject_ids)
+    for user_id, subject_id in enrollments.values_list('student__user_id', 'subject_id').iterator(chunk_size=5000):
+        affected[user_id].add(subject_id)
+
+    teaching = Faculty.subjects.through.objects.filter(subject_id__in=subject_ids)
+    for user_id, subject_id in teaching.values_list('faculty__user_id', 'subject_id').iterator(chunk_size=5000):
+        affected[user_id].add(subject_id)
+
+    faculty_subjects = defaultdict(set)
+    for subject_id, _, _, faculty_id in changed_rows:
+        if faculty_id:
+            faculty_subjects[faculty_id].add(subject_id)
+    for faculty_id, user_id in Faculty.objects.filter(id__in=faculty_subjects).values_list('id', 'user_id'):
+        affected[user_id] |= faculty_subjects[faculty_id]
+
+    return affected
+
+
+def _message(codes):
+    message = f"Timetable updated for {', '.join(sorted(codes))}."
+    if len(message) > MESSAGE_LENGTH:
+        message = message[:MESSAGE_LENGTH - 3] + '...'
+    return message
+
+
+def _publish_all(notifications):
+    for notification in notifications:
+        publish_notification(notification)
+
+
+def _create_batch(batch):
+    # bulk_create skips post_save, so push the new notifications explicitly,
+    # once the transaction creating them has committed
+    notifications = Notification.objects.bulk_create(batch)
+    transaction.on_commit(lambda: _publish_all(notifications))
+    return len(batch)
+
+
+def notify_timetable_changes(previous_rows, current_rows, batch_size=BATCH_SIZE):
+    """
+    Creates one timetable_update notification for every user whose sessions
+    differ between the two timetables, in bulk_create batches.
+    Returns the number of notifications created.
+    """
+    added, removed = diff_timetables(previous_rows, current_rows)
+    changed_rows = set(added) | set(removed)
+    if not changed_rows:
+        logger.info("Timetable unchanged, no notifications sent.")
+        return 0
+
+    affected = affected_users(changed_rows)
+    codes = dict(Subject.objects.filter(id__in={row[0] for row in changed_rows}).values_list('id', 'code'))
+
+    batch, created = [], 0
+    for user_id, subject_ids in affected.items():
+        batch.append(Notification(
+            user_id=user_id,
+            message=_message(codes[subject_id] for subject_id in subject_ids if subject_id in codes),
+            notification_type='timetable_update',
+        ))
+        if len(batch) >= batch_size:
+            created += _create_batch(batch)
+            batch = []
+    if batch:
+        created += _create_batch(batch)
+
+    bump_version(model_scope(Notification))
+    logger.info(f"Sent {created} timetable update notifications for {len(changed_rows)} changed sessions.")
+    return created
@@ -0,0 +1,183 @@
+#notifications/pubsub.py
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+from core.caches import is_process_local
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_CHANNEL = 'broadcast'
+
+
+def user_channel(user_id):
+    return f"user:{user_id}"
+
+
+class Subscription:
+    """
+    Queue of the messages published to a set of channels, bound to the
+    subscriber's event loop. Must be closed once the subscriber goes away.
+    """
+
+    def __init__(self, broker, channels):
+        self.broker = broker
+        self.channels = channels
+        self.queue = asyncio.Queue(maxsize=getattr(settings, 'PUBSUB_QUEUE_SIZE', 1000))
+        self.loop = asyncio.get_running_loop()
+
+    def deliver(self, message):
+        """
+        Thread-safe: hands a message over to the subscriber's event loop.
+        """
+        def put():
+            if self.queue.full():
+                logger.warning(f"Dropping message for slow subscriber on {self.channels}.")
+                return
+            self.queue.put_nowait(message)
+        self.loop.call_soon_threadsafe(put)
+
+    async def get(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """
+    Delivers messages to subscribers living in the same process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+
+    def subscribe(self, channels):
+        subscription = Subscription(self, tuple(channels))
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscriptions.get(channel)
+                if subscribers:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscriptions[channel]
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscriptions.get(channel, ()))
+        for subscription in subscribers:
+            subscription.deliver(message)
+        return len(subscribers)
+
+
+class CacheBroker(InProcessBroker):
+    """
+    Cross-process broker on top of the shared Django cache named by
+    PUBSUB_CACHE_ALIAS (file, Redis, Memcached). Published messages are
+    appended to a per-channel log in the cache and a background thread per
+    process relays new entries of the channels that have local subscribers.
+    """
+    poll_interval = 0.5
+    history = 100
+
+    def __init__(self):
+        super().__init__()
+        alias = getattr(settings, 'PUBSUB_CACHE_ALIAS', 'default')
+        if is_process_local(alias):
+            raise ImproperlyConfigured(
+                f"CacheBroker needs a cache shared between processes, but the '{alias}' cache is process-local. "
+                "Point PUBSUB_CACHE_ALIAS at a shared cache or use InProcessBroker."
+            )
+        self.cache = caches[alias]
+        self.origin = uuid.uuid4().hex
+        self._cursors = {}
+        self._thread = None
+
+    def _sequence_key(self, channel):
+        return f"pubsub:{channel}:sequence"
+
+    def _message_key(self, channel, sequence):
+        return f"pubsub:{channel}:{sequence}"
+
+    def subscribe(self, channels):
+        subscription = super().subscribe(channels)
+        with self._lock:
+            for channel in subscription.channels:
+                self._cursors.setdefault(channel, self.cache.get(self._sequence_key(channel), 0))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._relay, name='pubsub-relay', daemon=True)
+                self._thread.start()
+        return subscription
+
+    def publish(self, channel, message):
+        key = self._sequence_key(channel)
+        self.cache.add(key, 0, timeout=None)
+        sequence = self.cache.incr(key)
+        self.cache.set(self._message_key(channel, sequence), (self.origin, message), timeout=60)
+        # Local subscribers are served directly; the relay skips our own messages
+        return super().publish(channel, message)
+
+    def _relay(self):
+        while True:
+            with self._lock:
+                channels = [channel for channel in self._cursors if channel in self._subscriptions]
+            for channel in channels:
+                try:
+                    self._relay_channel(channel)
+                except Exception as e:
+                    logger.error(f"Error relaying pubsub channel {channel}: {e}")
+            time.sleep(self.poll_interval)
+
+    def _relay_channel(self, channel):
+        latest = self.cache.get(self._sequence_key(channel), 0)
+        cursor = max(self._cursors.get(channel, latest), latest - self.history)
+        if latest <= cursor:
+            return
+        keys = [self._message_key(channel, sequence) for sequence in range(cursor + 1, latest + 1)]
+        for key, (origin, message) in sorted(self.cache.get_many(keys).items(), key=lambda item: int(item[0].rsplit(':', 1)[1])):
+            if origin != self.origin:
+                super().publish(channel, message)
+        self._cursors[channel] = latest
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(getattr(settings, 'PUBSUB_BROKER', 'notifications.pubsub.InProcessBroker'))()
+
+
+def notification_event(notification):
+    return {
+        "type": "notification",
+        "id": notification.id,
+        "message": notification.message,
+        "notification_type": notification.notification_type,
+        "timestamp": notification.timestamp.isoformat() if notification.timestamp else None,
+        "is_read": notification.is_read,
+    }
+
+
+def publish_notification(notification):
+    return publish(user_channel(notification.user_id), notification_event(notification))
+
+
+def publish(channel, message):
+    try:
+        return get_broker().publish(channel, message)
+    except Exception as e:
+        logger.error(f"Error publishing to {channel}: {e}")
+        return 0
@@ -0,0 +1,14 @@
+#notifications/signals.py
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from core.models import Notification
+from notifications.pubsub import publish_notification
+
+
+# Push every new notification to its user once the row is committed
+@receiver(post_save, sender=Notification)
+def push_new_notification(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: publish_notification(instance))
@@ -0,0 +1,60 @@
+#notifications/sse.py
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import AuthenticationFailed
+
+from users.authentication import HashedTokenAuthentication
+
+
+async def authenticate_stream(request):
+    """
+    Resolves the user of a streaming request from an API token or the session.
+    """
+    try:
+        result = await sync_to_async(HashedTokenAuthentication().authenticate)(request)
+    except AuthenticationFailed:
+        return None
+    if result is not None:
+        return result[0]
+    user = await request.auser()
+    return user if user.is_authenticated else None
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def event_stream(subscription, initial=(), until=None):
+    """
+    Yields Server-Sent Events for the messages of a subscription, with
+    keepalive comments while idle. Stops after a message matching until().
+    """
+    heartbeat = getattr(settings, 'PUBSUB_HEARTBEAT_SECONDS', 15)
+    try:
+        yield "retry: 3000\n\n"
+        for message in initial:
+            yield sse_event(message.get("type", "message"), message)
+            if until and until(message):
+                return
+        while True:
+            try:
+                message = await subscription.get(timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield sse_event(message.get("type", "message"), message)
+            if until and until(message):
+                return
+    finally:
+        subscription.close()
+
+
+def sse_response(stream):
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
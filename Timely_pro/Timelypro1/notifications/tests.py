@@ -1,3 +1,40 @@
-from django.test import TestCase
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.models import Notification
+from notifications.fanout import _create_batch
+from notifications.pubsub import CacheBroker
+from users.models import CustomUser
+
+
+class CacheBrokerTests(SimpleTestCase):
+    @override_settings(PUBSUB_CACHE_ALIAS='default')
+    def test_refuses_process_local_cache(self):
+        with self.assertRaises(ImproperlyConfigured):
+            CacheBroker()
+
+    def test_relays_through_shared_cache(self):
+        with tempfile.TemporaryDirectory() as location:
+            shared = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location}
+            with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}, 'pubsub': shared},
+                                   PUBSUB_CACHE_ALIAS='pubsub'):
+                publisher, relay = CacheBroker(), CacheBroker()
+                relay._cursors['user:1'] = 0
+                publisher.publish('user:1', {"id": 1})
+                with mock.patch('notifications.pubsub.InProcessBroker.publish') as deliver:
+                    relay._relay_channel('user:1')
+                deliver.assert_called_once_with('user:1', {"id": 1})
+
+
+class FanoutTests(TestCase):
+    def test_publishes_after_commit(self):
+        user = CustomUser.objects.create(username='alice')
+        with mock.patch('notifications.fanout.publish_notification') as publish:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                _create_batch([Notification(user=user, message='Timetable changed', notification_type='timetable_update')])
+                publish.assert_not_called()
+            self.assertEqual(len(callbacks), 1)
+        publish.assert_called_once()
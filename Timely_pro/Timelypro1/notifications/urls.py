@@ -0,0 +1,8 @@
+#notifications/urls.py
+from django.urls import path
+
+from .views import notification_stream
+
+urlpatterns = [
+    path('stream/', notification_stream, name='notification-stream'),
+]
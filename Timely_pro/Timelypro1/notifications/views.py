@@ -1,3 +1,17 @@
-from django.shortcuts import render
+from django.http import JsonResponse
 
-# Create your views here.
+from notifications.pubsub import BROADCAST_CHANNEL, get_broker, user_channel
+from notifications.sse import authenticate_stream, event_stream, sse_response
+
+
+async def notification_stream(request):
+    """
+    Server-Sent Events stream of the authenticated user's new notifications
+    and of timetable version changes. Meant to be served by the ASGI app.
+    """
+    user = await authenticate_stream(request)
+    if user is None:
+        return JsonResponse({"message": "Authentication credentials were not provided."}, status=401)
+
+    subscription = get_broker().subscribe([user_channel(user.pk), BROADCAST_CHANNEL])
+    return sse_response(event_stream(subscription))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from reports.rendering import REPORT_FORMATS, REPORT_KINDS, render_reports
+
+
+class Command(BaseCommand):
+    help = "Renders the printable timetables of every department, faculty member and classroom into the cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', choices=REPORT_KINDS, action='append', help="Limit to a kind (repeatable).")
+        parser.add_argument('--file-type', choices=list(REPORT_FORMATS), default='html')
+        parser.add_argument('--workers', type=int, default=None, help="Rendering threads (default: REPORT_WORKERS).")
+
+    def handle(self, *args, **options):
+        for kind in options['kind'] or REPORT_KINDS:
+            summary = render_reports(kind, options['file_type'], workers=options['workers'])
+            self.stdout.write(self.style.SUCCESS(
+                f"{kind}: {summary['rendered']} rendered, {summary['cached']} already cached, {summary['failed']} failed."
+            ))
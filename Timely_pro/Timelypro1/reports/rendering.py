@@ -0,0 +1,200 @@
+#reports/rendering.py
+import io
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.template.loader import render_to_string
+
+from core.grids import get_grid
+from core.models import Classroom, Department, Faculty, Subject
+from core.versioning import TIMETABLE_SCOPE, format_version, get_version, model_scope
+from users.models import CustomUser
+
+logger = logging.getLogger(__name__)
+
+REPORT_KINDS = ('department', 'faculty', 'classroom')
+REPORT_FORMATS = {
+    'html': 'text/html; charset=utf-8',
+    'pdf': 'application/pdf',
+}
+
+
+# Reports print department, subject, faculty and room names, so renaming any of them invalidates them too.
+# The cells come from the grids, which follow the same renames through the timetable version.
+VERSION_SCOPES = (
+    TIMETABLE_SCOPE,
+    model_scope(Department),
+    model_scope(Subject),
+    model_scope(Faculty),
+    model_scope(CustomUser),
+    model_scope(Classroom),
+)
+
+
+class ReportUnavailable(Exception):
+    pass
+
+
+def entity_titles(kind, ids=None):
+    """
+    Maps entity ids of a kind to the title printed on their report.
+    """
+    if kind == 'department':
+        queryset = Department.objects.values_list('id', 'name')
+    elif kind == 'faculty':
+        queryset = Faculty.objects.values_list('id', 'user__username')
+    else:
+        queryset = Classroom.objects.values_list('id', 'room_number')
+    if ids is not None:
+        queryset = queryset.filter(id__in=ids)
+    return dict(queryset)
+
+
+def report_versions():
+    return ":".join(format_version(get_version(scope)) for scope in VERSION_SCOPES)
+
+
+def report_cache_key(kind, entity_id, file_format, versions):
+    return f"report:{versions}:{kind}:{entity_id}:{file_format}"
+
+
+def _html_to_pdf(html):
+    try:
+        from xhtml2pdf import pisa
+    except ImportError:
+        raise ReportUnavailable("PDF reports need the xhtml2pdf package.")
+    output = io.BytesIO()
+    result = pisa.CreatePDF(html, dest=output, encoding='utf-8')
+    if result.err:
+        raise ReportUnavailable("The PDF report could not be rendered.")
+    return output.getvalue()
+
+
+def render_report(kind, entity_id, file_format, title=None):
+    """
+    Renders the printable timetable of one entity. Returns None if the entity
+    does not exist.
+    """
+    grid = get_grid(kind, entity_id)
+    if grid is None:
+        return None
+    if title is None:
+        title = entity_titles(kind, [entity_id]).get(entity_id, entity_id)
+
+    html = render_to_string('reports/timetable.html', {
+        'kind': kind,
+        'title': title,
+        'version': grid['version'],
+        'periods': grid['periods'],
+        'rows': zip(grid['days'], grid['grid']),
+        'pdf': file_format == 'pdf',
+    })
+    if file_format == 'pdf':
+        return _html_to_pdf(html)
+    return html.encode('utf-8')
+
+
+def _report_timeout():
+    return getattr(settings, 'TIMETABLE_GRID_CACHE_TIMEOUT', None)
+
+
+def get_report(kind, entity_id, file_format):
+    """
+    Returns the report of an entity for the current versions of the
+    timetable and the names it prints, rendering it only on a cache miss.
+    """
+    key = report_cache_key(kind, entity_id, file_format, report_versions())
+    report = cache.get(key)
+    if report is None:
+        report = render_report(kind, entity_id, file_format)
+        if report is not None:
+            cache.set(key, report, timeout=_report_timeout())
+    return report
+
+
+def _render_into_cache(kind, entity_id, file_format, title, versions):
+    try:
+        report = render_report(kind, entity_id, file_format, title)
+        if report is not None:
+            cache.set(report_cache_key(kind, entity_id, file_format, versions), report, timeout=_report_timeout())
+        return report is not None
+    finally:
+        # Pool threads open their own connections
+        connections.close_all()
+
+
+def render_reports(kind, file_format='html', ids=None, workers=None, progress=None):
+    """
+    Renders the reports of every entity of a kind (or of the given ids) in
+    parallel and stores them in the cache. Reports already cached for the
+    current version are skipped. Returns a summary of the run.
+    """
+    versions = report_versions()
+    titles = entity_titles(kind, ids)
+    cached = cache.get_many([report_cache_key(kind, entity_id, file_format, versions) for entity_id in titles])
+    pending = {
+        entity_id: title for entity_id, title in titles.items()
+        if report_cache_key(kind, entity_id, file_format, versions) not in cached
+    }
+    summary = {"kind": kind, "format": file_format, "total": len(titles), "cached": len(titles) - len(pending), "rendered": 0, "failed": 0}
+
+    workers = workers or getattr(settings, 'REPORT_WORKERS', 4)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='report') as executor:
+        futures = {
+            executor.submit(_render_into_cache, kind, entity_id, file_format, title, versions): entity_id
+            for entity_id, title in pending.items()
+        }
+        for future in as_completed(futures):
+            try:
+                future.result()
+                summary["rendered"] += 1
+            except Exception as e:
+                summary["failed"] += 1
+                logger.error(f"Error rendering {kind} report {futures[future]}: {e}")
+            if progress:
+                progress(summary)
+
+    logger.info(f"Rendered {kind} {file_format} reports: {summary}")
+    return summary
+
+
+def build_cache_key(build_id):
+    return f"report_build:{build_id}"
+
+
+def get_build(build_id):
+    return cache.get(build_cache_key(build_id))
+
+
+def start_background_build(kinds=REPORT_KINDS, file_format='html'):
+    """
+    Renders the reports of the given kinds in a worker thread and returns the
+    build id right away; the build status is kept in the cache.
+    """
+    build_id = uuid.uuid4().hex
+    status = {"id": build_id, "status": "running", "format": file_format, "kinds": {}}
+    cache.set(build_cache_key(build_id), status, timeout=60 * 60)
+
+    def update(summary):
+        status["kinds"][summary["kind"]] = dict(summary)
+        cache.set(build_cache_key(build_id), status, timeout=60 * 60)
+
+    def target():
+        try:
+            for kind in kinds:
+                update(render_reports(kind, file_format, progress=update))
+            status["status"] = "finished"
+        except Exception as e:
+            logger.error(f"Error in report build {build_id}: {e}", exc_info=True)
+            status["status"] = "error"
+        finally:
+            cache.set(build_cache_key(build_id), status, timeout=60 * 60)
+            connections.close_all()
+
+    threading.Thread(target=target, name=f"reports-{build_id}", daemon=True).start()
+    return dict(status)
@@ -1,3 +1,42 @@
-from django.test import TestCase
+from datetime import time
 
-# Create your tests here.
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+
+from core.models import Classroom, Degree, Department, Subject, TimeSlot, Timetable
+from users.models import CustomUser
+
+
+class ReportRenameTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(CustomUser.objects.create(username='reader'))
+        self.room = Classroom.objects.create(room_number='R101', capacity=40)
+        self.url = f'/reports/classroom/{self.room.id}/'
+
+    def test_rename_invalidates_report(self):
+        response = self.client.get(self.url)
+        self.assertContains(response, 'R101')
+        etag = response['ETag']
+
+        self.room.room_number = 'R202'
+        self.room.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'R202')
+
+    def test_rename_reaches_session_cells(self):
+        department = Department.objects.create(name='CSE', degree=Degree.objects.create(name='BTech'))
+        subject = Subject.objects.create(name='Algorithms', code='CS201', department=department, hours_per_week=3)
+        slot = TimeSlot.objects.create(day='Monday', start_time=time(9), end_time=time(10), is_original=False)
+        Timetable.objects.create(department=department, subject=subject, time_slot=slot, classroom=self.room)
+        self.assertContains(self.client.get(self.url), 'CS201')
+
+        self.room.room_number = 'RX'
+        self.room.save()
+        subject.name = 'Graph Algorithms'
+        subject.save()
+        response = self.client.get(self.url)
+        self.assertContains(response, 'RX')
+        self.assertContains(response, 'Graph Algorithms')
+        self.assertNotContains(response, 'R101')
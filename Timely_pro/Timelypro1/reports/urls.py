@@ -0,0 +1,10 @@
+#reports/urls.py
+from django.urls import path
+
+from .views import ReportBuildView, ReportView
+
+urlpatterns = [
+    path('builds/', ReportBuildView.as_view(), name='report-build'),
+    path('builds/<str:build_id>/', ReportBuildView.as_view(), name='report-build-status'),
+    path('<str:kind>/<int:entity_id>/', ReportView.as_view(), name='report'),
+]
@@ -1,3 +1,78 @@
-from django.shortcuts import render
+#reports/views.py
+import logging
 
-# Create your views here.
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.authentication import BasicAuthentication, SessionAuthentication
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.conditional import ConditionalGetMixin
+from core.permissions import IsAdmin
+from reports.rendering import (
+    REPORT_FORMATS, REPORT_KINDS, VERSION_SCOPES, ReportUnavailable, get_build, get_report, start_background_build
+)
+from users.authentication import HashedTokenAuthentication
+
+logger = logging.getLogger(__name__)
+
+
+class ReportView(ConditionalGetMixin, APIView):
+    """
+    Printable timetable of a department, faculty member or classroom as HTML
+    or PDF (?file_type=), served from the report cache when possible.
+    """
+    version_scopes = VERSION_SCOPES
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [HashedTokenAuthentication, SessionAuthentication, BasicAuthentication]
+
+    def get(self, request, kind, entity_id):
+        return self.conditional_response(request, self._report_response, kind, entity_id)
+
+    def _report_response(self, request, kind, entity_id):
+        file_format = request.query_params.get('file_type', 'html')
+        if kind not in REPORT_KINDS:
+            return Response({"message": f"Unknown report kind. Use one of {', '.join(REPORT_KINDS)}."}, status=status.HTTP_404_NOT_FOUND)
+        if file_format not in REPORT_FORMATS:
+            return Response({"message": f"Unsupported file_type. Use one of {', '.join(REPORT_FORMATS)}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            report = get_report(kind, entity_id, file_format)
+        except ReportUnavailable as e:
+            return Response({"message": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        except Exception as e:
+            logger.error(f"Error rendering {kind} report {entity_id}: {str(e)}", exc_info=True)
+            return Response({"message": "An error occurred while rendering the report."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        if report is None:
+            return Response({"message": f"{kind.capitalize()} not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        response = HttpResponse(report, content_type=REPORT_FORMATS[file_format])
+        if file_format == 'pdf':
+            response['Content-Disposition'] = f'attachment; filename="timetable-{kind}-{entity_id}.pdf"'
+        return response
+
+
+class ReportBuildView(APIView):
+    """
+    Starts rendering the reports of every entity of the given kinds in the
+    background (POST) or returns the status of a build (GET).
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+    authentication_classes = [HashedTokenAuthentication, SessionAuthentication, BasicAuthentication]
+
+    def post(self, request, *args, **kwargs):
+        kinds = request.data.get('kinds') or list(REPORT_KINDS)
+        file_format = request.data.get('file_type', 'html')
+        if isinstance(kinds, str):
+            kinds = [kinds]
+        if any(kind not in REPORT_KINDS for kind in kinds) or file_format not in REPORT_FORMATS:
+            return Response({"message": "Invalid report kinds or file_type."}, status=status.HTTP_400_BAD_REQUEST)
+        build = start_background_build(kinds, file_format)
+        return Response(build, status=status.HTTP_202_ACCEPTED)
+
+    def get(self, request, build_id=None):
+        build = get_build(build_id) if build_id else None
+        if build is None:
+            return Response({"message": "Report build not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(build)
@@ -0,0 +1,160 @@
+#schedule/compiler.py
+import logging
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from core.grids import DAY_ORDER
+from core.models import Faculty, Student, Timetable
+from core.versioning import format_version, get_version
+from notifications.fanout import affected_users, diff_timetables
+
+logger = logging.getLogger(__name__)
+
+# {"generation", "version"}: the timetable version the stored schedules were compiled for
+STATE_KEY = "my_schedule:state"
+BATCH_SIZE = 500
+
+
+def _timeout():
+    return getattr(settings, 'TIMETABLE_GRID_CACHE_TIMEOUT', None)
+
+
+def schedule_cache_key(generation, user_id):
+    return f"my_schedule:{generation}:{user_id}"
+
+
+def current_generation():
+    """
+    The generation holding valid schedules for the current timetable. When
+    the timetable was edited after the last publish, the published schedules
+    can no longer be trusted and a per-version generation is filled lazily.
+    """
+    state = cache.get(STATE_KEY)
+    version = get_version()
+    if state and state["version"] == version:
+        return state["generation"]
+    return format_version(version)
+
+
+def _session(entry):
+    return {
+        "start": entry["time_slot__start_time"].strftime('%H:%M'),
+        "end": entry["time_slot__end_time"].strftime('%H:%M'),
+        "subject": entry["subject__code"],
+        "subject_name": entry["subject__name"],
+        "faculty": entry["faculty__user__username"],
+        "classroom": entry["classroom__room_number"],
+    }
+
+
+def _order(entry):
+    day = entry["time_slot__day"]
+    return (DAY_ORDER.index(day) if day in DAY_ORDER else len(DAY_ORDER), entry["time_slot__start_time"])
+
+
+def compile_schedules(generation, user_ids=None):
+    """
+    Compiles the weekly schedules of the given users (or of every student and
+    faculty member) from one pass over the timetable and stores them in the
+    generation. Students get the sessions of their subjects, faculty the
+    sessions they are assigned to. Returns {user_id: schedule}.
+    """
+    started = time.monotonic()
+    students = Student.objects.all()
+    faculty = Faculty.objects.all()
+    if user_ids is not None:
+        students = students.filter(user_id__in=user_ids)
+        faculty = faculty.filter(user_id__in=user_ids)
+    student_users = dict(students.values_list('id', 'user_id'))
+    faculty_users = dict(faculty.values_list('id', 'user_id'))
+
+    subjects_by_user = defaultdict(set)
+    enrollments = Student.subjects.through.objects.values_list('student_id', 'subject_id')
+    if user_ids is not None:
+        enrollments = enrollments.filter(student_id__in=student_users)
+    for student_id, subject_id in enrollments.iterator(chunk_size=5000):
+        subjects_by_user[student_users[student_id]].add(subject_id)
+
+    entries = Timetable.objects.values(
+        'subject_id', 'faculty_id', 'time_slot__day', 'time_slot__start_time', 'time_slot__end_time',
+        'subject__code', 'subject__name', 'faculty__user__username', 'classroom__room_number',
+    )
+    if user_ids is not None:
+        subject_ids = set().union(*subjects_by_user.values())
+        entries = entries.filter(Q(subject_id__in=subject_ids) | Q(faculty_id__in=faculty_users))
+    by_subject, by_faculty = defaultdict(list), defaultdict(list)
+    for entry in entries:
+        entry["session"] = _session(entry)
+        by_subject[entry["subject_id"]].append(entry)
+        if entry["faculty_id"]:
+            by_faculty[entry["faculty_id"]].append(entry)
+
+    roles = defaultdict(list)
+    sessions = defaultdict(list)
+    for user_id, subject_ids in subjects_by_user.items():
+        sessions[user_id] += [entry for subject_id in subject_ids for entry in by_subject.get(subject_id, [])]
+    for user_id in student_users.values():
+        roles[user_id].append('student')
+    for faculty_id, user_id in faculty_users.items():
+        roles[user_id].append('faculty')
+        sessions[user_id] += by_faculty.get(faculty_id, [])
+
+    compiled = time.time()
+    schedules = {}
+    for user_id in roles:
+        days = defaultdict(list)
+        for entry in sorted(sessions[user_id], key=_order):
+            days[entry["time_slot__day"]].append(entry["session"])
+        schedules[user_id] = {
+            "user_id": user_id,
+            "roles": roles[user_id],
+            "compiled": compiled,
+            "days": [{"day": day, "sessions": day_sessions} for day, day_sessions in days.items()],
+        }
+
+    items = [(schedule_cache_key(generation, user_id), schedule) for user_id, schedule in schedules.items()]
+    for start in range(0, len(items), BATCH_SIZE):
+        cache.set_many(dict(items[start:start + BATCH_SIZE]), timeout=_timeout())
+    logger.info(f"Compiled {len(schedules)} personal schedules in {time.monotonic() - started:.3f}s.")
+    return schedules
+
+
+def refresh_schedules(previous_rows, current_rows, previous_version, version):
+    """
+    Brings the compiled schedules up to a newly published timetable. If the
+    stored schedules were current before the publish, only the users whose
+    sessions changed are recompiled; otherwise every schedule is rebuilt.
+    """
+    state = cache.get(STATE_KEY)
+    if previous_rows is not None and state and state["version"] == previous_version:
+        generation = state["generation"]
+        added, removed = diff_timetables(previous_rows, current_rows)
+        changed_rows = set(added) | set(removed)
+        user_ids = set(affected_users(changed_rows)) if changed_rows else set()
+        if user_ids:
+            compile_schedules(generation, user_ids)
+    else:
+        generation = format_version(version)
+        compile_schedules(generation)
+    cache.set(STATE_KEY, {"generation": generation, "version": version}, timeout=None)
+
+
+def get_schedule(user_id):
+    """
+    Returns the compiled schedule of a user, compiling it on a cache miss.
+    Returns None for users who are neither a student nor faculty.
+    """
+    generation = current_generation()
+    schedule = cache.get(schedule_cache_key(generation, user_id))
+    if schedule is None:
+        logger.info(f"Schedule cache miss for user {user_id}, compiling it.")
+        schedule = compile_schedules(generation, {user_id}).get(user_id)
+    return schedule
+
+
+def invalidate_user_schedule(user_id):
+    cache.delete(schedule_cache_key(current_generation(), user_id))
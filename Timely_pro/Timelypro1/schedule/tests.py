@@ -1,3 +1,57 @@
-from django.test import TestCase
+from datetime import time
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+
+from core.models import Classroom, Degree, Department, Student, Subject, TimeSlot, Timetable, TimetableSnapshot
+from core.publish import capture_timetable, publish_timetable, restore_snapshot
+from schedule.compiler import compile_schedules, get_schedule
+from users.models import CustomUser
+
+
+class ScheduleRefreshTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='CSE', degree=Degree.objects.create(name='BTech'))
+        cls.first = TimeSlot.objects.create(day='Monday', start_time=time(9), end_time=time(10), is_original=False)
+        cls.second = TimeSlot.objects.create(day='Monday', start_time=time(10), end_time=time(11), is_original=False)
+        cls.room = Classroom.objects.create(room_number='R1', capacity=40)
+        cls.students = []
+        for code, room in (('CS201', cls.room), ('CS202', None)):
+            subject = Subject.objects.create(name=code, code=code, department=department, hours_per_week=3)
+            Timetable.objects.create(department=department, subject=subject, time_slot=cls.first, classroom=room)
+            student = Student.objects.create(user=CustomUser.objects.create(username=code.lower()), department=department, year=2)
+            student.subjects.add(subject)
+            cls.students.append(student)
+
+    def setUp(self):
+        cache.clear()
+        publish_timetable()
+
+    def sessions(self, student):
+        return [session for day in get_schedule(student.user_id)["days"] for session in day["sessions"]]
+
+    def test_restore_recompiles_only_affected_users(self):
+        snapshot = TimetableSnapshot.objects.latest('id')
+        moved = Timetable.objects.get(subject__code='CS202')
+        previous_version, previous_rows = capture_timetable()
+        moved.time_slot = self.second
+        moved.save()
+        publish_timetable(previous_rows, previous_version=previous_version)
+        self.assertEqual(self.sessions(self.students[1])[0]["start"], '10:00')
+
+        with mock.patch('schedule.compiler.compile_schedules', wraps=compile_schedules) as compile_:
+            restore_snapshot(snapshot)
+        compile_.assert_called_once()
+        self.assertEqual(compile_.call_args.args[1], {self.students[1].user_id})
+        self.assertEqual(self.sessions(self.students[1])[0]["start"], '09:00')
+
+    def test_room_rename_reaches_my_schedule(self):
+        self.client.force_authenticate(self.students[0].user)
+        self.assertContains(self.client.get('/schedule/me/'), 'R1')
+        self.room.room_number = 'RX'
+        self.room.save()
+        response = self.client.get('/schedule/me/')
+        self.assertContains(response, 'RX')
+        self.assertNotContains(response, '"R1"')
@@ -1,3 +1,42 @@
-from django.shortcuts import render
+#schedule/views.py
+import hashlib
+import logging
 
-# Create your views here.
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from rest_framework import status
+from rest_framework.authentication import BasicAuthentication, SessionAuthentication
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from schedule.compiler import get_schedule
+from users.authentication import HashedTokenAuthentication
+
+logger = logging.getLogger(__name__)
+
+
+class MyScheduleView(APIView):
+    """
+    The authenticated student's or faculty member's weekly schedule, served
+    from their compiled schedule. The ETag changes only when that schedule is
+    recompiled.
+    """
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [HashedTokenAuthentication, SessionAuthentication, BasicAuthentication]
+
+    def get(self, request):
+        try:
+            schedule = get_schedule(request.user.pk)
+        except Exception as e:
+            logger.error(f"Error loading schedule of user {request.user.pk}: {str(e)}", exc_info=True)
+            return Response({"message": "An error occurred while loading your schedule."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        if schedule is None:
+            return Response({"message": "No schedule found for this user."}, status=status.HTTP_404_NOT_FOUND)
+
+        etag = quote_etag(hashlib.md5(f"{request.user.pk}|{schedule['compiled']}".encode()).hexdigest())
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = Response(schedule)
+        response.headers.setdefault('ETag', etag)
+        return response
@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from .models import CustomUser, Role
+from .models import AuthToken, CustomUser, Role
 
 @admin.register(CustomUser)
 class CustomUserAdmin(UserAdmin):
@@ -27,6 +27,13 @@ class RoleAdmin(admin.ModelAdmin):
     list_display = ('name',)
     search_fields = ('name',)
 
+@admin.register(AuthToken)
+class AuthTokenAdmin(admin.ModelAdmin):
+    list_display = ('user', 'prefix', 'name', 'created', 'expires_at', 'revoked')
+    search_fields = ('user__username', 'prefix', 'name')
+    list_filter = ('revoked',)
+    readonly_fields = ('key_hash', 'prefix', 'created')
+
 # Signal to assign roles after user has been created
 @receiver(post_save, sender=CustomUser)
 def assign_roles(sender, instance, created, **kwargs):
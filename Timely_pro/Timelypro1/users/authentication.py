@@ -0,0 +1,82 @@
+#users/authentication.py
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+
+from core.caches import bounded_timeout
+from users.models import AuthToken
+
+KEYWORDS = (b'token', b'bearer')
+
+
+def token_cache_key(key_hash):
+    return f"auth_token:{key_hash}"
+
+
+def _auth_cache():
+    return caches[settings.AUTH_CACHE_ALIAS]
+
+
+def _cache_timeout(token):
+    timeout = bounded_timeout(settings.AUTH_CACHE_ALIAS, getattr(settings, 'AUTH_TOKEN_CACHE_TIMEOUT', 300))
+    if token.expires_at is not None:
+        timeout = min(timeout, int((token.expires_at - timezone.now()).total_seconds()))
+    return max(timeout, 1)
+
+
+def invalidate_token(key_hash):
+    _auth_cache().delete(token_cache_key(key_hash))
+
+
+class HashedTokenAuthentication(BaseAuthentication):
+    """
+    Authenticates "Authorization: Token <key>" (or Bearer) headers against
+    hashed AuthToken rows. Tokens are hashed with a single SHA-256 instead of
+    the password hasher, and resolved tokens are cached with their user in
+    the auth cache so steady-state authentication does not touch the database.
+    """
+    keyword = 'Token'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() not in KEYWORDS:
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+        return self.authenticate_credentials(key)
+
+    def authenticate_credentials(self, key):
+        key_hash = AuthToken.hash_key(key)
+        cache = _auth_cache()
+        cached = cache.get(token_cache_key(key_hash))
+        if cached is not None:
+            user, token_id, expires_at = cached
+            if expires_at is None or expires_at > timezone.now():
+                return user, token_id
+            invalidate_token(key_hash)
+            raise exceptions.AuthenticationFailed('Token has expired.')
+
+        try:
+            token = AuthToken.objects.select_related('user').get(key_hash=key_hash)
+        except AuthToken.DoesNotExist:
+            raise exceptions.AuthenticationFailed('Invalid token.')
+
+        if token.revoked:
+            raise exceptions.AuthenticationFailed('Token has been revoked.')
+        if token.is_expired:
+            raise exceptions.AuthenticationFailed('Token has expired.')
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+
+        cache.set(token_cache_key(key_hash), (token.user, token.id, token.expires_at), timeout=_cache_timeout(token))
+        return token.user, token.id
+
+    def authenticate_header(self, request):
+        return self.keyword
@@ -0,0 +1,21 @@
+#users/hashing.py
+import os
+
+
+def init_worker(settings_module):
+    """
+    Prepares a password hashing worker process. Forked workers inherit the
+    configured Django project, spawned ones have to set it up again.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def hash_password(raw_password):
+    from django.contrib.auth.hashers import make_password
+
+    return make_password(raw_password)
@@ -0,0 +1,42 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.provisioning import CHUNK_SIZE, provision_users
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates students and faculty from a CSV with the columns username, email, first_name, "
+        "last_name, role, department, year, subjects (codes separated by ';') and password."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--workers', type=int, default=None, help="Password hashing processes, 0 to hash inline.")
+        parser.add_argument('--invites', dest='invite_path', help="Give unusable passwords and write invite tokens to this CSV.")
+        parser.add_argument('--progress', dest='progress_path', help="Checkpoint file, defaults to <csv_path>.progress.")
+        parser.add_argument('--restart', action='store_true', help="Ignore the checkpoint and start from the first row.")
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options['csv_path']):
+            raise CommandError(f"{options['csv_path']} does not exist.")
+
+        progress_path = options['progress_path'] or f"{options['csv_path']}.progress"
+        if options['restart'] and os.path.exists(progress_path):
+            os.remove(progress_path)
+
+        summary = provision_users(
+            options['csv_path'],
+            chunk_size=options['chunk_size'],
+            workers=options['workers'],
+            invite_path=options['invite_path'],
+            progress_path=progress_path,
+        )
+        for error in summary['errors']:
+            self.stderr.write(error)
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {summary['created']} users, skipped {summary['skipped']} existing ones, "
+            f"{len(summary['errors'])} rows rejected (resumed from row {summary['resumed_from']})."
+        ))
@@ -1,5 +1,9 @@
 #users/models.py
+import hashlib
+import secrets
+
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
 
 class Role(models.Model):
@@ -17,3 +21,38 @@ class CustomUser(AbstractUser):
 
     def __str__(self):
         return self.username
+
+class AuthToken(models.Model):
+    """
+    API token stored as a SHA-256 hash; the plain key is only shown once, when issued.
+    """
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='auth_tokens')
+    key_hash = models.CharField(max_length=64, unique=True)
+    prefix = models.CharField(max_length=8)
+    name = models.CharField(max_length=100, blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+    revoked = models.BooleanField(default=False)
+
+    @staticmethod
+    def hash_key(key):
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    @classmethod
+    def issue(cls, user, name='', expires_at=None):
+        key = secrets.token_urlsafe(32)
+        token = cls.objects.create(
+            user=user,
+            key_hash=cls.hash_key(key),
+            prefix=key[:8],
+            name=name,
+            expires_at=expires_at,
+        )
+        return token, key
+
+    @property
+    def is_expired(self):
+        return self.expires_at is not None and self.expires_at <= timezone.now()
+
+    def __str__(self):
+        return f"{self.user.username}: {self.prefix}..."
@@ -0,0 +1,261 @@
+#users/provisioning.py
+import csv
+import json
+import logging
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.tokens import default_token_generator
+from django.db import transaction
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from core.clashes import apply_clash_changes, enrollment_changes
+from core.models import Department, Faculty, Student, Subject
+from core.versioning import bump_version, model_scope
+from users.hashing import hash_password, init_worker
+from users.models import CustomUser, Role
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1000
+PROFILE_ROLES = {
+    'student': 'Student',
+    'faculty': 'Faculty',
+}
+
+
+def read_progress(progress_path):
+    try:
+        with open(progress_path, encoding='utf-8') as progress_file:
+            return json.load(progress_file).get('rows_done', 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def write_progress(progress_path, rows_done):
+    temporary_path = f"{progress_path}.tmp"
+    with open(temporary_path, 'w', encoding='utf-8') as progress_file:
+        json.dump({'rows_done': rows_done}, progress_file)
+    os.replace(temporary_path, progress_path)
+
+
+def iter_chunks(rows, chunk_size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class ProvisioningReferences:
+    """
+    Natural key lookups loaded once for the whole run.
+    """
+
+    def __init__(self):
+        self.departments = {name: id for id, name in Department.objects.values_list('id', 'name')}
+        self.subjects = {code: (id, department_id) for id, code, department_id in Subject.objects.values_list('id', 'code', 'department_id')}
+        self.roles = {key: Role.objects.get_or_create(name=name)[0].id for key, name in PROFILE_ROLES.items()}
+
+
+def validate_row(row, line, references, existing_usernames):
+    """
+    Returns (cleaned_row, error). Rows for usernames that already exist are
+    skipped without an error so that a run can be repeated safely.
+    """
+    username = (row.get('username') or '').strip()
+    if not username:
+        return None, f"line {line}: username is required."
+    if username in existing_usernames:
+        return None, None
+
+    role = (row.get('role') or '').strip().lower()
+    if role not in PROFILE_ROLES:
+        return None, f"line {line}: role must be one of {', '.join(PROFILE_ROLES)}."
+
+    department_id = references.departments.get((row.get('department') or '').strip())
+    if department_id is None:
+        return None, f"line {line}: unknown department '{row.get('department')}'."
+
+    subject_ids = []
+    for code in filter(None, (code.strip() for code in (row.get('subjects') or '').split(';'))):
+        subject = references.subjects.get(code)
+        if subject is None:
+            return None, f"line {line}: unknown subject '{code}'."
+        if role == 'student' and subject[1] != department_id:
+            return None, f"line {line}: subject '{code}' is not offered by the student's department."
+        subject_ids.append(subject[0])
+
+    year = None
+    if role == 'student':
+        try:
+            year = int(row.get('year') or '')
+        except ValueError:
+            return None, f"line {line}: students need a numeric year."
+        if year <= 0:
+            return None, f"line {line}: students need a positive year."
+
+    return {
+        'username': username,
+        'email': (row.get('email') or '').strip(),
+        'first_name': (row.get('first_name') or '').strip(),
+        'last_name': (row.get('last_name') or '').strip(),
+        'password': row.get('password') or None,
+        'role': role,
+        'department_id': department_id,
+        'subject_ids': subject_ids,
+        'year': year,
+    }, None
+
+
+def _hash_passwords(rows, executor, invite):
+    if invite:
+        unusable_password = make_password(None)
+        return [unusable_password] * len(rows)
+    raw_passwords = [row['password'] for row in rows]
+    if executor is None:
+        return [hash_password(raw) for raw in raw_passwords]
+    return list(executor.map(hash_password, raw_passwords, chunksize=max(1, len(raw_passwords) // 32)))
+
+
+def _create_chunk(rows, passwords, references):
+    """
+    Creates the users, their role and profile rows and the subject M2M rows
+    of one chunk with one bulk_create per table.
+    """
+    with transaction.atomic():
+        CustomUser.objects.bulk_create([
+            CustomUser(
+                username=row['username'],
+                email=row['email'],
+                first_name=row['first_name'],
+                last_name=row['last_name'],
+                password=password,
+            )
+            for row, password in zip(rows, passwords)
+        ])
+        users = {user.username: user for user in CustomUser.objects.filter(username__in=[row['username'] for row in rows])}
+
+        CustomUser.roles.through.objects.bulk_create([
+            CustomUser.roles.through(customuser_id=users[row['username']].id, role_id=references.roles[row['role']])
+            for row in rows
+        ])
+
+        students = [row for row in rows if row['role'] == 'student']
+        faculty = [row for row in rows if row['role'] == 'faculty']
+        Student.objects.bulk_create([
+            Student(user_id=users[row['username']].id, department_id=row['department_id'], year=row['year'])
+            for row in students
+        ])
+        Faculty.objects.bulk_create([
+            Faculty(user_id=users[row['username']].id, department_id=row['department_id'])
+            for row in faculty
+        ])
+
+        user_ids = [user.id for user in users.values()]
+        student_ids = dict(Student.objects.filter(user_id__in=user_ids).values_list('user_id', 'id'))
+        faculty_ids = dict(Faculty.objects.filter(user_id__in=user_ids).values_list('user_id', 'id'))
+        Student.subjects.through.objects.bulk_create([
+            Student.subjects.through(student_id=student_ids[users[row['username']].id], subject_id=subject_id)
+            for row in students for subject_id in row['subject_ids']
+        ])
+        Faculty.subjects.through.objects.bulk_create([
+            Faculty.subjects.through(faculty_id=faculty_ids[users[row['username']].id], subject_id=subject_id)
+            for row in faculty for subject_id in row['subject_ids']
+        ])
+
+        # bulk_create skips m2m_changed, so count the new shared enrollments here
+        clashes = Counter()
+        for row in students:
+            clashes.update(enrollment_changes(row['subject_ids'], (), 1))
+        apply_clash_changes(clashes)
+    return users
+
+
+def _write_invites(invite_writer, rows, users):
+    for row in rows:
+        user = users[row['username']]
+        invite_writer.writerow([
+            user.username,
+            user.email,
+            urlsafe_base64_encode(force_bytes(user.pk)),
+            default_token_generator.make_token(user),
+        ])
+
+
+def provision_users(csv_path, chunk_size=CHUNK_SIZE, workers=None, invite_path=None, progress_path=None, settings_module=None):
+    """
+    Streams a CSV of students and faculty (username, email, first_name,
+    last_name, role, department, year, subjects, password) and creates them
+    chunk by chunk. Passwords are hashed across a process pool, or replaced by
+    unusable passwords plus password-reset invite tokens when invite_path is
+    given. Progress is checkpointed after each chunk so an interrupted run
+    resumes where it stopped.
+    """
+    progress_path = progress_path or f"{csv_path}.progress"
+    rows_done = read_progress(progress_path)
+    invite = invite_path is not None
+    references = ProvisioningReferences()
+    summary = {'created': 0, 'skipped': 0, 'errors': [], 'resumed_from': rows_done}
+
+    executor = None
+    if not invite and workers != 0:
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_worker,
+            initargs=(settings_module or os.environ.get('DJANGO_SETTINGS_MODULE'),),
+        )
+
+    invite_file = open(invite_path, 'a', newline='', encoding='utf-8') if invite else None
+    try:
+        invite_writer = csv.writer(invite_file) if invite_file else None
+        if invite_file and invite_file.tell() == 0:
+            invite_writer.writerow(['username', 'email', 'uid', 'token'])
+
+        with open(csv_path, newline='', encoding='utf-8') as csv_file:
+            reader = enumerate(csv.DictReader(csv_file), start=2)
+            for _ in islice(reader, rows_done):
+                pass
+
+            for chunk in iter_chunks(reader, chunk_size):
+                usernames = [(row.get('username') or '').strip() for _, row in chunk]
+                existing_usernames = set(CustomUser.objects.filter(username__in=usernames).values_list('username', flat=True))
+                rows, seen = [], set()
+                for line, row in chunk:
+                    cleaned, error = validate_row(row, line, references, existing_usernames | seen)
+                    if error:
+                        summary['errors'].append(error)
+                    elif cleaned is None:
+                        summary['skipped'] += 1
+                    elif not invite and not cleaned['password']:
+                        summary['errors'].append(f"line {line}: password is required without invites.")
+                    else:
+                        seen.add(cleaned['username'])
+                        rows.append(cleaned)
+
+                if rows:
+                    passwords = _hash_passwords(rows, executor, invite)
+                    users = _create_chunk(rows, passwords, references)
+                    if invite_writer:
+                        _write_invites(invite_writer, rows, users)
+                        invite_file.flush()
+                    summary['created'] += len(rows)
+
+                rows_done += len(chunk)
+                write_progress(progress_path, rows_done)
+                logger.info(f"Provisioned {summary['created']} users ({rows_done} rows read).")
+    finally:
+        if executor:
+            executor.shutdown()
+        if invite_file:
+            invite_file.close()
+
+    for model in (CustomUser, Student, Faculty):
+        bump_version(model_scope(model))
+    summary['rows_done'] = rows_done
+    return summary
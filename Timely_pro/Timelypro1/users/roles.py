@@ -0,0 +1,35 @@
+#users/roles.py
+from django.conf import settings
+from django.core.cache import caches
+
+from core.caches import bounded_timeout
+
+
+def role_cache_key(user_id):
+    return f"user_roles:{user_id}"
+
+
+def _auth_cache():
+    return caches[settings.AUTH_CACHE_ALIAS]
+
+
+def get_user_roles(user):
+    """
+    Returns the names of a user's roles as a frozenset, cached per user in the
+    auth cache until the user's roles change.
+    """
+    if user is None or not user.is_authenticated:
+        return frozenset()
+
+    cache = _auth_cache()
+    key = role_cache_key(user.pk)
+    roles = cache.get(key)
+    if roles is None:
+        roles = frozenset(user.roles.values_list('name', flat=True))
+        timeout = bounded_timeout(settings.AUTH_CACHE_ALIAS, getattr(settings, 'USER_ROLES_CACHE_TIMEOUT', None))
+        cache.set(key, roles, timeout=timeout)
+    return roles
+
+
+def invalidate_user_roles(user_ids):
+    _auth_cache().delete_many([role_cache_key(user_id) for user_id in user_ids])
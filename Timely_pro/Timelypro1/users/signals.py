@@ -0,0 +1,42 @@
+#users/signals.py
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from users.authentication import invalidate_token
+from users.models import AuthToken, CustomUser, Role
+from users.roles import invalidate_user_roles
+
+
+# Revoked, expired or deleted tokens must not be served from the cache
+@receiver(post_save, sender=AuthToken)
+@receiver(post_delete, sender=AuthToken)
+def invalidate_cached_token(sender, instance, **kwargs):
+    invalidate_token(instance.key_hash)
+
+
+# Cached tokens carry their user, so any change to the user drops them
+@receiver(post_save, sender=CustomUser)
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    if created:
+        return
+    for key_hash in AuthToken.objects.filter(user=instance).values_list('key_hash', flat=True):
+        invalidate_token(key_hash)
+
+
+# Role sets are cached per user, drop them whenever a user's roles change
+@receiver(m2m_changed, sender=CustomUser.roles.through)
+def invalidate_roles_on_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear', 'post_clear'):
+        return
+    if not reverse:
+        invalidate_user_roles([instance.pk])
+    elif action == 'pre_clear':
+        invalidate_user_roles(instance.customuser_set.values_list('id', flat=True))
+    else:
+        invalidate_user_roles(pk_set or ())
+
+
+@receiver(post_save, sender=Role)
+@receiver(pre_delete, sender=Role)
+def invalidate_roles_of_role(sender, instance, **kwargs):
+    invalidate_user_roles(instance.customuser_set.values_list('id', flat=True))
@@ -1,3 +1,125 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import exceptions
+
+from core.caches import bounded_timeout
+from users.authentication import HashedTokenAuthentication, _cache_timeout, token_cache_key
+from users.models import AuthToken, CustomUser, Role
+from users.roles import get_user_roles, role_cache_key
+
+
+class UserRolesCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Role.objects.create(name='Admin')
+        cls.faculty = Role.objects.create(name='Faculty')
+
+    def setUp(self):
+        caches[settings.AUTH_CACHE_ALIAS].clear()
+        self.user = CustomUser.objects.create(username='alice')
+        self.user.roles.add(self.admin)
+
+    def test_roles_are_cached(self):
+        self.assertEqual(get_user_roles(self.user), {'Admin'})
+        with self.assertNumQueries(0):
+            self.assertEqual(get_user_roles(self.user), {'Admin'})
+
+    def test_removing_a_role_drops_it(self):
+        get_user_roles(self.user)
+        self.user.roles.remove(self.admin)
+        self.assertEqual(get_user_roles(self.user), frozenset())
+
+    def test_adding_a_user_from_the_role_side_drops_it(self):
+        get_user_roles(self.user)
+        self.faculty.customuser_set.add(self.user)
+        self.assertEqual(get_user_roles(self.user), {'Admin', 'Faculty'})
+
+    def test_clearing_a_role_drops_it_for_its_users(self):
+        get_user_roles(self.user)
+        self.admin.customuser_set.clear()
+        self.assertEqual(get_user_roles(self.user), frozenset())
+
+    def test_renaming_a_role_drops_it(self):
+        get_user_roles(self.user)
+        self.admin.name = 'Administrator'
+        self.admin.save()
+        self.assertEqual(get_user_roles(self.user), {'Administrator'})
+
+    def test_deleting_a_role_drops_it(self):
+        get_user_roles(self.user)
+        Role.objects.filter(pk=self.admin.pk).delete()
+        self.assertEqual(get_user_roles(self.user), frozenset())
+
+    def test_role_removed_in_another_process_is_not_memoized(self):
+        # Another worker's invalidation never reaches this user object
+        get_user_roles(self.user)
+        CustomUser.roles.through.objects.filter(customuser_id=self.user.pk).delete()
+        caches[settings.AUTH_CACHE_ALIAS].delete(role_cache_key(self.user.pk))
+        self.assertEqual(get_user_roles(self.user), frozenset())
+
+
+class TokenCacheTests(TestCase):
+    def setUp(self):
+        caches[settings.AUTH_CACHE_ALIAS].clear()
+        self.user = CustomUser.objects.create(username='bob')
+        self.token, self.key = AuthToken.issue(self.user)
+        self.auth = HashedTokenAuthentication()
+
+    def test_resolved_token_is_cached(self):
+        self.assertEqual(self.auth.authenticate_credentials(self.key), (self.user, self.token.id))
+        with self.assertNumQueries(0):
+            user, token_id = self.auth.authenticate_credentials(self.key)
+        self.assertEqual((user.pk, token_id), (self.user.pk, self.token.id))
+
+    def test_revoked_token_is_rejected(self):
+        self.auth.authenticate_credentials(self.key)
+        self.token.revoked = True
+        self.token.save()
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.auth.authenticate_credentials(self.key)
+
+    def test_deleted_token_is_rejected(self):
+        self.auth.authenticate_credentials(self.key)
+        self.token.delete()
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.auth.authenticate_credentials(self.key)
+
+    def test_deactivated_user_is_rejected(self):
+        self.auth.authenticate_credentials(self.key)
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.auth.authenticate_credentials(self.key)
+
+    def test_expired_cached_token_is_rejected(self):
+        self.auth.authenticate_credentials(self.key)
+        caches[settings.AUTH_CACHE_ALIAS].set(
+            token_cache_key(self.token.key_hash), (self.user, self.token.id, timezone.now() - timedelta(seconds=1)),
+        )
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.auth.authenticate_credentials(self.key)
+
+    @override_settings(AUTH_TOKEN_CACHE_TIMEOUT=300, LOCAL_CACHE_MAX_TIMEOUT=5)
+    def test_process_local_cache_keeps_tokens_briefly(self):
+        # Revocations made by other workers only reach a local cache through expiry
+        self.assertEqual(_cache_timeout(self.token), 5)
+
+
+class BoundedTimeoutTests(TestCase):
+    @override_settings(LOCAL_CACHE_MAX_TIMEOUT=5)
+    def test_process_local_alias_is_capped(self):
+        self.assertEqual(bounded_timeout('default', None), 5)
+        self.assertEqual(bounded_timeout('default', 300), 5)
+        self.assertEqual(bounded_timeout('default', 2), 2)
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'shared': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'cache_table'},
+    })
+    def test_shared_alias_keeps_timeout(self):
+        self.assertEqual(bounded_timeout('shared', None), None)
+        self.assertEqual(bounded_timeout('shared', 300), 300)
@@ -1,4 +1,9 @@
 #users/urls.py
 from django.urls import path
 
-urlpatterns = []
+from .views import ObtainTokenView, RevokeTokenView
+
+urlpatterns = [
+    path('tokens/', ObtainTokenView.as_view(), name='token-obtain'),
+    path('tokens/revoke/', RevokeTokenView.as_view(), name='token-revoke'),
+]
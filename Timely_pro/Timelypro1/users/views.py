@@ -1,3 +1,62 @@
-from django.shortcuts import render
+from datetime import timedelta
 
-# Create your views here.
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.authentication import SessionAuthentication, BasicAuthentication
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from users.authentication import HashedTokenAuthentication
+from users.models import AuthToken
+
+
+class ObtainTokenView(APIView):
+    """
+    Exchanges a username and password for an API token. This is the only
+    request that runs the password hasher; the key is returned once.
+    """
+    permission_classes = []
+    authentication_classes = []
+
+    def post(self, request, *args, **kwargs):
+        user = authenticate(
+            request,
+            username=request.data.get('username'),
+            password=request.data.get('password'),
+        )
+        if user is None:
+            return Response({"message": "Invalid credentials."}, status=status.HTTP_400_BAD_REQUEST)
+
+        expiry_days = getattr(settings, 'AUTH_TOKEN_EXPIRY_DAYS', None)
+        expires_at = timezone.now() + timedelta(days=expiry_days) if expiry_days else None
+        token, key = AuthToken.issue(user, name=request.data.get('name', ''), expires_at=expires_at)
+        return Response(
+            {"token": key, "prefix": token.prefix, "expires_at": token.expires_at},
+            status=status.HTTP_201_CREATED
+        )
+
+
+class RevokeTokenView(APIView):
+    """
+    Revokes the token used for the request, or all of the user's tokens with {"all": true}.
+    """
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [HashedTokenAuthentication, SessionAuthentication, BasicAuthentication]
+
+    def post(self, request, *args, **kwargs):
+        if request.data.get('all'):
+            tokens = AuthToken.objects.filter(user=request.user, revoked=False)
+        elif isinstance(request.auth, int):
+            tokens = AuthToken.objects.filter(id=request.auth, user=request.user)
+        else:
+            return Response({"message": "No token to revoke."}, status=status.HTTP_400_BAD_REQUEST)
+
+        revoked = 0
+        for token in tokens:
+            token.revoked = True
+            token.save(update_fields=['revoked'])
+            revoked += 1
+        return Response({"message": f"Revoked {revoked} token(s)."})